@@ -0,0 +1,105 @@
+"""
+Compare the blank page detectors of utils/blank_page.py on test_data.
+
+Landscape pages of the issues are split like split_pages does.
+Portrait pages are put side by side into A3 spreads, every third spread with
+a blank right half and every fifth with a right half showing only a page
+number, so the detectors see blank halves as well.
+
+Run from the repository root:
+    python -m benchmarks.bench_blank_page [test_data/]
+"""
+
+import glob
+import os
+import sys
+import tempfile
+import time
+
+import fitz
+
+from utils.blank_page import is_blank
+
+DETECTORS = ["png_size", "pixmap", "content"]
+
+
+def build_spreads(path_to_pdf):
+    """
+    Return a document of A3 spreads built from the pages of the issue and
+    whether each half is expected to be blank. Halves with nothing but a page
+    number count as blank.
+    """
+    src = fitz.open(path_to_pdf)
+    spreads = fitz.open()
+    expected = []
+    portrait = [page.number for page in src if page.rect.width < page.rect.height]
+
+    for page in src:
+        if page.number not in portrait:
+            spreads.insert_pdf(src, from_page=page.number, to_page=page.number)
+            expected += [False, False]
+
+    for count, start in enumerate(range(0, len(portrait), 2)):
+        left = src[portrait[start]].rect
+        spread = spreads.new_page(-1, width=left.width * 2, height=left.height)
+        spread.show_pdf_page(
+            fitz.Rect(0, 0, left.width, left.height), src, portrait[start]
+        )
+        right = fitz.Rect(left.width, 0, left.width * 2, left.height)
+        blank = True
+        if count % 5 == 4:
+            spread.insert_text(
+                right.bl + (right.width / 2, -20), str(count), fontsize=8
+            )
+        elif count % 3 != 2 and start + 1 < len(portrait):
+            spread.show_pdf_page(right, src, portrait[start + 1])
+            blank = False
+        expected += [False, blank]
+    src.close()
+    return spreads, expected
+
+
+def get_halves(spreads):
+    """Yield the page and both halves of every spread."""
+    for spage in spreads:
+        r1 = spage.rect
+        r1.x1 /= 2
+        r2 = r1 + (r1.width, 0, r1.width, 0)
+        yield spage, r1
+        yield spage, r2
+
+
+def main(test_data_path):
+    """Print time per half page and the number of correctly detected halves."""
+    halves = []
+    expected = []
+    documents = []
+    for path_to_pdf in sorted(glob.glob(os.path.join(test_data_path, "*.pdf"))):
+        spreads, blank = build_spreads(path_to_pdf)
+        documents.append(spreads)
+        expected += blank
+        halves += list(get_halves(spreads))
+
+    with tempfile.TemporaryDirectory() as directory:
+        image_path = os.path.join(directory, "page.png")
+        results = {}
+        for detector in DETECTORS:
+            start = time.perf_counter()
+            results[detector] = [
+                is_blank(page, clip, detector, image_path=image_path)
+                for page, clip in halves
+            ]
+            elapsed = time.perf_counter() - start
+            correct = sum(a == b for a, b in zip(results[detector], expected))
+            print(
+                f"{detector:>8}: {elapsed / len(halves) * 1000:7.2f} ms per half page, "
+                f"{sum(results[detector]):3}/{sum(expected)} blank, "
+                f"{correct}/{len(halves)} correct"
+            )
+
+    for spreads in documents:
+        spreads.close()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else "test_data/")
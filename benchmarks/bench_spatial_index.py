@@ -0,0 +1,71 @@
+"""
+Compare finding the words inside the category rects of identify_category by
+scanning all words against building the interval index and querying it, on
+all pages of test_data and for 1 to 4 rects per page.
+The index only pays off once the rects of a page cost more to scan than to
+build the index and query it.
+
+Run from the repository root:
+    python -m benchmarks.bench_spatial_index [test_data/]
+"""
+
+import glob
+import os
+import sys
+import time
+
+import fitz
+
+from utils.spatial_index import IntervalIndex, scan_inside
+
+# Top and side rects of odd and even pages searched by identify_category
+RECTS = [
+    fitz.Rect(60, 30, 200, 60),
+    fitz.Rect(400, 30, 580, 60),
+    fitz.Rect(10, 55, 80, 450),
+    fitz.Rect(450, 55, 580, 350),
+]
+REPEAT = 20
+
+
+def scan_rects(words, rects):
+    """Scan all words for every rect."""
+    return [scan_inside(words, rect) for rect in rects]
+
+
+def index_rects(words, rects):
+    """Build the index of the words and query it for every rect."""
+    index = IntervalIndex(words)
+    return [index.inside(rect) for rect in rects]
+
+
+def time_per_page(search, pages, rects):
+    """Return the results of search and its time per page in milliseconds."""
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        results = [search(words, rects) for words in pages]
+    return results, (time.perf_counter() - start) / REPEAT * 1000 / len(pages)
+
+
+def main(test_data_path):
+    """Print the time per page of both searches for 1 to 4 rects."""
+    pages = []
+    for path_to_pdf in sorted(glob.glob(os.path.join(test_data_path, "*.pdf"))):
+        with fitz.open(path_to_pdf) as src:
+            pages += [page.get_text("words") for page in src]
+    words_per_page = sum(len(words) for words in pages) / len(pages)
+    print(f"{len(pages)} pages, {words_per_page:.0f} words per page")
+
+    for count in range(1, len(RECTS) + 1):
+        rects = RECTS[:count]
+        expected, scan_time = time_per_page(scan_rects, pages, rects)
+        found, index_time = time_per_page(index_rects, pages, rects)
+        assert found == expected
+        print(
+            f"{count} rects: scan {scan_time:6.3f} ms,"
+            f" build and query {index_time:6.3f} ms per page"
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else "test_data/")
@@ -0,0 +1,381 @@
+"""
+Measure every stage of the parser on its own over the test_data issues:
+splitting the A3 spreads, classifying the pages, extracting headlines and
+text, cleaning the articles, extracting the images, the column extraction
+of the Strawanzerin parser (on the Augustin pages, there is no Strawanzerin
+issue in test_data) and whole issues published to a stub.
+Wordpress is replaced by the JSONL sink of utils/sinks.py, so no request
+leaves the machine.
+
+Every stage runs in a fresh process, which reports the best wall time of
+the repetitions, its CPU time and the peak memory (maximum resident set
+size) of the process. The results are written as JSON and compared with
+the stored baseline, stages which got slower or need more memory than the
+tolerance allows are reported as regressions.
+
+Run from the repository root:
+    python -m benchmarks.bench_stages [--test-data test_data/] [--repeat 3]
+After an intended change, store the new baseline with --save-baseline.
+"""
+
+import argparse
+import contextlib
+import glob
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import fitz
+
+# The parsers are imported in the stages, after configure_stub set WORDPRESS_URL
+# pylint: disable=import-outside-toplevel
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline_stages.json")
+ISSUE_PATTERN = "*_augustin_fertig_kontrolle.pdf"
+
+
+def configure_stub(work_dir):
+    """
+    Publish to a JSONL file instead of Wordpress and keep all local state in
+    the work directory. Needs to run before the parsers are imported.
+    """
+    posts_path = os.path.join(work_dir, "posts.jsonl")
+    os.environ["WORDPRESS_URL"] = f"file://{posts_path}"
+    os.environ["SAVE_PATH"] = work_dir + "/"
+    os.environ["STATE_PATH"] = os.path.join(work_dir, "state")
+    os.environ["SAMPLE_IMAGE_ID"] = "1"
+    os.environ["PARSER_WORKERS"] = "1"
+    os.environ["TRANSCODE_WORKERS"] = "1"
+    os.environ.pop("DEBUG", None)
+
+    from utils.sinks import JsonlSink
+    from utils.wordpress import set_client
+
+    set_client(JsonlSink(posts_path))
+
+
+def copy_issues(test_data_path, work_dir):
+    """
+    Copy the issues to their own directories like an upload.
+    Returns (save_path_for_pdf, path_to_new_directory) tuples.
+    """
+    issues = []
+    for path in sorted(glob.glob(os.path.join(test_data_path, ISSUE_PATTERN))):
+        name = os.path.splitext(os.path.basename(path))[0]
+        path_to_new_directory = os.path.join(work_dir, name) + "/"
+        os.makedirs(path_to_new_directory, exist_ok=True)
+        save_path_for_pdf = path_to_new_directory + os.path.basename(path)
+        shutil.copy(path, save_path_for_pdf)
+        issues.append((save_path_for_pdf, path_to_new_directory))
+    return issues
+
+
+def split_issues(test_data_path, work_dir):
+    """
+    Copy the issues and split them into single page views.
+    Returns (src, page views, path_to_new_directory) tuples.
+    """
+    from utils.utils import PluginUtility
+
+    issues = []
+    for save_path_for_pdf, path_to_new_directory in copy_issues(
+        test_data_path, work_dir
+    ):
+        # Pages only hold a weak reference to their document, keep it open
+        src = fitz.open(save_path_for_pdf)
+        pages = PluginUtility().split_pages(src, path_to_new_directory)
+        issues.append((src, pages, path_to_new_directory))
+    return issues
+
+
+def count_issue_pages(test_data_path, work_dir):
+    """
+    Copy the issues and count their single pages.
+    Returns (save_path_for_pdf, path_to_new_directory, pages) tuples.
+    """
+    from utils.utils import PluginUtility
+
+    issues = []
+    for save_path_for_pdf, path_to_new_directory in copy_issues(
+        test_data_path, work_dir
+    ):
+        with fitz.open(save_path_for_pdf) as src:
+            pages = len(PluginUtility().split_pages(src, path_to_new_directory))
+        issues.append((save_path_for_pdf, path_to_new_directory, pages))
+    return issues
+
+
+def iter_pages(issues):
+    """Yield every page of the split issues except the cover."""
+    for src, pages, path_to_new_directory in issues:
+        for page in pages:
+            if page.number > 0:
+                yield src, page, path_to_new_directory
+
+
+def run_split(issues):
+    """Split the A3 spreads of the issues into A4 page views."""
+    from utils.utils import PluginUtility
+
+    pages = 0
+    for save_path_for_pdf, path_to_new_directory in issues:
+        with fitz.open(save_path_for_pdf) as src:
+            pages += len(PluginUtility().split_pages(src, path_to_new_directory))
+    return pages
+
+
+def run_classify(issues):
+    """Identify the category of every page."""
+    from utils.utils import PluginUtility
+
+    plugin_utility = PluginUtility()
+    pages = 0
+    for _, page, path_to_new_directory in iter_pages(issues):
+        plugin_utility.identify_category(page, page.number, path_to_new_directory)
+        pages += 1
+    return pages
+
+
+def run_text(issues):
+    """Extract the headlines and the text of every page."""
+    from utils.parser_augustin import extract_headlines, extract_text
+
+    pages = 0
+    for _, page, _ in iter_pages(issues):
+        extract_headlines(page)
+        extract_text(page)
+        pages += 1
+    return pages
+
+
+def prepare_clean(issues):
+    """Return the raw text and the starting characters of the articles."""
+    from utils.parser_augustin import extract_headlines
+
+    articles = []
+    for _, page, _ in iter_pages(issues):
+        _, starting_characters, _ = extract_headlines(page)
+        if starting_characters:
+            articles.append((page.get_text(), starting_characters))
+    return articles
+
+
+def run_clean(articles):
+    """Clean the text of every article."""
+    from utils.parser_augustin import clean_text
+
+    for raw_text, starting_characters in articles:
+        clean_text(raw_text, starting_characters)
+    return len(articles)
+
+
+def run_images(issues):
+    """Extract and encode the images of every page."""
+    from utils.parser_augustin import get_all_images
+
+    images = 0
+    for src, page, path_to_new_directory in iter_pages(issues):
+        images += len(get_all_images(page, page.number, src, path_to_new_directory)[2])
+    return images
+
+
+def run_columns(issues):
+    """
+    Find the headlines and extract the columns of every page like the
+    Strawanzerin parser. The Augustin pages are cut into the columns of a
+    Strawanzerin page without headlines, their headlines match no layout.
+    """
+    from utils.parser_strawanzerin import Strawanzerin
+    from utils.span_layer import SpanLayer
+
+    strawanzerin = Strawanzerin()
+    pages = 0
+    for _, page, _ in iter_pages(issues):
+        span_layer = SpanLayer(page)
+        strawanzerin.parse_strawanzerin_headline(span_layer)
+        # Since index starts at zero, even index number means odd page number
+        strawanzerin.get_text_from_pages(span_layer, [], page.number % 2 == 1)
+        pages += 1
+    return pages
+
+
+def run_issue(issues):
+    """Parse and publish the whole issues to the stub."""
+    from utils.parser_augustin import process_augustin_file
+    from utils.utils import PluginUtility
+
+    pages = 0
+    for save_path_for_pdf, path_to_new_directory, issue_pages in issues:
+        process_augustin_file(save_path_for_pdf, path_to_new_directory, PluginUtility())
+        pages += issue_pages
+    return pages
+
+
+# Stage name: (prepare the input in a work directory, run the stage)
+STAGES = {
+    "split": (copy_issues, run_split),
+    "classify": (split_issues, run_classify),
+    "text": (split_issues, run_text),
+    "clean": (
+        lambda path, work_dir: prepare_clean(split_issues(path, work_dir)),
+        run_clean,
+    ),
+    "images": (split_issues, run_images),
+    "columns": (split_issues, run_columns),
+    "issue": (count_issue_pages, run_issue),
+}
+
+
+def get_peak_rss_mb():
+    """Return the maximum resident set size of this process in megabytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def measure_stage(name, test_data_path, repeat):
+    """Run the stage repeatedly in this process and return its measurements."""
+    prepare, run = STAGES[name]
+    with tempfile.TemporaryDirectory(prefix="bench-stages-") as work_dir:
+        configure_stub(work_dir)
+        best = None
+        with open(os.devnull, "w", encoding="utf-8") as devnull:
+            # The parsers print their progress
+            with contextlib.redirect_stdout(devnull):
+                for repetition in range(repeat):
+                    # Every repetition gets fresh copies and a fresh state
+                    run_dir = os.path.join(work_dir, f"run-{repetition}")
+                    os.environ["STATE_PATH"] = os.path.join(run_dir, "state")
+                    stage_input = prepare(test_data_path, run_dir)
+                    if repetition == 0:
+                        rss_before = get_peak_rss_mb()
+
+                    start_wall = time.perf_counter()
+                    start_cpu = time.process_time()
+                    items = run(stage_input)
+                    wall = time.perf_counter() - start_wall
+                    cpu = time.process_time() - start_cpu
+
+                    if best is None or wall < best["wall_s"]:
+                        best = {"wall_s": wall, "cpu_s": cpu, "items": items}
+                    shutil.rmtree(run_dir, ignore_errors=True)
+
+    best["peak_rss_mb"] = get_peak_rss_mb()
+    # Growth of the peak over the setup of the first repetition
+    best["rss_growth_mb"] = max(0.0, best["peak_rss_mb"] - rss_before)
+    return {
+        key: round(value, 4) if isinstance(value, float) else value
+        for key, value in best.items()
+    }
+
+
+def run_benchmark(test_data_path, stages, repeat):
+    """Measure the stages, each one in a fresh process."""
+    results = {
+        "python": platform.python_version(),
+        "pymupdf": fitz.VersionBind,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "repeat": repeat,
+        "stages": {},
+    }
+    for name in stages:
+        # A fresh process per stage keeps the peak memory of the stages apart
+        with ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            results["stages"][name] = executor.submit(
+                measure_stage, name, test_data_path, repeat
+            ).result()
+        stage = results["stages"][name]
+        print(
+            f"{name:<10} {stage['wall_s']:>8.3f}s wall {stage['cpu_s']:>8.3f}s cpu"
+            f" {stage['peak_rss_mb']:>7.1f} MB peak  {stage['items']} items",
+            file=sys.stderr,
+        )
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Print the stages next to the baseline and return the regressed stages."""
+    regressions = []
+    if baseline.get("repeat") != results["repeat"]:
+        # The peak memory grows with the number of repetitions
+        print(f"Note: the baseline was measured with --repeat {baseline.get('repeat')}")
+    print(
+        f"{'stage':<10} {'wall s':>8} {'baseline':>9} {'ratio':>6}"
+        f" {'peak MB':>8} {'baseline':>9} {'ratio':>6}"
+    )
+    for name, stage in results["stages"].items():
+        base = baseline["stages"].get(name)
+        if base is None:
+            print(f"{name:<10} {stage['wall_s']:>8.3f} {'-':>9}")
+            continue
+        wall_ratio = stage["wall_s"] / base["wall_s"] if base["wall_s"] else 1.0
+        memory_ratio = stage["peak_rss_mb"] / base["peak_rss_mb"]
+        regressed = wall_ratio > 1 + tolerance or memory_ratio > 1 + tolerance
+        if regressed:
+            regressions.append(name)
+        print(
+            f"{name:<10} {stage['wall_s']:>8.3f} {base['wall_s']:>9.3f}"
+            f" {wall_ratio:>6.2f} {stage['peak_rss_mb']:>8.1f}"
+            f" {base['peak_rss_mb']:>9.1f} {memory_ratio:>6.2f}"
+            f"{'  REGRESSION' if regressed else ''}"
+        )
+    return regressions
+
+
+def main(argv=None):
+    """Run the benchmark, store the results and compare them with the baseline."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--test-data", default="test_data/")
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default="bench_stages.json")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="allowed slow down or memory growth over the baseline, 0.25 is 25%%",
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="store the results as the new baseline",
+    )
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(
+        args.test_data, args.stages or list(STAGES), max(1, args.repeat)
+    )
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}", file=sys.stderr)
+
+    if args.save_baseline:
+        shutil.copy(args.output, args.baseline)
+        print(f"Baseline written to {args.baseline}", file=sys.stderr)
+        return 0
+    if not os.path.exists(args.baseline):
+        print("No baseline found, store one with --save-baseline", file=sys.stderr)
+        return 0
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"Regressions: {', '.join(regressions)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""
+Show how cleaning an article scales with its length, for the former
+list based formatting and the streaming TextNormalizer. Long multi-page
+articles are made of the text of the test_data pages, once as extracted and
+once with double spaces between the words, as extracted from justified text.
+
+Run from the repository root:
+    python -m benchmarks.bench_text_normalizer [test_data/]
+"""
+
+import glob
+import os
+import sys
+import time
+
+import fitz
+
+from utils.text_normalizer import normalize_lines
+
+LENGTHS = [10_000, 20_000, 40_000, 80_000, 160_000]
+
+
+def former_clean_text(raw_text):
+    """Line joining and formatting of clean_text before the TextNormalizer."""
+    article = ""
+    for line in raw_text.split("\n"):
+        if not line.strip():
+            continue
+        try:
+            if line.endswith(" "):
+                if line[-2] in [".", "!", "?", ":"]:
+                    article += line[:-1] + "\n"
+                    continue
+                article += line
+                continue
+            if line.endswith((".", "!", "?", ":")):
+                article += line + "\n"
+                continue
+            if line[-1] == "-":
+                article += line[:-1]
+                continue
+        except IndexError:
+            pass
+        article += line
+
+    article = list(article)
+    article_edit = article
+    for index, letter in enumerate(article):
+        if letter == "■":
+            del article_edit[index:]
+        if " " in letter and " " in article[index - 1]:
+            del article_edit[index]
+    return "".join(article_edit)
+
+
+def get_text(test_data_path, length):
+    """Return text of the test_data pages without end of article symbols."""
+    text = ""
+    for path_to_pdf in sorted(glob.glob(os.path.join(test_data_path, "*.pdf"))):
+        with fitz.open(path_to_pdf) as src:
+            text += "".join(page.get_text() for page in src)
+    text = text.replace("■", "")
+    while len(text) < length:
+        text += text
+    return text[:length]
+
+
+def measure(function, text, repeat=3):
+    """Return the best time of the calls in milliseconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(text)
+        times.append((time.perf_counter() - start) * 1000)
+    return min(times)
+
+
+def main(test_data_path):
+    """Print the time of both implementations for growing articles."""
+    for double_spaced in (False, True):
+        print("double spaced" if double_spaced else "as extracted")
+        print(f"{'characters':>10} {'former ms':>10} {'streaming ms':>13}")
+        for length in LENGTHS:
+            text = get_text(test_data_path, length)
+            if double_spaced:
+                text = text.replace(" ", "  ")
+            former = measure(former_clean_text, text)
+            streaming = measure(normalize_lines, text)
+            print(f"{len(text):>10} {former:>10.1f} {streaming:>13.1f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else "test_data/")
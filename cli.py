@@ -0,0 +1,171 @@
+"""Command line entry point to parse many issues, e.g. to backfill an archive."""
+
+import argparse
+import glob
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# The parsers are imported in the functions running in the worker processes,
+# since utils.requests needs WORDPRESS_URL which is set for the jsonl sink.
+
+
+def find_issues(inputs):
+    """Return the PDF files of the given files, directories and glob patterns."""
+    paths = []
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, "*.pdf")
+        paths += sorted(
+            path
+            for path in glob.glob(pattern)
+            if path.lower().endswith(".pdf") and os.path.isfile(path)
+        )
+    # Drop duplicates of overlapping patterns but keep the order
+    return list(dict.fromkeys(paths))
+
+
+def init_worker(sink, output):
+    """Let the worker process publish to the sink."""
+    if sink == "jsonl":
+        from utils.sinks import JsonlSink  # pylint: disable=import-outside-toplevel
+        from utils.wordpress import (  # pylint: disable=import-outside-toplevel
+            set_client,
+        )
+
+        set_client(JsonlSink(output))
+
+
+def process_issue(path, save_path, force=False):
+    """
+    Parse a single issue like an upload and return the state of its job.
+    Issues which have already been processed are skipped unless force is set.
+    """
+    # pylint: disable=import-outside-toplevel
+    from utils.ingest import ingest_stream
+    from utils.issues import parse_issue
+    from utils.jobs import Job
+    from utils.uploads import UploadRegistry
+
+    filename = os.path.basename(path)
+    try:
+        with open(path, "rb") as f:
+            # Files of the archive are not limited like uploads
+            ingested_file = ingest_stream(filename, f, save_path, float("inf"))
+    except Exception as e:  # pylint: disable=broad-except
+        return {"filename": filename, "state": "failed", "error": str(e)}
+
+    upload_registry = UploadRegistry()
+    result = upload_registry.get(ingested_file.sha256)
+    if result is not None and not force:
+        return {"filename": filename, "state": "skipped", "result": result}
+
+    job = Job(filename, ingested_file.sha256)
+    job.add_done_callback(upload_registry.record)
+    job.run(parse_issue, ingested_file.path, ingested_file.directory)
+    return job.to_dict()
+
+
+def report_progress(status, done, total, pages, elapsed):
+    """Print the outcome of an issue and the throughput so far to stderr."""
+    seconds = 0.0
+    if status.get("started_at") and status.get("finished_at"):
+        seconds = status["finished_at"] - status["started_at"]
+    message = (
+        f"[{done}/{total}] {status['state']} {status['filename']}"
+        f" in {seconds:.1f}s, {status.get('total_pages') or 0} pages"
+        f" | {done / elapsed * 60:.1f} issues/min, {pages / elapsed:.2f} pages/s"
+    )
+    if status.get("error"):
+        message += f" | {status['error']}"
+    print(message, file=sys.stderr, flush=True)
+
+
+def main(argv=None):
+    """Parse the issues given on the command line in worker processes."""
+    parser = argparse.ArgumentParser(
+        description="Parse Augustin and Strawanzerin issues and publish them."
+    )
+    parser.add_argument(
+        "inputs", nargs="+", help="PDF files, directories of PDF files or glob patterns"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="number of issues parsed at the same time, defaults to the CPU count",
+    )
+    parser.add_argument(
+        "--sink",
+        choices=("wordpress", "jsonl"),
+        default="wordpress",
+        help="publish to WORDPRESS_URL or write the requests to a JSONL file",
+    )
+    parser.add_argument(
+        "--output", default="posts.jsonl", help="file of the jsonl sink"
+    )
+    parser.add_argument(
+        "--save-path",
+        default=os.environ.get("SAVE_PATH"),
+        help="directory of the parsed issues, defaults to SAVE_PATH",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="parse issues again which have already been processed",
+    )
+    args = parser.parse_args(argv)
+
+    paths = find_issues(args.inputs)
+    if not paths:
+        parser.error("No PDF files found")
+    if not args.save_path:
+        parser.error("Set --save-path or SAVE_PATH")
+
+    output = os.path.abspath(args.output)
+    if args.sink == "jsonl":
+        # Keep the state of dry runs apart from the state of the Wordpress site
+        os.environ["WORDPRESS_URL"] = f"file://{output}"
+        os.environ.setdefault("STATE_PATH", tempfile.mkdtemp(prefix="pdf-parser-"))
+
+    workers = max(1, min(args.workers, len(paths)))
+    print(
+        f"Parsing {len(paths)} issues with {workers} workers to {args.sink}",
+        file=sys.stderr,
+    )
+    start = time.perf_counter()
+    states = {}
+    pages = 0
+    # Spawn fresh interpreters since MuPDF state must not be forked from threads
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_worker,
+        initargs=(args.sink, output),
+    ) as executor:
+        futures = [
+            executor.submit(process_issue, path, args.save_path, args.force)
+            for path in paths
+        ]
+        for done, future in enumerate(as_completed(futures), 1):
+            status = future.result()
+            states[status["state"]] = states.get(status["state"], 0) + 1
+            if status["state"] == "done":
+                pages += status.get("total_pages") or 0
+            report_progress(
+                status, done, len(paths), pages, time.perf_counter() - start
+            )
+
+    summary = ", ".join(f"{count} {state}" for state, count in sorted(states.items()))
+    print(
+        f"Parsed {len(paths)} issues in {time.perf_counter() - start:.1f}s: {summary}",
+        file=sys.stderr,
+    )
+    return 1 if states.get("failed") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
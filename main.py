@@ -1,15 +1,39 @@
 """Main function of the FastAPI application."""
 
+import os
 import traceback
 
-from fastapi import FastAPI, File, UploadFile
-from fastapi.responses import HTMLResponse
-from utils.parser_augustin import process_augustin_file
-from utils.parser_strawanzerin import Strawanzerin
+from fastapi import FastAPI, File, HTTPException, Response, UploadFile
+from fastapi.responses import FileResponse, HTMLResponse
+from utils import metrics
+from utils.ingest import ingest_upload
+from utils.issues import parse_issue
+from utils.jobs import Job, JobQueue
+from utils.profiling import get_profile_mode
+from utils.uploads import UploadRegistry
 from utils.utils import PluginUtility
 
 app = FastAPI()
 
+job_queue = JobQueue()
+
+upload_registry = UploadRegistry()
+
+metrics.JOBS_QUEUED.set_function(lambda: job_queue.count("queued"))
+
+
+def parse_upload(save_path_for_pdf, path_to_new_directory, force=False, job=None):
+    """
+    Parse the uploaded file of the job. If an identical upload was processed
+    while the job was queued, its result is taken over unless force is set.
+    """
+    result = upload_registry.get(job.content_hash)
+    if result is not None and not force:
+        print(f"{job.filename} has already been processed by job {result['job_id']}")
+        job.take_result(result)
+        return
+    parse_issue(save_path_for_pdf, path_to_new_directory, job=job)
+
 
 @app.get("/")
 async def main():
@@ -25,9 +49,25 @@ async def main():
     return HTMLResponse(content=content)
 
 
-@app.post("/upload")
-def upload(file: UploadFile = File(...)):
-    """Upload file endpoint."""
+@app.post("/upload", status_code=202)
+def upload(
+    response: Response,
+    file: UploadFile = File(...),
+    force: bool = False,
+    profile: str = None,
+):
+    """
+    Upload file endpoint, queues the parsing and returns the job id.
+    A file which has already been processed is not parsed again, its
+    earlier result is returned unless force is set. A file which is still
+    being processed returns the job id of the running job, also with force.
+    With profile=1 the job is profiled with cProfile, with profile=sample
+    with the sampling profiler, see /jobs/{job_id}/profile.
+    """
+    try:
+        profile_mode = get_profile_mode(profile)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
 
     # create instance of PluginUtility
     plugin_utility = PluginUtility()
@@ -36,32 +76,70 @@ def upload(file: UploadFile = File(...)):
     plugin_utility.pdf_check(file)
 
     try:
-        save_path_for_pdf, path_to_new_directory = plugin_utility.upload_file(file)
+        ingested_file = ingest_upload(file, plugin_utility.global_save_path)
     except IOError as e:
         traceback.print_exc()
-        return {"message": f"There was an error uploading the file: {e}"}
-
+        raise HTTPException(
+            status_code=500, detail=f"There was an error uploading the file: {e}"
+        ) from e
     finally:
-        filename = file.filename.lower()
-        if "augustin" in filename:
-            file.file.close()
-            try:
-                process_augustin_file(
-                    save_path_for_pdf, path_to_new_directory, plugin_utility
-                )
-            except IOError as e:
-                traceback.print_exc()
-                error_message = f"Final error catchment parsing Augustin file: {e}"
-                raise IOError(error_message) from e
-        else:
-            strawanzerin = Strawanzerin()
-            try:
-                strawanzerin.parse_strawanzerin(
-                    save_path_for_pdf, path_to_new_directory
-                )
-            except IOError as e:
-                traceback.print_exc()
-                error_message = f"Error parsing Strawanzerin: {e}"
-                raise IOError(error_message) from e
-
-    return {"message": f"Successfully uploaded {file.filename}"}
+        file.file.close()
+    save_path_for_pdf = ingested_file.path
+    path_to_new_directory = ingested_file.directory
+
+    result = upload_registry.get(ingested_file.sha256)
+    if result is not None and not force:
+        response.status_code = 200
+        return {
+            "message": f"{file.filename} has already been processed",
+            "job_id": result["job_id"],
+            "state": "done",
+            "result": result,
+        }
+
+    job = Job(file.filename, ingested_file.sha256, profile_mode)
+    job.add_done_callback(upload_registry.record)
+    # An identical upload which is still queued or running is not parsed twice
+    queued_job = job_queue.submit_once(
+        job, parse_upload, save_path_for_pdf, path_to_new_directory, force
+    )
+    if queued_job is not job:
+        return {
+            "message": f"{file.filename} is already being processed",
+            "job_id": queued_job.id,
+            "state": queued_job.state,
+        }
+
+    return {
+        "message": f"Successfully uploaded {file.filename}",
+        "job_id": job.id,
+        "state": job.state,
+    }
+
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    """Report the state of a parse job."""
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found!")
+    return job.to_dict()
+
+
+@app.get("/jobs/{job_id}/profile")
+def get_job_profile(job_id: str):
+    """Download the profile of a job which was uploaded with profile set."""
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found!")
+    if job.profile_path is None or not os.path.exists(job.profile_path):
+        raise HTTPException(status_code=404, detail="No profile for this job!")
+    return FileResponse(
+        job.profile_path, filename=f"{job.id}-{os.path.basename(job.profile_path)}"
+    )
+
+
+@app.get("/metrics")
+def get_metrics():
+    """Expose the counters and histograms of the parser to Prometheus."""
+    return Response(content=metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
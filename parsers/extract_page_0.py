@@ -6,18 +6,17 @@ import os
 import re
 import sys
 
-import fitz
-from utils.utils import upload_image
+from utils.documents import open_session
+from utils.media import get_media_index
 
 sys.path.append("../")
 
 
-def save_page_0_as_image(path_to_file):
+def save_page_0_as_image(path_to_file, session=None):
     """Save the cover page of the PDF file as a PNG image."""
-    src = fitz.open(path_to_file)
-
-    page = src.load_page(0)
-    pix = page.get_pixmap()  # render page to an image
+    with open_session(session) as issue_session:
+        page = issue_session.open(path_to_file).load_page(0)
+        pix = page.get_pixmap()  # render page to an image
     # DTODO extract the number in a more dynamical way!!
     # This will lead to an error if the directory name changes
     number_in_dir = [int(s) for s in re.findall(r"\d+", path_to_file)]
@@ -48,19 +47,18 @@ def save_page_0_as_image(path_to_file):
         image_path,
     )
 
-    image_id = upload_image(image_path, image_title)
+    image_id = get_media_index().upload_file(image_path, image_title)
 
     return image_id
 
 
 # WARNING: Here the code relies on the words "Registrierte " and "tragen"
-def extract_color_code(path_to_file):
+def extract_color_code(path_to_file, session=None):
     """Extract the color code from the cover page of the PDF file."""
-    src = fitz.open(path_to_file)
-    page = src[0]
-
-    # read page text as a dictionary, suppressing extra spaces in CJK fonts
-    blocks = page.get_text("dict", flags=11)["blocks"]
+    with open_session(session) as issue_session:
+        page = issue_session.open(path_to_file)[0]
+        # read page text as a dictionary, suppressing extra spaces in CJK fonts
+        blocks = page.get_text("dict", flags=11)["blocks"]
     for block in blocks:  # iterate through the text blocks
         for line in block["lines"]:  # iterate through the text lines
             for span in line["spans"]:  # iterate through the text spans
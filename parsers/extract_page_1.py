@@ -5,7 +5,9 @@ import sys
 
 import fitz
 from dotenv import load_dotenv
+from utils.documents import open_session
 from utils.requests import upload_post
+from utils.text_normalizer import normalize_lines
 from utils.utils import PluginUtility
 
 sys.path.append("../")
@@ -47,36 +49,8 @@ def create_post(page, image_id, category, category_papers_id):
         if value.strip() == "":
             meta_dict[key] = "Kein " + key
 
-    # Format the string
-    article = list(article)
-    article_edit = article
-    for index, letter in enumerate(article):
-        # deletes newlines that are made up because of articles structure
-        if "\n" in letter:
-            if (
-                "." in article[index - 1]
-                or "!" in article[index - 1]
-                or "?" in article[index - 1]
-                or ":" in article[index - 1]
-            ):
-                print("supposed to break a new line", letter)
-
-            elif "-" in article[index - 1]:
-                if " " in article[index - 1] and " " in article[index + 1]:
-                    # this hyphen has been set on purpose and stays
-                    print("hyphen has been set on purpose")
-                else:
-                    # deletes hyphen on the index and the extra space before it
-                    del article_edit[index]
-                    del article_edit[index - 1]
-            else:
-                del article_edit[index]
-        # deletes double spaces
-        if " " in letter and " " in article[index - 1]:
-            del article_edit[index]
-
     # to create a readable text for the article
-    readable_text = "".join(article_edit)
+    readable_text = normalize_lines(article)
     meta_information["category_paper"] = category_papers_id
 
     response = upload_post(meta_information, readable_text, image_id)
@@ -101,23 +75,24 @@ def calculate_extraction_rectangles(page):
     return r2, article
 
 
-def extract_page(pdf_file, category, category_papers_id):
+def extract_page(pdf_file, category, category_papers_id, session=None):
     """Extract the text from the third page of the PDF file."""
-    src = fitz.open(pdf_file)
-    new_doc = fitz.open()  # empty output PDF
-    r2, page = calculate_rectangles_for(src)
-
-    new_page = new_doc.new_page(-1, width=r2.width, height=r2.height)
-    new_page.show_pdf_page(
-        new_page.rect,
-        src,
-        page.number,
-        clip=r2,
-    )
-
-    image_id = plugin_utility.download_image(new_page, new_doc, src)
-
-    response = create_post(new_page, image_id, category, category_papers_id)
+    with open_session(session) as issue_session:
+        src = issue_session.open(pdf_file)
+        r2, page = calculate_rectangles_for(src)
+
+        with fitz.open() as new_doc:  # empty output PDF
+            new_page = new_doc.new_page(-1, width=r2.width, height=r2.height)
+            new_page.show_pdf_page(
+                new_page.rect,
+                src,
+                page.number,
+                clip=r2,
+            )
+
+            image_id = plugin_utility.download_image(new_page, new_doc, src)
+
+            response = create_post(new_page, image_id, category, category_papers_id)
 
     return response
 
@@ -0,0 +1,43 @@
+"""Tests the cli.py file for parsing issues from the command line."""
+
+import json
+import os
+
+from cli import find_issues, main
+
+
+class TestCli:
+    """Test class for the command line entry point."""
+
+    def test_find_issues(self, tmp_path) -> None:
+        """Test if directories, globs and files are expanded to PDF files."""
+        for name in ("570_augustin.pdf", "571_augustin.PDF", "notes.txt"):
+            (tmp_path / name).write_bytes(b"")
+        first = str(tmp_path / "570_augustin.pdf")
+
+        assert find_issues([str(tmp_path)]) == [first]
+        assert find_issues([first, str(tmp_path / "57*")]) == [
+            first,
+            str(tmp_path / "571_augustin.PDF"),
+        ]
+        assert not find_issues([str(tmp_path / "missing.pdf")])
+
+    def test_jsonl_sink(self, monkeypatch, tmp_path) -> None:
+        """Test a dry run of an issue and if it is skipped the second time."""
+        monkeypatch.setenv("WORDPRESS_URL", os.environ.get("WORDPRESS_URL", ""))
+        monkeypatch.setenv("STATE_PATH", str(tmp_path / "state"))
+        issue = os.path.join(
+            os.environ["TEST_DATA_PATH"], "576_augustin_fertig_kontrolle.pdf"
+        )
+        output = tmp_path / "posts.jsonl"
+        argv = [issue, "--workers", "1", "--sink", "jsonl"]
+        argv += ["--output", str(output), "--save-path", str(tmp_path / "save")]
+
+        assert main(argv) == 0
+        lines = output.read_text(encoding="utf-8").splitlines()
+        endpoints = [json.loads(line)["endpoint"] for line in lines]
+        assert "articles" in endpoints
+        assert "media" in endpoints
+
+        assert main(argv) == 0
+        assert len(output.read_text(encoding="utf-8").splitlines()) == len(lines)
@@ -1,6 +1,13 @@
 """Tests main.py file for the FastAPI application."""
 
+import time
+
+from main import parse_upload
 from test_setup import TestMain
+from utils.jobs import Job
+from utils.sinks import JsonlSink
+from utils.store import JsonStore
+from utils.uploads import UploadRegistry
 
 
 class TestUtils(TestMain):
@@ -11,69 +18,122 @@ class TestUtils(TestMain):
         response = self.client.get("/")
         assert response.status_code == 200
 
-    def test_upload_files(self):
-        """Test the upload endpoint."""
-        with open(self.test1, "rb") as f:
-            files = {"file": f}
-            response = self.client.post("/upload", files=files)
-
+    def wait_for_job(self, job_id, timeout=600):
+        """Poll the job endpoint until the job is finished."""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            response = self.client.get(f"/jobs/{job_id}")
             assert response.status_code == 200
-            data = response.json()
-            assert (
-                data["message"]
-                == "Successfully uploaded 582_augustin_fertig_kontrolle.pdf"
-            )
-            assert "editorial" in data["categories"]
-            assert "augustiner:in" in data["categories"]
-            assert "cover" in data["categories"]
+            job = response.json()
+            if job["state"] in ("done", "failed"):
+                return job
+            time.sleep(1)
+        raise TimeoutError(f"Job {job_id} did not finish within {timeout} seconds")
 
-        with open(self.test2, "rb") as f:
-            files = {"file": f}
-            response = self.client.post("/upload", files=files)
-            assert response.status_code == 200
-            data = response.json()
-            assert (
-                data["message"]
-                == "Successfully uploaded 576_augustin_fertig_kontrolle.pdf"
-            )
-            assert "editorial" in data["categories"]
-            assert "augustiner:in" in data["categories"]
-            assert "cover" in data["categories"]
+    def test_unknown_job(self):
+        """Test the job endpoint with an unknown job id."""
+        response = self.client.get("/jobs/unknown")
+        assert response.status_code == 404
 
-        with open(self.test3, "rb") as f:
-            files = {"file": f}
-            response = self.client.post("/upload", files=files)
-            assert response.status_code == 200
-            data = response.json()
-            assert (
-                data["message"]
-                == "Successfully uploaded 575_augustin_fertig_kontrolle.pdf"
-            )
-            assert "editorial" in data["categories"]
-            assert "augustiner:in" in data["categories"]
-            assert "cover" in data["categories"]
-        with open(self.test4, "rb") as f:
-            files = {"file": f}
-            response = self.client.post("/upload", files=files)
-            assert response.status_code == 200
-            data = response.json()
-            assert (
-                data["message"]
-                == "Successfully uploaded 574_augustin_fertig_kontrolle.pdf"
+    def test_unknown_profile(self):
+        """Test the profile endpoint and an unknown profile mode."""
+        response = self.client.get("/jobs/unknown/profile")
+        assert response.status_code == 404
+
+        with open(self.test5, "rb") as f:
+            response = self.client.post(
+                "/upload?profile=perf",
+                files={"file": (self.test5, f, "application/pdf")},
             )
-            assert "editorial" in data["categories"]
-            assert "augustiner:in" in data["categories"]
-            assert "cover" in data["categories"]
+        assert response.status_code == 400
+
+    def test_upload_error(self, monkeypatch):
+        """Test if a failed upload is reported as error instead of as job."""
+
+        def fail(*args):
+            raise IOError("Disk full")
 
+        monkeypatch.setattr("main.ingest_upload", fail)
         with open(self.test5, "rb") as f:
-            files = {"file": f}
-            response = self.client.post("/upload", files=files)
-            assert response.status_code == 200
-            data = response.json()
-            assert (
-                data["message"]
-                == "Successfully uploaded 570_augustin_fertig_kontrolle.pdf"
+            response = self.client.post(
+                "/upload", files={"file": (self.test5, f, "application/pdf")}
             )
-            assert "editorial" in data["categories"]
-            assert "augustiner:in" in data["categories"]
-            assert "cover" in data["categories"]
+        assert response.status_code == 500
+        assert "job_id" not in response.json()
+
+    def test_metrics(self):
+        """Test the metrics endpoint."""
+        response = self.client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert "# TYPE pdf_parser_stage_seconds histogram" in response.text
+        assert "pdf_parser_jobs_queued 0" in response.text
+
+    def test_upload_files(self):
+        """Test the upload endpoint."""
+        for test_file in (self.test1, self.test2, self.test3, self.test4, self.test5):
+            with open(test_file, "rb") as f:
+                files = {"file": f}
+                # Parse again even if an earlier test run processed the file
+                response = self.client.post("/upload?force=true", files=files)
+
+            assert response.status_code == 202
+            data = response.json()
+            filename = test_file.split("/")[-1]
+            assert data["message"] == f"Successfully uploaded {filename}"
+
+            job = self.wait_for_job(data["job_id"])
+            assert job["state"] == "done"
+            assert "editorial" in job["categories"]
+            assert "augustiner:in" in job["categories"]
+            assert "cover" in job["categories"]
+
+    def test_upload_same_file(self, monkeypatch, tmp_path):
+        """
+        Test if an identical upload returns the running job while it is parsed
+        and the earlier result afterwards. Nothing is published, the posts are
+        written to a JSONL file.
+        """
+        monkeypatch.setenv("STATE_PATH", str(tmp_path))
+        monkeypatch.setattr("main.upload_registry", UploadRegistry())
+        monkeypatch.setattr("utils.media._media_index", None)
+        # The client of the other tests is put back afterwards
+        monkeypatch.setattr(
+            "utils.wordpress._client", JsonlSink(tmp_path / "posts.jsonl")
+        )
+        with open(self.test1, "rb") as f:
+            response = self.client.post("/upload?force=true", files={"file": f})
+        job_id = response.json()["job_id"]
+
+        with open(self.test1, "rb") as f:
+            response = self.client.post("/upload?force=true", files={"file": f})
+        assert response.status_code == 202
+        assert response.json()["job_id"] == job_id
+
+        job = self.wait_for_job(job_id)
+        assert job["state"] == "done"
+        assert job["post_ids"]
+
+        with open(self.test1, "rb") as f:
+            response = self.client.post("/upload", files={"file": f})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["job_id"] == job["id"]
+        assert data["result"]["post_ids"] == job["post_ids"]
+
+    def test_parse_upload_processed_while_queued(self, monkeypatch, tmp_path):
+        """Test if a queued job takes over the result of an identical upload."""
+        registry = UploadRegistry(JsonStore(str(tmp_path / "uploads.json")))
+        earlier_job = Job("582.pdf", "hash")
+        earlier_job.add_post(7)
+        earlier_job.finish()
+        registry.record(earlier_job)
+        monkeypatch.setattr("main.upload_registry", registry)
+        monkeypatch.setattr("main.parse_issue", None)
+
+        job = Job("582.pdf", "hash")
+        job.run(parse_upload, self.test1, str(tmp_path))
+
+        assert job.state == "done"
+        assert job.post_ids == [7]
@@ -0,0 +1,72 @@
+"""Detect blank halves of A3 pages without writing images to disk."""
+
+import operator
+import os
+
+import fitz
+
+# A6 blank page size approximately 1209 Yours may be different, check first
+PNG_SIZE_LIMIT = 1300
+
+# Scale and gray value variance used by the pixmap detector
+PIXMAP_ZOOM = 0.2
+PIXMAP_MAX_VARIANCE = 1.0
+
+
+def is_blank_by_png_size(page, clip, image_path, keep_image=False):
+    """
+    Former heuristic: render the clip at full resolution, save it as PNG and
+    compare the file size against PNG_SIZE_LIMIT.
+    """
+    pix = page.get_pixmap(clip=clip)  # render page to an image
+    pix.save(image_path)  # store image as a PNG
+    image_size = os.stat(image_path).st_size
+    if not keep_image:
+        os.remove(image_path)
+    return image_size < PNG_SIZE_LIMIT
+
+
+def is_blank_by_content(page, clip):
+    """Check the clip for text, images and non-white vector drawings."""
+    clip = fitz.Rect(clip)
+    if page.get_text("words", clip=clip):
+        return False
+    for image in page.get_image_info():
+        if clip.intersects(image["bbox"]):
+            return False
+    for drawing in page.get_drawings():
+        if not clip.intersects(drawing["rect"]):
+            continue
+        colors = (drawing.get("color"), drawing.get("fill"))
+        if any(color and tuple(color) != (1.0, 1.0, 1.0) for color in colors):
+            return False
+    return True
+
+
+def is_blank_by_pixmap(page, clip, zoom=PIXMAP_ZOOM, max_variance=PIXMAP_MAX_VARIANCE):
+    """Render a small grayscale pixmap of the clip and check its sample variance."""
+    pix = page.get_pixmap(
+        clip=clip, matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csGRAY, alpha=False
+    )
+    samples = pix.samples
+    if not samples:
+        return True
+    count = len(samples)
+    mean = sum(samples) / count
+    variance = sum(map(operator.mul, samples, samples)) / count - mean * mean
+    return variance <= max_variance
+
+
+def is_blank(page, clip, detector="pixmap", image_path=None, keep_image=False):
+    """
+    Check if the clip of the page is blank with the selected detector:
+    "pixmap" (default), "content" or the former "png_size" heuristic which
+    needs an image_path to write to.
+    """
+    if detector == "pixmap":
+        return is_blank_by_pixmap(page, clip)
+    if detector == "content":
+        return is_blank_by_content(page, clip)
+    if detector == "png_size":
+        return is_blank_by_png_size(page, clip, image_path, keep_image)
+    raise ValueError(f"Unknown blank page detector {detector}")
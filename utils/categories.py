@@ -0,0 +1,123 @@
+"""Cached lookups of Wordpress categories by their name."""
+
+import html
+import os
+import threading
+import time
+import traceback
+
+from fastapi import HTTPException
+from utils.wordpress import get_client
+
+
+def normalize_name(name):
+    """Normalize a category name, e.g. "Tun &amp; Lassen " to "tun & lassen"."""
+    return html.unescape(str(name)).strip().casefold()
+
+
+class CategoryCache:
+    """
+    Index of all terms of a Wordpress taxonomy by normalized name.
+    The index is loaded once with all pages of the taxonomy and refreshed in a
+    background thread once it is older than the time-to-live. Until the refresh
+    is done, the stale index is used.
+    """
+
+    def __init__(self, taxonomy="categories", ttl=None, client=None):
+        if ttl is None:
+            ttl = float(os.environ.get("CATEGORY_CACHE_TTL", "300"))
+        self.taxonomy = taxonomy
+        self.ttl = ttl
+        self.client = client
+        self._index = None
+        self._loaded_at = 0.0
+        self._refreshing = False
+        self._lock = threading.Lock()
+
+    def lookup(self, name, refresh_on_miss=False):
+        """
+        Return the id of the term with the given name or None.
+        With refresh_on_miss, a cached index not containing the name is
+        reloaded before giving up.
+        """
+        key = normalize_name(name)
+        index, loaded = self._get_index()
+        term_id = index.get(key)
+        if term_id is None and refresh_on_miss and not loaded:
+            term_id = self.refresh().get(key)
+        return term_id
+
+    def invalidate(self):
+        """Drop the index, e.g. after a term has been created."""
+        with self._lock:
+            self._index = None
+
+    def refresh(self):
+        """Load all terms from Wordpress and rebuild the index."""
+        index = {}
+        for term in self._fetch_all_terms():
+            # Keep the first term like the former linear search did
+            index.setdefault(normalize_name(term["name"]), term["id"])
+        with self._lock:
+            self._index = index
+            self._loaded_at = time.monotonic()
+        return index
+
+    def _get_index(self):
+        """
+        Return the index and whether it has just been loaded.
+        The index is loaded if missing and refreshed in the background if stale.
+        """
+        with self._lock:
+            index = self._index
+            stale = time.monotonic() - self._loaded_at > self.ttl
+            refresh_in_background = index is not None and stale and not self._refreshing
+            if refresh_in_background:
+                self._refreshing = True
+
+        if index is None:
+            return self.refresh(), True
+        if refresh_in_background:
+            threading.Thread(
+                target=self._refresh_in_background,
+                name=f"refresh-{self.taxonomy}",
+                daemon=True,
+            ).start()
+        return index, False
+
+    def _refresh_in_background(self):
+        """Refresh the index and keep the stale one if Wordpress fails."""
+        try:
+            self.refresh()
+        except Exception:  # pylint: disable=broad-except
+            traceback.print_exc()
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def _fetch_all_terms(self):
+        """Page through all terms of the taxonomy."""
+        client = self.client if self.client is not None else get_client()
+        terms = []
+        page = 1
+        while True:
+            response = client.get(f"{self.taxonomy}?per_page=100&page={page}")
+
+            if response.status_code not in (200, 201):
+                print(f"Loading {self.taxonomy} failed:" + str(response.content))
+                raise HTTPException(
+                    status_code=400,
+                    detail="Category could not be checked!"
+                    + str(response.status_code)
+                    + str(response.content),
+                )
+
+            terms += response.json()
+            total_pages = int(response.headers.get("X-WP-TotalPages", "1"))
+            if page >= total_pages:
+                return terms
+            page += 1
+
+
+category_cache = CategoryCache("categories")
+papers_category_cache = CategoryCache("category_papers")
@@ -0,0 +1,138 @@
+"""Checkpoint journal to resume an issue after a failed run."""
+
+import os
+
+from utils.store import JsonStore, get_state_path
+
+
+class CheckpointJournal:
+    """
+    Checkpoints of the issues which are not completely published yet, by the
+    content hash of their PDF file. Like the upload registry, checkpoints are
+    only valid for the Wordpress site the articles were published to.
+    """
+
+    def __init__(self, store=None, site=None):
+        if store is None:
+            store = JsonStore(get_state_path("checkpoints.json"))
+        if site is None:
+            site = os.environ.get("WORDPRESS_URL")
+        self.store = store
+        self.site = site
+
+    def open(self, content_hash, filename=None):
+        """Return the checkpoint of the issue, a new one if there is none."""
+        key = f"{self.site}#{content_hash}"
+        return IssueCheckpoint(self.store, key, self.store.get(key), filename)
+
+
+class IssueCheckpoint:
+    """
+    Journal of a single issue.
+    Every published article is recorded with the pages it covers, its post
+    id and its media ids as soon as Wordpress has accepted it. An article
+    whose post timed out is recorded without post id, since it may have been
+    created, and is not published again. Once a page is completely
+    processed, the parser state of the pages not yet published is recorded,
+    so a retry continues with the next page.
+    """
+
+    def __init__(self, store, key, data=None, filename=None):
+        self.store = store
+        self.key = key
+        if data is None:
+            data = {
+                "filename": filename,
+                "next_page": 0,
+                "meta_array": None,
+                "next_page_needed": False,
+                "pending_pages": [],
+                "pending_media_ids": [],
+                "articles": [],
+                "categories": [],
+                "media_ids": [],
+            }
+        self.data = data
+
+    @property
+    def next_page(self):
+        """Index of the first page which is not completely processed."""
+        return self.data["next_page"]
+
+    @property
+    def resumed(self):
+        """True if an earlier run already processed pages of the issue."""
+        return self.next_page > 0
+
+    def restore(self, job):
+        """Add the posts, media and categories of the earlier run to the job."""
+        for article in self.data["articles"]:
+            if article["post_id"] is not None:
+                job.add_post(article["post_id"])
+        for media_id in self.data["media_ids"]:
+            job.add_media(media_id)
+        for category in self.data["categories"]:
+            job.add_category(category)
+
+    def get_article(self, page, step):
+        """Return the article published in the step of the page or None."""
+        for article in self.data["articles"]:
+            if article["page"] == page and article["step"] == step:
+                return article
+        return None
+
+    def commit_article(self, page, step, pages, post_id, media_ids):
+        """Record an article published in the given step of the page."""
+        self.data["articles"].append(
+            {
+                "page": page,
+                "step": step,
+                "pages": list(pages),
+                "post_id": post_id,
+                "media_ids": list(media_ids),
+            }
+        )
+        self._save()
+
+    def on_published(self, page, step, pages, media_ids):
+        """Return a callback recording the post of the step once it is created."""
+        pages = list(pages)
+        media_ids = list(media_ids)
+
+        def callback(post_id):
+            self.commit_article(page, step, pages, post_id, media_ids)
+
+        return callback
+
+    def commit_page(
+        self,
+        page,
+        meta_array,
+        next_page_needed,
+        pending_pages,
+        pending_media_ids,
+        category=None,
+        media_ids=(),
+    ):
+        """Record the parser state after the page is completely processed."""
+        self.data.update(
+            {
+                "next_page": page + 1,
+                "meta_array": meta_array,
+                "next_page_needed": next_page_needed,
+                "pending_pages": list(pending_pages),
+                "pending_media_ids": list(pending_media_ids),
+            }
+        )
+        if category is not None:
+            self.data["categories"].append(category)
+        self.data["media_ids"].extend(media_ids)
+        self._save()
+
+    def finish(self):
+        """Forget the checkpoint once the whole issue is published."""
+        self.store.delete(self.key)
+
+    def _save(self):
+        """Persist the checkpoint."""
+        self.store.set(self.key, self.data)
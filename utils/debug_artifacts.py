@@ -0,0 +1,176 @@
+"""Render the debug images of the parser in a background process."""
+
+import atexit
+import multiprocessing
+import os
+import threading
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+import fitz
+from utils.page_view import PageView
+from utils.text_layer import TextLayer
+
+OVERLAY_COLOR = (1, 0, 0)
+
+
+def get_clip_key(clip):
+    """Return the clip rounded to a tenth of a point, None for the whole page."""
+    if clip is None:
+        return None
+    return tuple(round(value, 1) for value in clip)
+
+
+def render_page_artifacts(document_path, page_number, captures, overlay_path=None):
+    """
+    Render the captured clips of a page, every distinct clip only once, and
+    an overlay of the whole page with all clips outlined and labelled.
+    captures maps the clip keys to the sets of image paths and labels.
+    """
+    with fitz.open(document_path) as src:
+        page = src[page_number]
+        for clip, (paths, _) in captures.items():
+            pix = page.get_pixmap(clip=clip)
+            for path in sorted(paths):
+                pix.save(path)
+
+        rects = [(clip, labels) for clip, (_, labels) in captures.items() if clip]
+        if overlay_path is None or not rects:
+            return
+        # The document is never saved, drawing only changes it in memory
+        for clip, labels in rects:
+            page.draw_rect(clip, color=OVERLAY_COLOR, width=1)
+            page.insert_text(
+                (clip[0] + 2, clip[1] + 8),
+                ", ".join(sorted(labels)),
+                fontsize=6,
+                color=OVERLAY_COLOR,
+            )
+        page.get_pixmap().save(overlay_path)
+
+
+class DebugArtifacts:
+    """
+    Debug images of the parsed pages, rendered off the hot path.
+    The parser only records the clips of a page it wants to see. On flush
+    the clips are rendered page by page in a background process, which
+    opens the PDF file on its own since PyMuPDF is not thread safe.
+    Identical clips of a page are rendered once, and every page of the PDF
+    file gets one overlay image upload-page-<number>-overlay.png showing
+    all its clips, e.g. of both halves of an A3 spread.
+    """
+
+    def __init__(self):
+        # (document path, page number): {clip key: (image paths, labels)}
+        self._pending = {}
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def capture(self, page, clip, path, label=None):
+        """
+        Record a clip of a page, a page view or a text layer of one of them,
+        None for the whole page.
+        """
+        if isinstance(page, TextLayer):
+            page = page.page
+        if isinstance(page, PageView):
+            clip = page.get_source_clip(clip)
+            page = page.page
+        self.capture_file(page.parent.name, page.number, clip, path, label)
+
+    def capture_file(self, document_path, page_number, clip, path, label=None):
+        """Record a clip of a page of the PDF file to be saved as PNG at path."""
+        if label is None:
+            label = os.path.splitext(os.path.basename(path))[0]
+        key = (os.path.abspath(document_path), page_number)
+        with self._lock:
+            captures = self._pending.setdefault(key, {})
+            paths, labels = captures.setdefault(get_clip_key(clip), (set(), set()))
+            paths.add(path)
+            labels.add(label)
+
+    def pop_captures(self):
+        """
+        Return and forget the pending captures, e.g. to hand them from a
+        parser worker process to the main process.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return pending
+
+    def add_captures(self, pending):
+        """Add captures returned by pop_captures."""
+        with self._lock:
+            for key, captures in pending.items():
+                own_captures = self._pending.setdefault(key, {})
+                for clip, (paths, labels) in captures.items():
+                    own_paths, own_labels = own_captures.setdefault(
+                        clip, (set(), set())
+                    )
+                    own_paths.update(paths)
+                    own_labels.update(labels)
+
+    def flush(self):
+        """Render the pending captures in the background process."""
+        pending = self.pop_captures()
+        for (document_path, page_number), captures in sorted(pending.items()):
+            directory = os.path.dirname(
+                min(min(paths) for paths, _ in captures.values())
+            )
+            overlay_path = os.path.join(
+                directory, f"upload-page-{page_number}-overlay.png"
+            )
+            arguments = (document_path, page_number, captures, overlay_path)
+            try:
+                future = self._get_executor().submit(render_page_artifacts, *arguments)
+            except RuntimeError:
+                # No new processes during interpreter shutdown, render them here
+                self._render(*arguments)
+                continue
+            future.add_done_callback(report_error)
+
+    def close(self):
+        """Render the pending captures and wait for the background process."""
+        self.flush()
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def _get_executor(self):
+        """Start the background process on first use."""
+        with self._lock:
+            if self._executor is None:
+                # Spawn a fresh interpreter since MuPDF state must not be forked
+                self._executor = ProcessPoolExecutor(
+                    max_workers=1, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    @staticmethod
+    def _render(*arguments):
+        """Render the captures of a page in this process."""
+        try:
+            render_page_artifacts(*arguments)
+        except Exception:  # pylint: disable=broad-except
+            traceback.print_exc()
+
+
+def report_error(future):
+    """Print the error of a failed rendering, debug images are best effort."""
+    if not future.cancelled() and future.exception() is not None:
+        print(f"Error rendering debug images: {future.exception()}")
+
+
+_debug_artifacts = None
+_debug_artifacts_lock = threading.Lock()
+
+
+def get_debug_artifacts():
+    """Return the debug artifacts shared by the parsers of this process."""
+    global _debug_artifacts  # pylint: disable=global-statement
+    with _debug_artifacts_lock:
+        if _debug_artifacts is None:
+            _debug_artifacts = DebugArtifacts()
+            atexit.register(_debug_artifacts.close)
+        return _debug_artifacts
@@ -0,0 +1,64 @@
+"""Open PDF files once per parse job and share the handles between its stages."""
+
+import os
+import threading
+from contextlib import contextmanager
+
+import fitz
+
+
+class DocumentSession:
+    """
+    Open documents of one parse job, one handle per file.
+    The stages of a job, e.g. splitting the spreads, extracting the pages and
+    rendering the cover, get the same document from open instead of opening
+    the file again. MuPDF reads the file on demand, so the upload is neither
+    read in full nor copied into memory. Closing the session, also when the
+    job failed, closes all its documents.
+    """
+
+    def __init__(self):
+        self._documents = {}
+        self._lock = threading.Lock()
+        self.closed = False
+
+    def open(self, path):
+        """Return the document of the PDF file, it is opened on first use."""
+        key = os.path.abspath(path)
+        with self._lock:
+            if self.closed:
+                raise ValueError("Document session is closed")
+            document = self._documents.get(key)
+            if document is None or document.is_closed:
+                document = fitz.open(path)
+                self._documents[key] = document
+            return document
+
+    def close(self):
+        """Close all documents of the session."""
+        with self._lock:
+            documents = list(self._documents.values())
+            self._documents.clear()
+            self.closed = True
+        for document in documents:
+            if not document.is_closed:
+                document.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+@contextmanager
+def open_session(session=None):
+    """
+    Yield the given session, which stays open, or a new one which is closed
+    at the end of the with block.
+    """
+    if session is not None:
+        yield session
+        return
+    with DocumentSession() as session:
+        yield session
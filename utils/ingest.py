@@ -0,0 +1,119 @@
+"""Stream uploaded PDF files to their final location in one pass."""
+
+import hashlib
+import os
+import tempfile
+
+import fitz
+from fastapi import HTTPException
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def get_max_upload_size():
+    """Return the maximum upload size in bytes, configured via MAX_UPLOAD_SIZE_MB."""
+    return int(float(os.environ.get("MAX_UPLOAD_SIZE_MB", "200")) * 1024 * 1024)
+
+
+class IngestedFile:
+    """PDF file saved in its own directory with its size and content hash."""
+
+    def __init__(self, path, directory, sha256, size):
+        self.path = path
+        # The parsers expect the directory with a trailing slash
+        self.directory = directory
+        self.sha256 = sha256
+        self.size = size
+
+
+def ingest_upload(file, save_path, max_size=None):
+    """
+    Stream the uploaded file to SAVE_PATH/<name>/<filename>.
+    The hash and the size are computed while writing, uploads larger than
+    max_size are rejected with 413 and the PDF is validated from the written
+    file. The file only gets its final name once it is complete and valid.
+    """
+    if max_size is None:
+        max_size = get_max_upload_size()
+    return ingest_stream(file.filename, file.file, save_path, max_size)
+
+
+def ingest_stream(filename, stream, save_path, max_size):
+    """Stream a binary file object like an upload, see ingest_upload."""
+    # Create a new directory for each uploaded file
+    path_to_new_directory = os.path.join(save_path, filename.split(".")[0])
+    os.makedirs(path_to_new_directory, exist_ok=True)
+    save_path_for_pdf = os.path.join(path_to_new_directory, filename)
+    # Every upload gets its own partial file, also uploads with the same name
+    fd, partial_path = tempfile.mkstemp(
+        suffix=".part", prefix=filename + ".", dir=path_to_new_directory
+    )
+
+    sha256 = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as f:
+            while chunk := stream.read(CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_size:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"Uploaded file is larger than {max_size} bytes",
+                    )
+                sha256.update(chunk)
+                f.write(chunk)
+
+        if size == 0:
+            raise HTTPException(status_code=400, detail="Uploaded file is empty")
+
+        validate_pdf(partial_path)
+        save_path_for_pdf = save_partial(
+            partial_path, save_path_for_pdf, sha256.hexdigest()
+        )
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+    return IngestedFile(
+        save_path_for_pdf, path_to_new_directory + "/", sha256.hexdigest(), size
+    )
+
+
+def save_partial(partial_path, save_path_for_pdf, sha256):
+    """
+    Give the complete upload its final name and return its path.
+    An existing file with other content is kept since a queued job may still
+    parse it, the upload is saved next to it with its hash in the name.
+    """
+    try:
+        os.link(partial_path, save_path_for_pdf)
+        return save_path_for_pdf
+    except FileExistsError:
+        if hash_file(save_path_for_pdf) == sha256:
+            return save_path_for_pdf
+    stem, extension = os.path.splitext(save_path_for_pdf)
+    unique_path = f"{stem}-{sha256[:12]}{extension}"
+    os.replace(partial_path, unique_path)
+    return unique_path
+
+
+def hash_file(path):
+    """Return the SHA-256 hex digest of a file already on disk."""
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def validate_pdf(path):
+    """Open the file via the fitz library to check if it is a valid PDF."""
+    try:
+        with fitz.open(path, filetype="pdf") as doc:
+            page_count = doc.page_count
+    except (RuntimeError, ValueError) as e:
+        raise HTTPException(
+            status_code=400, detail="Uploaded file is not a valid PDF"
+        ) from e
+    if page_count == 0:
+        raise HTTPException(status_code=400, detail="Uploaded file is not a valid PDF")
@@ -0,0 +1,44 @@
+"""Parse an issue with the parser of its magazine."""
+
+import os
+
+from utils.debug_artifacts import get_debug_artifacts
+from utils.documents import DocumentSession
+from utils.parser_augustin import process_augustin_file
+from utils.parser_strawanzerin import Strawanzerin
+from utils.profiling import profile
+from utils.utils import PluginUtility
+
+
+def is_augustin(filename):
+    """Check if the file is an Augustin issue, otherwise it is a Strawanzerin."""
+    return "augustin" in filename.lower()
+
+
+def parse_issue(save_path_for_pdf, path_to_new_directory, job=None):
+    """
+    Parse the issue with the Augustin or the Strawanzerin parser.
+    All stages of the parser share the documents of one session, which are
+    closed when the issue is parsed, also if parsing failed.
+    If the job asks for a profile, it is saved in path_to_new_directory.
+    In debug mode the debug images are rendered in the background afterwards.
+    """
+    try:
+        with profile(job, path_to_new_directory), DocumentSession() as session:
+            if is_augustin(os.path.basename(save_path_for_pdf)):
+                process_augustin_file(
+                    save_path_for_pdf,
+                    path_to_new_directory,
+                    PluginUtility(),
+                    job=job,
+                    session=session,
+                )
+            else:
+                strawanzerin = Strawanzerin()
+                strawanzerin.parse_strawanzerin(
+                    save_path_for_pdf, path_to_new_directory, job=job, session=session
+                )
+    finally:
+        # The debug images are rendered in the background, also of failed issues
+        if os.environ.get("DEBUG"):
+            get_debug_artifacts().flush()
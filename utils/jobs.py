@@ -0,0 +1,254 @@
+"""Background jobs to parse uploaded PDF files outside of the HTTP request."""
+
+import os
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from utils import metrics
+
+
+class Job:
+    """State of a single parse job which can be polled via the API."""
+
+    def __init__(self, filename=None, content_hash=None, profile=None):
+        self.id = uuid.uuid4().hex
+        self.filename = filename
+        self.content_hash = content_hash
+        self.state = "queued"
+        self.current_page = None
+        self.total_pages = None
+        self.stages = {}
+        self.counters = {}
+        self.post_ids = []
+        self.media_ids = []
+        self.categories = []
+        self.error = None
+        # Profiler of the job, see utils.profiling
+        self.profile = profile
+        self.profile_path = None
+        self.profile_top = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._done_callbacks = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        """Add the wall time spent in the with block to the given stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name, seconds):
+        """Add seconds measured elsewhere, e.g. in a worker process, to a stage."""
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+        metrics.STAGE_SECONDS.observe(seconds, stage=name)
+
+    def add_times(self, timings):
+        """Add a dictionary of stage timings to the job."""
+        for name, seconds in timings.items():
+            self.add_time(name, seconds)
+
+    def add_count(self, name, amount=1):
+        """Add amount to a counter of the job, e.g. the bytes of the images."""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def set_page(self, index, total_pages=None):
+        """Set the page which is currently parsed."""
+        self.current_page = index
+        if total_pages is not None:
+            self.total_pages = total_pages
+
+    def add_page(self):
+        """Count a parsed page in the metrics."""
+        metrics.PAGES.inc()
+
+    def add_post(self, post_id):
+        """Remember the id of a created Wordpress post."""
+        with self._lock:
+            self.post_ids.append(post_id)
+
+    def add_media(self, media_id):
+        """Remember the id of an uploaded Wordpress media item."""
+        with self._lock:
+            self.media_ids.append(media_id)
+
+    def add_category(self, category):
+        """Remember a category found in the parsed file."""
+        with self._lock:
+            self.categories.append(category)
+
+    def set_profile(self, path, top):
+        """Remember the saved profile and its top functions."""
+        self.profile_path = path
+        self.profile_top = top
+
+    def start(self):
+        """Mark the job as running."""
+        self.state = "running"
+        self.started_at = time.time()
+
+    def add_done_callback(self, callback):
+        """Call callback(job) once the job is successfully done."""
+        self._done_callbacks.append(callback)
+
+    def finish(self):
+        """Mark the job as successfully done."""
+        self.state = "done"
+        self.finished_at = time.time()
+        metrics.ISSUES.inc(state="done")
+        for callback in self._done_callbacks:
+            try:
+                callback(self)
+            except Exception:  # pylint: disable=broad-except
+                traceback.print_exc()
+
+    def run(self, function, *args, **kwargs):
+        """
+        Run the function as this job and store the outcome in the job.
+        The function is called with the job as keyword argument ``job``.
+        """
+        self.start()
+        metrics.JOBS_RUNNING.inc()
+        try:
+            function(*args, job=self, **kwargs)
+        except Exception as e:  # pylint: disable=broad-except
+            traceback.print_exc()
+            self.fail(e)
+            return
+        finally:
+            metrics.JOBS_RUNNING.dec()
+        self.finish()
+
+    def fail(self, error):
+        """Mark the job as failed with the given error."""
+        self.state = "failed"
+        self.error = str(error)
+        self.finished_at = time.time()
+        metrics.ISSUES.inc(state="failed")
+
+    def take_result(self, result):
+        """Take over the result of an earlier job which parsed the same content."""
+        with self._lock:
+            self.post_ids = list(result["post_ids"])
+            self.media_ids = list(result["media_ids"])
+            self.categories = list(result["categories"])
+
+    def result(self):
+        """Return the Wordpress objects created by the job."""
+        with self._lock:
+            return {
+                "post_ids": list(self.post_ids),
+                "media_ids": list(self.media_ids),
+                "categories": list(self.categories),
+            }
+
+    def to_dict(self):
+        """Return the job state as JSON serializable dictionary."""
+        with self._lock:
+            stages = {name: round(seconds, 3) for name, seconds in self.stages.items()}
+            counters = dict(self.counters)
+        status = {
+            "id": self.id,
+            "filename": self.filename,
+            "content_hash": self.content_hash,
+            "state": self.state,
+            "current_page": self.current_page,
+            "total_pages": self.total_pages,
+            "stages": stages,
+            "counters": counters,
+            "error": self.error,
+            "profile": self._profile_dict(),
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        status.update(self.result())
+        return status
+
+    def _profile_dict(self):
+        """Return the profile state or None if the job is not profiled."""
+        if self.profile is None:
+            return None
+        return {
+            "mode": self.profile,
+            "available": self.profile_path is not None,
+            "top": self.profile_top,
+        }
+
+
+class JobQueue:
+    """Queue running parse jobs in background threads."""
+
+    def __init__(self, max_workers=None, history=None):
+        # PyMuPDF is not thread safe, so only one job runs at a time by default
+        if max_workers is None:
+            max_workers = int(os.environ.get("JOB_WORKERS", "1"))
+        if history is None:
+            history = int(os.environ.get("JOB_HISTORY", "100"))
+        self.history = history
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="parse-job"
+        )
+        self.jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, job, function, *args, **kwargs):
+        """Queue the function as the given job and return the job.
+
+        The function is called with the job as keyword argument ``job``
+        so it can report its progress.
+        """
+        with self._lock:
+            self.jobs[job.id] = job
+            self._forget_finished_jobs()
+        self.executor.submit(job.run, function, *args, **kwargs)
+        return job
+
+    def submit_once(self, job, function, *args, **kwargs):
+        """
+        Queue the job like submit unless a queued or running job parses the
+        same content, then that job is returned instead of the given one.
+        """
+        with self._lock:
+            for other in self.jobs.values():
+                if (
+                    job.content_hash is not None
+                    and other.content_hash == job.content_hash
+                    and other.state in ("queued", "running")
+                ):
+                    return other
+            self.jobs[job.id] = job
+            self._forget_finished_jobs()
+        self.executor.submit(job.run, function, *args, **kwargs)
+        return job
+
+    def get(self, job_id):
+        """Return the job with the given id or None."""
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def count(self, state):
+        """Return the number of known jobs in the given state."""
+        with self._lock:
+            return sum(1 for job in self.jobs.values() if job.state == state)
+
+    def _forget_finished_jobs(self):
+        """Drop the oldest finished jobs once the history limit is reached."""
+        finished = [
+            job_id
+            for job_id, job in self.jobs.items()
+            if job.state in ("done", "failed")
+        ]
+        for job_id in finished[: max(0, len(self.jobs) - self.history)]:
+            del self.jobs[job_id]
@@ -0,0 +1,117 @@
+"""Concurrent uploads of images to the Wordpress media library."""
+
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from utils import requests
+from utils.store import JsonStore, get_state_path
+
+
+class MediaIndex:
+    """
+    Wordpress media by the sha256 of the image content.
+    Images which have already been uploaded, e.g. recurring logos or the
+    images of a reprocessed issue, are not uploaded again. The index is kept
+    in a local JSON store and only valid for the Wordpress site it was
+    uploaded to.
+    """
+
+    def __init__(self, store=None, site=None):
+        if store is None:
+            store = JsonStore(get_state_path("media.json"))
+        if site is None:
+            site = os.environ.get("WORDPRESS_URL")
+        self.store = store
+        self.site = site
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def upload(self, image_filename, image_data, image_title=None):
+        """Return the id and source url of the image, upload it if unknown."""
+        if image_title is None:
+            image_title = image_filename
+        content_hash = hashlib.sha256(image_data).hexdigest()
+        key = f"{self.site}#{content_hash}"
+
+        # Identical images of a page are uploaded only once
+        with self._get_lock(key):
+            media = self.store.get(key)
+            if media is not None:
+                return media["id"], media["source_url"]
+
+            image_id, src = requests.upload_image_data(
+                image_filename, image_data, image_title
+            )
+            self.store.set(key, {"id": image_id, "source_url": src})
+            return image_id, src
+
+    def upload_file(self, image_path, image_title):
+        """Upload the image file unless it is known."""
+        with open(image_path, "rb") as f:
+            image_data = f.read()
+        return self.upload(os.path.basename(image_path), image_data, image_title)
+
+    def _get_lock(self, key):
+        """Return the lock of the image hash."""
+        with self._lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+
+_media_index = None
+_media_index_lock = threading.Lock()
+
+
+def get_media_index():
+    """Return the shared media index."""
+    global _media_index  # pylint: disable=global-statement
+    with _media_index_lock:
+        if _media_index is None:
+            _media_index = MediaIndex()
+    return _media_index
+
+
+class MediaUploader:
+    """
+    Upload images to Wordpress in a bounded pool of threads.
+    One uploader is used per issue, so its pool size limits the number of
+    concurrent media uploads of the whole issue.
+    """
+
+    def __init__(self, max_concurrency=None, media_index=None):
+        if media_index is None:
+            media_index = get_media_index()
+        self.media_index = media_index
+        if max_concurrency is None:
+            max_concurrency = int(os.environ.get("MEDIA_UPLOAD_CONCURRENCY", "4"))
+        self.max_concurrency = max(1, max_concurrency)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency, thread_name_prefix="media-upload"
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def upload(self, image_filename, image_data, image_title=None):
+        """Upload a single image unless known and return its id and source url."""
+        return self.media_index.upload(image_filename, image_data, image_title)
+
+    def upload_many(self, images):
+        """
+        Upload (image_filename, image_data) tuples concurrently, the filename
+        is used as title. Returns the ids and source urls in the order of the
+        given images.
+        """
+        futures = [
+            self._executor.submit(self.upload, image_filename, image_data)
+            for image_filename, image_data in images
+        ]
+        return [future.result() for future in futures]
+
+    def close(self):
+        """Wait for running uploads and stop the threads."""
+        self._executor.shutdown(wait=True)
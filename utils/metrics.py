@@ -0,0 +1,245 @@
+"""Counters, gauges and histograms exposed in the Prometheus text format."""
+
+import bisect
+import math
+import threading
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds of a stage of a page or an issue
+STAGE_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+# Seconds of a single request to Wordpress
+REQUEST_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def format_value(value):
+    """Format a sample value like Prometheus does."""
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def format_labels(names, values):
+    """Return the label set of a sample, e.g. {stage="text"}."""
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n")
+        value = value.replace('"', '\\"')
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class Metric:
+    """
+    Base of the metrics, keeping one value per combination of label values.
+    Updating a metric only takes a lock and a dictionary lookup, so the
+    instrumentation can stay on in production.
+    """
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        """Return the label values in the order of the label names."""
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"{self.name} needs the labels {self.labelnames}, got {tuple(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        """Return (suffix, label names, label values, value) tuples."""
+        with self._lock:
+            items = sorted(self._values.items())
+        if not items and not self.labelnames:
+            # Unlabelled metrics are reported before their first update
+            items = [((), 0)]
+        return [("", self.labelnames, key, value) for key, value in items]
+
+    def render(self):
+        """Return the metric in the Prometheus text format."""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        for suffix, names, values, value in self.samples():
+            lines.append(
+                f"{self.name}{suffix}{format_labels(names, values)}"
+                f" {format_value(value)}"
+            )
+        return "\n".join(lines)
+
+    def clear(self):
+        """Forget all values, e.g. between tests."""
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(Metric):
+    """Value which only goes up, e.g. the number of parsed pages."""
+
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        """Add amount to the counter of the labels."""
+        if amount < 0:
+            raise ValueError("Counters can only go up")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels):
+        """Return the value of the counter of the labels."""
+        key = self._key(labels)
+        with self._lock:
+            return self._values.get(key, 0)
+
+
+class Gauge(Metric):
+    """
+    Value which goes up and down. Instead of setting it, a function can be
+    given which is called on every scrape, e.g. to count the queued jobs.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._function = None
+
+    def set(self, value, **labels):
+        """Set the value of the labels."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        """Add amount to the value of the labels."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        """Subtract amount from the value of the labels."""
+        self.inc(-amount, **labels)
+
+    def set_function(self, function):
+        """Read the value of the unlabelled gauge from function() on scrape."""
+        self._function = function
+
+    def samples(self):
+        if self._function is not None:
+            return [("", (), (), self._function())]
+        return super().samples()
+
+
+class Histogram(Metric):
+    """Distribution of observed values, e.g. latencies, in cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=STAGE_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        """Count the value in its bucket."""
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                # Bucket counts, followed by the sum of the values
+                counts = self._values[key] = [0] * len(self.buckets) + [0.0]
+            counts[index] += 1
+            counts[-1] += value
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, list(counts)) for key, counts in self._values.items())
+        samples = []
+        names = self.labelnames + ("le",)
+        for key, counts in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                samples.append(
+                    ("_bucket", names, key + (format_value(bound),), cumulative)
+                )
+            samples.append(("_sum", self.labelnames, key, counts[-1]))
+            samples.append(("_count", self.labelnames, key, cumulative))
+        return samples
+
+
+class Registry:
+    """Collection of the metrics rendered by the /metrics endpoint."""
+
+    def __init__(self):
+        self.metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """Add the metric and return it."""
+        with self._lock:
+            if metric.name in self.metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self.metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        """Return all metrics in the Prometheus text format."""
+        with self._lock:
+            metrics = list(self.metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+registry = Registry()
+
+ISSUES = registry.register(
+    Counter("pdf_parser_issues_total", "Parsed issues by outcome.", ("state",))
+)
+PAGES = registry.register(Counter("pdf_parser_pages_total", "Parsed pages."))
+STAGE_SECONDS = registry.register(
+    Histogram(
+        "pdf_parser_stage_seconds",
+        "Wall time of the parser stages, one observation per timed block.",
+        ("stage",),
+    )
+)
+WORDPRESS_REQUEST_SECONDS = registry.register(
+    Histogram(
+        "pdf_parser_wordpress_request_seconds",
+        "Latency of the requests to the Wordpress API.",
+        ("method", "endpoint"),
+        buckets=REQUEST_BUCKETS,
+    )
+)
+WORDPRESS_RESPONSES = registry.register(
+    Counter(
+        "pdf_parser_wordpress_responses_total",
+        "Responses of the Wordpress API by status code, error if none came.",
+        ("method", "endpoint", "status"),
+    )
+)
+MEDIA_BYTES = registry.register(
+    Counter(
+        "pdf_parser_media_uploaded_bytes_total",
+        "Bytes of the images uploaded to the Wordpress media library.",
+    )
+)
+JOBS_RUNNING = registry.register(
+    Gauge("pdf_parser_jobs_running", "Parse jobs which are currently running.")
+)
+JOBS_QUEUED = registry.register(
+    Gauge("pdf_parser_jobs_queued", "Parse jobs waiting in the queue.")
+)
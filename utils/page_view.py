@@ -0,0 +1,131 @@
+"""Logical pages of an issue as views on the pages of the uploaded PDF file."""
+
+import fitz
+
+# Text extraction flags of fitz.Page.get_text by option
+TEXT_FLAGS = {
+    "text": fitz.TEXTFLAGS_TEXT,
+    "words": fitz.TEXTFLAGS_WORDS,
+    "dict": fitz.TEXTFLAGS_DICT,
+}
+
+
+class PageView:
+    """
+    Logical page of an issue: a clip of a page of the uploaded PDF file,
+    e.g. one half of an A3 spread, with its own page number.
+    The view provides the calls of fitz.Page used by the parser in its own
+    coordinates, which start at the top left corner of the clip like the
+    page of a PDF file split with show_pdf_page would. Nothing is copied,
+    the text is extracted and the clip is rendered from the source page.
+    """
+
+    def __init__(self, page, clip=None, number=None):
+        self.page = page
+        self.clip = fitz.Rect(page.rect if clip is None else clip)
+        self.number = page.number if number is None else number
+        self.rect = fitz.Rect(0, 0, self.clip.width, self.clip.height)
+        # Moves the clip of the source page to the origin of the view
+        self.matrix = fitz.Matrix(1, 0, 0, 1, -self.clip.x0, -self.clip.y0)
+
+    def __repr__(self):
+        return f"PageView({self.page.number}, {tuple(self.clip)}, {self.number})"
+
+    @property
+    def parent(self):
+        """Return the uploaded document."""
+        return self.page.parent
+
+    @property
+    def spec(self):
+        """Picklable description of the view, see from_spec."""
+        return self.page.number, tuple(self.clip), self.number
+
+    @classmethod
+    def from_spec(cls, src, spec):
+        """Return the view described by spec on the document src."""
+        source_number, clip, number = spec
+        return cls(src[source_number], clip, number)
+
+    def get_source_clip(self, clip=None):
+        """Return a rect of the view, the whole view by default, on the source page."""
+        if clip is None:
+            return fitz.Rect(self.clip)
+        return fitz.Rect(clip) * ~self.matrix
+
+    def crop(self, clip):
+        """Return a view of the rect of this view, with the same page number."""
+        return PageView(self.page, self.get_source_clip(clip), self.number)
+
+    def get_textpage(self, clip=None, flags=0):
+        """Extract the text of the view like fitz.Page.get_textpage."""
+        clip = self.rect if clip is None else fitz.Rect(clip) & self.rect
+        # The clip is applied after the matrix, i.e. in view coordinates
+        return self.page.get_textpage(clip=clip, flags=flags, matrix=self.matrix)
+
+    def get_text(self, option="text", clip=None, flags=None, textpage=None, sort=False):
+        """Return the text of the view or a rect of it like fitz.Page.get_text."""
+        clip = self.rect if clip is None else fitz.Rect(clip) & self.rect
+        if textpage is None:
+            flags = TEXT_FLAGS[option] if flags is None else flags
+            textpage = self.get_textpage(clip, flags)
+        # The clip sets the size of the dict, the text comes from the textpage
+        return self.page.get_text(option, clip=clip, textpage=textpage, sort=sort)
+
+    def get_images(self, full=False):
+        """
+        Return the images of the source page. Like a page split with
+        show_pdf_page, a half of a spread lists the images of both halves.
+        """
+        return self.page.get_images(full=full)
+
+    def get_pixmap(self, clip=None, **kwargs):
+        """Render the view or a rect of it."""
+        return self.page.get_pixmap(clip=self.get_source_clip(clip), **kwargs)
+
+
+def get_halves(page):
+    """Return the left and the right half of an A3 spread."""
+    r = page.rect
+    d = fitz.Rect(page.cropbox_position, page.cropbox_position)
+    left = fitz.Rect(r.x0, r.y0, r.x1 / 2, r.y1)
+    right = left + (left.width, 0, left.width, 0)
+    return [left + d, right + d]
+
+
+def get_split_image_infos(pages):
+    """
+    Return get_images(full=True) of every page view as it was listed on the
+    pages of the split PDF file the views replaced, i.e. with the xrefs of
+    that file. This only exists for the image filter of upload_images in the
+    Augustin parser, which reads (xref, smask, width, height) of these infos
+    as a rect. The split file is built in memory for its image lists and
+    closed again, drop it together with that filter.
+    """
+    split_document = fitz.open()
+    image_infos = []
+    try:
+        for view in pages:
+            page = view.page
+            if page.rect.width < page.rect.height:
+                split_document.insert_pdf(
+                    page.parent, from_page=page.number, to_page=page.number
+                )
+            else:
+                split_page = split_document.new_page(
+                    -1, width=view.rect.width, height=view.rect.height
+                )
+                split_page.show_pdf_page(
+                    split_page.rect, page.parent, page.number, clip=view.clip
+                )
+            image_infos.append(split_document[-1].get_images(full=True))
+    finally:
+        split_document.close()
+    return image_infos
+
+
+def get_page_view(page):
+    """Return the view of the whole page, the page itself if it is a view."""
+    if isinstance(page, PageView):
+        return page
+    return PageView(page)
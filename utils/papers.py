@@ -0,0 +1,71 @@
+"""Race-free get-or-create of the papers category of an issue."""
+
+import os
+import threading
+
+from utils.requests import check_for_papers_category, create_papers_category
+from utils.store import JsonStore, get_state_path
+
+
+class PapersCategoryService:
+    """
+    Get or create the papers category (category_papers) of an issue number.
+    Ids are cached in memory and in a local JSON store. A lock per issue
+    number makes sure concurrent uploads of the same issue create the
+    category only once.
+    """
+
+    def __init__(self, store=None, site=None):
+        if store is None:
+            store = JsonStore(get_state_path("papers_categories.json"))
+        if site is None:
+            site = os.environ.get("WORDPRESS_URL")
+        self.store = store
+        self.site = site
+        self._cache = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def get_or_create(self, issue_number):
+        """Return the id of the papers category, create it if missing."""
+        # Ids are only valid for the Wordpress site they were created on
+        key = f"{self.site}#{issue_number}"
+        category_id = self._cache.get(key)
+        if category_id is not None:
+            return category_id
+
+        with self._get_lock(key):
+            category_id = self._cache.get(key)
+            if category_id is not None:
+                return category_id
+
+            category_id = self.store.get(key)
+            if category_id is None:
+                # check if the version number exists already as papers category
+                # if not, create it
+                category_id = check_for_papers_category(issue_number)
+                if not category_id:
+                    category_id = create_papers_category(issue_number)
+                    print(f"papers_category_id: {category_id}")
+                self.store.set(key, category_id)
+
+            self._cache[key] = category_id
+            return category_id
+
+    def _get_lock(self, key):
+        """Return the lock of the issue number."""
+        with self._lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_or_create_papers_category(issue_number):
+    """Return the papers category id of the issue using the shared service."""
+    global _service  # pylint: disable=global-statement
+    with _service_lock:
+        if _service is None:
+            _service = PapersCategoryService()
+    return _service.get_or_create(issue_number)
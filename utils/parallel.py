@@ -0,0 +1,81 @@
+"""Run page extraction of a PDF file in a pool of worker processes."""
+
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import fitz
+
+# Document opened once per worker process by the pool initializer
+_worker_document = None
+
+
+def get_worker_count(workers=None):
+    """Return the number of worker processes, configured via PARSER_WORKERS."""
+    if workers is None:
+        workers = int(os.environ.get("PARSER_WORKERS", "1"))
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return workers
+
+
+def _open_worker_document(save_path_for_pdf):
+    """Open the PDF file once in each worker process."""
+    global _worker_document  # pylint: disable=global-statement
+    _worker_document = fitz.open(save_path_for_pdf)
+
+
+def _call_with_document(function, args):
+    """Call the function with the document of the worker process."""
+    return function(_worker_document, *args)
+
+
+def get_pending_limit(workers=None):
+    """
+    Return the number of pages submitted to the workers at once, configured
+    via PARSER_PENDING_PAGES, by default twice the number of workers.
+    """
+    pending = int(os.environ.get("PARSER_PENDING_PAGES", "0"))
+    if pending <= 0:
+        pending = 2 * get_worker_count(workers)
+    return pending
+
+
+def map_pages(function, save_path_for_pdf, arguments, workers=None, pending=None):
+    """
+    Call function(src, *args) for each args tuple in worker processes.
+    The results are yielded in the order of the arguments, independent of the
+    order in which the workers finish.
+    At most pending calls are submitted at once, further ones are submitted
+    as results are taken, so the results of a whole issue do not pile up in
+    memory while the caller is still busy with the first pages.
+    """
+    if pending is None:
+        pending = get_pending_limit(workers)
+    arguments = iter(arguments)
+    # Spawn fresh interpreters since MuPDF state must not be forked from threads
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=get_worker_count(workers),
+        mp_context=context,
+        initializer=_open_worker_document,
+        initargs=(save_path_for_pdf,),
+    ) as executor:
+        futures = deque()
+
+        def submit_next():
+            args = next(arguments, None)
+            if args is not None:
+                futures.append(executor.submit(_call_with_document, function, args))
+
+        for _ in range(pending):
+            submit_next()
+        try:
+            while futures:
+                result = futures.popleft().result()
+                submit_next()
+                yield result
+        finally:
+            for future in futures:
+                future.cancel()
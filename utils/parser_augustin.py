@@ -1,21 +1,42 @@
 """Parsing functions to extract images and text from augustin PDF file."""
 
+import copy
 import os
+import time
 import traceback
 
 import fitz
 from utils import requests
-from utils.requests import check_for_papers_category, create_papers_category
+from utils.checkpoints import CheckpointJournal
+from utils.debug_artifacts import get_debug_artifacts
+from utils.documents import open_session
+from utils.ingest import hash_file
+from utils.jobs import Job
+from utils.media import MediaUploader
+from utils.page_view import PageView, get_split_image_infos
+from utils.papers import get_or_create_papers_category
+from utils.parallel import get_worker_count, map_pages
+from utils.publisher import BatchPublisher
+from utils.text_layer import TextLayer
+from utils.text_normalizer import TextNormalizer
+from utils.transcode import Transcoder
+from utils.utils import PluginUtility
 
 
 # Method to extract all images from a PDF page
 def get_all_images(page, index, src, path_to_new_directory):
-    """Get all images from a PDF page."""
+    """
+    Get all images from a PDF page encoded in memory.
+    Returns the number of images, the index of the Gustl image and the
+    images as (image_filename, image_data) tuples in the order of the page.
+    The images are only written to the directory in debug mode.
+    """
     # Get image from PDF
     img_list = page.get_images(full=True)
 
     highest_index = 0
     gustl_id = None
+    images = []
 
     for img_index, image in enumerate(img_list):
         image_index = image[0]
@@ -36,13 +57,18 @@ def get_all_images(page, index, src, path_to_new_directory):
             if abs_width > 2000 and abs_height > 1000:
                 contains_gustl = True
 
-        # Save the image to jpg or png depending on colorspace
+        # Encode the image to jpg or png depending on colorspace
         if str(pix.colorspace).strip() == "Colorspace(CS_CMYK) - DeviceCMYK":
-            image_filename = f"{path_to_new_directory}page_{index}_img_{img_index}.jpg"
+            image_format = "jpg"
         else:
-            image_filename = f"{path_to_new_directory}page_{index}_img_{img_index}.png"
-        print(f"Saving image to {image_filename}, pix.colorspace: {pix.colorspace}")
-        pix.save(image_filename)
+            image_format = "png"
+        image_filename = f"page_{index}_img_{img_index}.{image_format}"
+        print(f"Encoding image {image_filename}, pix.colorspace: {pix.colorspace}")
+        image_data = pix.tobytes(image_format)
+        images.append((image_filename, image_data))
+        if os.environ.get("DEBUG"):
+            with open(path_to_new_directory + image_filename, "wb") as f:
+                f.write(image_data)
 
         highest_index = img_index
         if contains_gustl:
@@ -50,7 +76,7 @@ def get_all_images(page, index, src, path_to_new_directory):
             gustl_id = img_index
 
     # Increment highest index by 1 to get the number of images
-    return highest_index + 1, gustl_id
+    return highest_index + 1, gustl_id, images
 
 
 # Function creates meta information for the post
@@ -73,50 +99,22 @@ def clean_text(raw_text, starting_characters):
     """Clean the text from unwanted newlines and hyphens."""
     found_starting_character = False
 
-    article = ""
+    article = TextNormalizer()
 
     for line in raw_text.split("\n"):
         if found_starting_character:
-            # Skip empty lines
-            if not line.strip():
-                continue
-
-            # Clean text from unwanted hyphens and add newlines, if line is not empty
-            try:
-                if line.endswith(" "):
-                    if line[-2] in [".", "!", "?", ":"]:
-                        article += line[:-1] + "\n"
-                        continue
-                    article += line
-                    continue
-                # If in the end of line is "." or "!" or "?" or ":" keep newline
-                if line.endswith((".", "!", "?", ":")):
-                    article += line + "\n"
-                    continue
-                # If in the end of line is "-" delete hyphen and add line to article
-                if line[-1] == "-":
-                    article += line[:-1]
-                    continue
-            except IndexError:
-                pass
-
-            # If no checks are met, add line to article
-            article += line
+            # Skip empty lines, join lines and remove hyphens
+            article.add_line(line)
 
         if starting_characters[0] == line:
             found_starting_character = True
-            article += line
+            article.write(line)
 
-    # Format the string
-    article = list(article)
-    article_edit = article
-    for index, letter in enumerate(article):
-        if letter == "■":
-            del article_edit[index:]
-        if " " in letter and " " in article[index - 1]:
-            del article_edit[index]
+        # Nothing is added after the end of the article
+        if article.finished:
+            break
 
-    return "".join(article_edit)
+    return article.getvalue()
 
 
 def extract_starting_characters(
@@ -245,85 +243,339 @@ def extract_text(
     )
 
 
-def parse_image(page, src, index, path_to_new_directory):
+def parse_image(
+    page, src, index, path_to_new_directory, job=None, uploader=None, transcoder=None
+):
     """
     Parse the images from a PDF page and upload them to the Wordpress backend.
     Returns number of images found, image_id of the first image and
     image_text where each image is embedded in case of more than one image.
     """
     try:
-        number_of_images, gustl_id = get_all_images(
+        number_of_images, gustl_id, images = get_all_images(
             page, index, src, path_to_new_directory
         )
-        print(f"Gustl id is {gustl_id}")
-
-        gustl_wp_id = None
-
-        image_text = ""
-        if number_of_images == 0:
-            return number_of_images, 0, image_text, gustl_wp_id
-        # Exclude images that are not in the page rectangle
-        rx = page.rect
-        image_index = 0
-        image_id = None
-        image_src = None
-        for img_info in page.get_images(full=True):
-            img_rect = fitz.Rect(img_info[:4])
-            if rx.contains(img_rect) or image_index == gustl_id:
-                image_filename = (
-                    f"{path_to_new_directory}page_{index}_img_{image_index}.png"
-                )
-                image_id, image_src = requests.upload_image(
-                    image_filename, f"page_{index}_img_{image_index}.png"
-                )
-                if number_of_images == 1:
-                    return number_of_images, image_id, image_text, gustl_wp_id
-                print(
-                    f"Adding image {image_index} to image_text and gustl id is {gustl_id}"
-                )
-                if image_index == gustl_id:
-                    print(f"Setting gustl_wp_id to {image_id}")
-                    gustl_wp_id = image_id
-                    # Don't add gustl to image_text
-                    continue
-                # this shouldn't contain new lines because they are transforemd to <p> tags which are not block elements
-                image_text += (
-                    '<!-- wp:image {"id":'
-                    + str(image_id)
-                    + '} --><figure class="wp-block-image size-full"><img src="'
-                    + image_src
-                    + '"alt="" class="wp-image-'
-                    + str(image_id)
-                    + '"/></figure><!-- /wp:image -->'
-                )
-            image_index += 1
     except IOError as e:
         traceback.print_exc()
         error_message = f"Error extracting and uploading images: {e}"
         raise IOError(error_message) from e
 
+    return upload_images(
+        images,
+        page.get_images(full=True),
+        page.rect,
+        number_of_images,
+        gustl_id,
+        job,
+        uploader,
+        transcoder,
+    )
+
+
+def add_image_bytes(job, images, transcoded_images):
+    """Count the image bytes before and after transcoding on the job."""
+    original_bytes = sum(len(image_data) for _, image_data in images)
+    transcoded_bytes = sum(len(image_data) for _, image_data in transcoded_images)
+    job.add_count("image_bytes", original_bytes)
+    job.add_count("transcoded_image_bytes", transcoded_bytes)
+    job.add_count("image_bytes_saved", original_bytes - transcoded_bytes)
+
+
+def upload_images(
+    images,
+    image_infos,
+    page_rect,
+    number_of_images,
+    gustl_id,
+    job=None,
+    uploader=None,
+    transcoder=None,
+):
+    """
+    Upload the images encoded by get_all_images to the Wordpress backend.
+    The selected images are transcoded to web sized images by the transcoder
+    and uploaded concurrently by the uploader, the image_text keeps the order
+    of the images on the page.
+    Returns the same values as parse_image.
+    """
+    if job is None:
+        job = Job()
+    print(f"Gustl id is {gustl_id}")
+
+    gustl_wp_id = None
+
+    image_text = ""
+    if number_of_images == 0:
+        return number_of_images, 0, image_text, gustl_wp_id
+    # Exclude images that are not in the page rectangle
+    # DTODO: the filter misreads the image info (xref, smask, width, height) of
+    # the split file as a rect, get_split_image_infos only exists to reproduce
+    # it. Select the images by their position on the page view instead, e.g.
+    # with at least half of their area on the view.
+    rx = fitz.Rect(page_rect)
+    image_indices = [
+        image_index
+        for image_index, img_info in enumerate(image_infos)
+        if rx.contains(fitz.Rect(img_info[:4])) or image_index == gustl_id
+    ]
+    # With a single image only the first one is used
+    if number_of_images == 1:
+        image_indices = image_indices[:1]
+
+    selected_images = [images[image_index] for image_index in image_indices]
+    # Sub-stage of "images", its time is also included in the images stage
+    with job.stage("images_transcode"):
+        if transcoder is None:
+            with Transcoder() as page_transcoder:
+                transcoded_images = page_transcoder.transcode_many(selected_images)
+        else:
+            transcoded_images = transcoder.transcode_many(selected_images)
+    add_image_bytes(job, selected_images, transcoded_images)
+    selected_images = transcoded_images
+
+    try:
+        if uploader is None:
+            with MediaUploader() as page_uploader:
+                uploaded_images = page_uploader.upload_many(selected_images)
+        else:
+            uploaded_images = uploader.upload_many(selected_images)
+    except IOError as e:
+        traceback.print_exc()
+        error_message = f"Error extracting and uploading images: {e}"
+        raise IOError(error_message) from e
+
+    image_id = None
+    for image_index, (image_id, image_src) in zip(image_indices, uploaded_images):
+        job.add_media(image_id)
+        if number_of_images == 1:
+            return number_of_images, image_id, image_text, gustl_wp_id
+        print(f"Adding image {image_index} to image_text and gustl id is {gustl_id}")
+        if image_index == gustl_id:
+            print(f"Setting gustl_wp_id to {image_id}")
+            gustl_wp_id = image_id
+            # Don't add gustl to image_text
+            continue
+        # this shouldn't contain new lines because they are transforemd to <p> tags which are not block elements
+        image_text += (
+            '<!-- wp:image {"id":'
+            + str(image_id)
+            + '} --><figure class="wp-block-image size-full"><img src="'
+            + image_src
+            + '"alt="" class="wp-image-'
+            + str(image_id)
+            + '"/></figure><!-- /wp:image -->'
+        )
+
     return number_of_images, image_id, image_text, gustl_wp_id
 
 
-def parse_page(page, meta_array):
-    """Parse a single page of a PDF file and upload it to the Wordpress backend."""
+def extract_page_content(
+    page,
+    category,
+    path_to_new_directory,
+    plugin_utility=None,
+    materialize=False,
+    text_layer=None,
+):
+    """
+    Extract the images and the text layer of a page view without uploading anything.
+    The text layer used to identify the category can be passed to reuse it.
+    With materialize set, all text is extracted right away, so the content
+    can be returned from a worker process.
+    """
+    if plugin_utility is None:
+        plugin_utility = PluginUtility()
+    index = page.number
+    timings = {}
+
+    start = time.perf_counter()
+    try:
+        number_of_images, gustl_id, images = get_all_images(
+            page, index, page.parent, path_to_new_directory
+        )
+    except IOError as e:
+        traceback.print_exc()
+        error_message = f"Error extracting and uploading images: {e}"
+        raise IOError(error_message) from e
+    timings["images"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    text_page = text_layer if text_layer is not None else TextLayer(page)
+    # Crop page if category is "editorial"
+    if category == "editorial":
+        text_page = TextLayer(
+            plugin_utility.crop_by_percentage_page(
+                40, page, index, path_to_new_directory
+            )
+        )
+    if materialize:
+        text_page.materialize()
+    timings["text"] = time.perf_counter() - start
+
+    debug_captures = None
+    if os.environ.get("DEBUG"):
+        # Hand the debug images of a worker process to the main process
+        debug_captures = get_debug_artifacts().pop_captures()
+
+    return {
+        "index": index,
+        "category": category,
+        "number_of_images": number_of_images,
+        "gustl_id": gustl_id,
+        "images": images,
+        "page_rect": tuple(page.rect),
+        "text_page": text_page,
+        "timings": timings,
+        "debug_captures": debug_captures,
+    }
+
+
+def extract_view_content(src, spec, *args):
+    """Extract the content of the page view described by spec, in a worker process."""
+    return extract_page_content(PageView.from_spec(src, spec), *args)
+
+
+def add_debug_captures(content):
+    """Add the debug images captured while extracting the page content."""
+    if content["debug_captures"]:
+        get_debug_artifacts().add_captures(content["debug_captures"])
+
+
+def identify_page_category(page, index, path_to_new_directory, plugin_utility, job):
+    """Identify the category of a page with exception handling."""
+    try:
+        with job.stage("classify"):
+            return plugin_utility.identify_category(page, index, path_to_new_directory)
+    except IOError as e:
+        traceback.print_exc()
+        error_message = f"Error identifying category: {e}"
+        raise IOError(error_message) from e
+
+
+def plan_pages(pages, path_to_new_directory, plugin_utility, job):
+    """
+    Find the category of every page except the cover. This pass is cheap
+    since only the text of the category rects is read.
+    """
+    plans = []
+    for index, page in enumerate(pages):
+        if index == 0:
+            continue
+        text_layer = TextLayer(page)
+        category = identify_page_category(
+            text_layer, index, path_to_new_directory, plugin_utility, job
+        )
+        text_layer.release()
+        plans.append({"index": index, "category": category})
+        print(f"Plan page {index}: {category}")
+    return plans
+
+
+def iter_page_contents(
+    pages,
+    save_path_for_pdf,
+    path_to_new_directory,
+    plugin_utility,
+    job,
+    workers=None,
+    start_page=1,
+):
+    """
+    Yield the extracted content of every page view from start_page on in
+    page order, the cover is always skipped.
+    With more than one worker the pages are planned first and then extracted
+    in a process pool, otherwise page by page in this process.
+    In this process the text layer of a page is released once the next page
+    is requested.
+    """
+    if get_worker_count(workers) <= 1:
+        for index in range(max(start_page, 1), len(pages)):
+            text_layer = TextLayer(pages[index])
+            category = identify_page_category(
+                text_layer, index, path_to_new_directory, plugin_utility, job
+            )
+            content = extract_page_content(
+                pages[index],
+                category,
+                path_to_new_directory,
+                plugin_utility,
+                text_layer=text_layer,
+            )
+            job.add_times(content["timings"])
+            add_debug_captures(content)
+            text_page = content["text_page"]
+            yield content
+            text_page.release()
+            text_layer.release()
+        return
+
+    plans = plan_pages(pages, path_to_new_directory, plugin_utility, job)
+    # The workers open the uploaded file and build the views from their specs
+    arguments = [
+        (
+            pages[plan["index"]].spec,
+            plan["category"],
+            path_to_new_directory,
+            None,
+            True,
+        )
+        for plan in plans
+        if plan["index"] >= start_page
+    ]
+    for content in map_pages(
+        extract_view_content, save_path_for_pdf, arguments, workers
+    ):
+        job.add_times(content["timings"])
+        add_debug_captures(content)
+        yield content
+
+
+def published(job, on_published=None):
+    """
+    Return the callback adding a created post to the job, a post id of None
+    means the post may have been created, see BatchPublisher.flush.
+    """
+
+    def callback(post_id):
+        if post_id is not None:
+            job.add_post(post_id)
+        if on_published is not None:
+            on_published(post_id)
+
+    return callback
+
+
+def parse_page(page, meta_array, job=None, publisher=None, on_published=None):
+    """
+    Parse a single page of a PDF file and upload it to the Wordpress backend.
+    With a publisher the post is created with the next batch of the issue,
+    otherwise right away. on_published is called with the id of the post
+    once it is created.
+    """
+    if job is None:
+        job = Job()
+    if publisher is None:
+        publisher = BatchPublisher(batch_size=1)
 
     # Extract raw text from page with exception handling
     print(f"Status of upload_data_now: {meta_array.get('upload_data_now')}")
     if not meta_array.get("upload_data_now"):
         try:
-            if meta_array["raw_text"]:
-                print("Entering extract_text with raw_text")
-                raw_text, article, headlines, starting_characters = extract_text(
-                    page,
-                    meta_array["raw_text"],
-                    meta_array["starting_characters"],
-                    meta_array["headlines"],
-                    True,
-                )
-            else:
-                print("Entering extract_text without raw_text")
-                raw_text, article, headlines, starting_characters = extract_text(page)
+            with job.stage("text"):
+                if meta_array["raw_text"]:
+                    print("Entering extract_text with raw_text")
+                    raw_text, article, headlines, starting_characters = extract_text(
+                        page,
+                        meta_array["raw_text"],
+                        meta_array["starting_characters"],
+                        meta_array["headlines"],
+                        True,
+                    )
+                else:
+                    print("Entering extract_text without raw_text")
+                    raw_text, article, headlines, starting_characters = extract_text(
+                        page
+                    )
         except IOError as e:
             traceback.print_exc()
             error_message = f"Error extracting raw text: {e}"
@@ -368,18 +620,20 @@ def parse_page(page, meta_array):
                 + "</p><!-- /wp:paragraph -->"
             )
 
-        response = None
         # Append image_text to raw_text
         raw_text += meta_array["image_text"]
-        if meta_array["category"] == "editorial":
-            response = requests.upload_paper(
-                meta_information, raw_text, meta_array["image_id"]
-            )
-        else:
-            # Post Article to Wordpress
-            response = requests.upload_post(
-                meta_information, raw_text, meta_array["image_id"]
-            )
+        with job.stage("publish"):
+            if meta_array["category"] == "editorial":
+                post = requests.build_paper(
+                    meta_information, raw_text, meta_array["image_id"]
+                )
+                publisher.publish("papers", post, published(job, on_published))
+            else:
+                # Post Article to Wordpress
+                post = requests.build_post(
+                    meta_information, raw_text, meta_array["image_id"]
+                )
+                publisher.publish("articles", post, published(job, on_published))
     except IOError as e:
         traceback.print_exc()
         error_message = (
@@ -387,32 +641,83 @@ def parse_page(page, meta_array):
         )
         raise IOError(error_message) from e
 
-    if response.status_code not in [200, 201]:
-        raise IOError(
-            f"Error posting to Wordpress: {response.content} with status code {response.status_code}"
-        )
-
     return raw_text, headlines, starting_characters, False
 
 
-def process_augustin_file(save_path_for_pdf, path_to_new_directory, plugin_utility):
-    """Process the Augustin file."""
+def commit_page(publisher, checkpoint, index, meta_array, *args):
+    """
+    Record the state after the page in the checkpoint once the queued posts
+    are created, so a retry never skips a post which is not created yet.
+    """
+    # The parser state changes until the posts are created
+    meta_array = copy.deepcopy(meta_array)
+    args = copy.deepcopy(args)
+    publisher.call_when_published(
+        lambda: checkpoint.commit_page(index, meta_array, *args)
+    )
 
-    # split file in single pages
-    plugin_utility.save_pdf_a3_to_pdf_a4(save_path_for_pdf, path_to_new_directory)
 
-    src = fitz.open(save_path_for_pdf)
+def process_augustin_file(
+    save_path_for_pdf,
+    path_to_new_directory,
+    plugin_utility,
+    job=None,
+    workers=None,
+    journal=None,
+    session=None,
+):
+    """
+    Process the Augustin file with the document of the session, by default
+    the file is opened for this call only and closed afterwards.
+    """
+    with open_session(session) as issue_session:
+        return parse_augustin_document(
+            issue_session.open(save_path_for_pdf),
+            save_path_for_pdf,
+            path_to_new_directory,
+            plugin_utility,
+            job=job,
+            workers=workers,
+            journal=journal,
+        )
+
+
+def parse_augustin_document(
+    src,
+    save_path_for_pdf,
+    path_to_new_directory,
+    plugin_utility,
+    job=None,
+    workers=None,
+    journal=None,
+):
+    """
+    Process the open Augustin document src and report the progress to the job.
+    The document is left open, the worker processes open save_path_for_pdf.
+    The number of worker processes to extract pages defaults to PARSER_WORKERS.
+    Published articles and the parser state are recorded in the checkpoint
+    journal, so a failed run is resumed with the first page which was not
+    completely processed instead of publishing all articles again.
+    """
+    if job is None:
+        job = Job()
+    if journal is None:
+        journal = CheckpointJournal()
+    checkpoint = journal.open(
+        job.content_hash or hash_file(save_path_for_pdf), job.filename
+    )
+
+    # split the spreads into single page views, the file is left unchanged
+    with job.stage("split"):
+        pages = plugin_utility.split_pages(src, path_to_new_directory)
+        # The images of a page are selected by their info on the split file
+        image_infos = get_split_image_infos(pages)
 
     # extract version number from directory name
     version_number = plugin_utility.extract_version_number(path_to_new_directory)
 
-    # check if the version number exists already as papers category
-    # if not, create it
-
-    papers_category_id = check_for_papers_category(version_number)
-    if not papers_category_id:
-        papers_category_id = create_papers_category(version_number)
-        print(f"papers_category_id: {papers_category_id}")
+    # get the papers category of the version number, it is created if missing
+    papers_category_id = get_or_create_papers_category(version_number)
 
     categories = []
     meta_array = {
@@ -427,55 +732,196 @@ def process_augustin_file(save_path_for_pdf, path_to_new_directory, plugin_utili
     }
     print(f"meta_array: {meta_array}")
     next_page_needed = False
-
-    for index, page in enumerate(src):
-
+    # Pages and media ids of the article which is not published yet
+    pending_pages = []
+    pending_media_ids = []
+
+    job.set_page(0, len(pages))
+    if checkpoint.resumed:
+        print(f"Resume with page {checkpoint.next_page}, earlier pages are published")
+        checkpoint.restore(job)
+        meta_array = checkpoint.data["meta_array"]
+        next_page_needed = checkpoint.data["next_page_needed"]
+        pending_pages = checkpoint.data["pending_pages"]
+        pending_media_ids = checkpoint.data["pending_media_ids"]
+    else:
         # skip first page
-        if index == 0:
+        with job.stage("images"):
             meta_array["first_page_image_id"] = plugin_utility.save_page_as_image(
-                index, src, path_to_new_directory
-            )
-            continue
-        print(f"parse page {index} of {len(src)} pages.")
-        # Identify category of page
-        try:
-            category = plugin_utility.identify_category(
-                page, index, path_to_new_directory
+                0, pages, path_to_new_directory
             )
-            categories.append(category)
+        job.add_media(meta_array["first_page_image_id"])
+        job.add_page()
+        checkpoint.commit_page(
+            0,
+            meta_array,
+            next_page_needed,
+            pending_pages,
+            pending_media_ids,
+            media_ids=[meta_array["first_page_image_id"]],
+        )
 
-        except IOError as e:
-            traceback.print_exc()
-            error_message = f"Error identifying category: {e}"
-            raise IOError(error_message) from e
-        print("Main upload category", category)
+    # The uploader limits the concurrent media uploads of the whole issue,
+    # the transcoder workers are shared by all pages of the issue. Both are
+    # closed when the issue is published or parsing failed.
+    with MediaUploader() as uploader, Transcoder() as transcoder:
+        # The posts of the issue are created in batches
+        publisher = BatchPublisher()
+        for content in iter_page_contents(
+            pages,
+            save_path_for_pdf,
+            path_to_new_directory,
+            plugin_utility,
+            job,
+            workers,
+            checkpoint.next_page,
+        ):
+            index = content["index"]
+            media_count = len(job.media_ids)
+            category = content["category"]
+            page = content["text_page"]
+            job.set_page(index)
+            job.add_page()
+            print(f"parse page {index} of {len(pages)} pages.")
+            categories.append(category)
+            job.add_category(category)
+            print("Main upload category", category)
+
+            print(f""" meta array category not equal 0: {meta_array['category'] != 0}
+                    and category: {category != meta_array['category']} and
+                    next_page_needed: {next_page_needed}""")
+            if (
+                meta_array["category"] != 0
+                and category != meta_array["category"]
+                and next_page_needed
+            ):
+                # This is the case when the category has changed
+                print("Category changed, so upload data now.", meta_array)
+                article = checkpoint.get_article(index, "flush")
+                if article is None:
+                    meta_array["upload_data_now"] = True
+                    raw_text, headlines, starting_characters, next_page_needed = (
+                        parse_page(
+                            page,
+                            meta_array,
+                            job,
+                            publisher,
+                            checkpoint.on_published(
+                                index, "flush", pending_pages, pending_media_ids
+                            ),
+                        )
+                    )
+                else:
+                    print(f"Article of pages {article['pages']} is already published")
+                    next_page_needed = False
+                # Set meta array back to default
+                meta_array["upload_data_now"] = False
+                # This is the case when the page has been uploaded
+                print("Reset meta_array")
+                meta_array = {
+                    "category": 0,
+                    "image_id": "",
+                    "image_text": "",
+                    "index": 0,
+                    "raw_text": "",
+                    "headlines": [],
+                    "starting_characters": [],
+                    "category_papers": papers_category_id,  # ausgabennummer
+                }
+                pending_pages = []
+                pending_media_ids = []
+
+            with job.stage("images"):
+                number_of_images, image_id, image_text, gustl_wp_id = upload_images(
+                    content["images"],
+                    image_infos[index],
+                    content["page_rect"],
+                    content["number_of_images"],
+                    content["gustl_id"],
+                    job,
+                    uploader,
+                    transcoder,
+                )
+            page_media_ids = job.media_ids[media_count:]
+            pending_pages.append(index)
+            pending_media_ids += page_media_ids
+            if (
+                gustl_wp_id is not None
+                and checkpoint.get_article(index, "gustl") is not None
+            ):
+                print(f"Gustl post of page {index} is already published")
+            elif gustl_wp_id is not None:
+                print(f"Uploading post with gustl_wp_id: {gustl_wp_id}")
+                meta = {
+                    "protocol": "",
+                    "photograph": "",
+                    "title": "Gustl",
+                    "author": "",
+                    "category": category,
+                    "category_papers": papers_category_id,
+                }
+                with job.stage("publish"):
+                    publisher.publish(
+                        "articles",
+                        requests.build_post(meta, "", gustl_wp_id),
+                        published(
+                            job,
+                            checkpoint.on_published(
+                                index, "gustl", [index], [gustl_wp_id]
+                            ),
+                        ),
+                    )
 
-        # Commented out the following lines leading to an error parsing images
+            if number_of_images == 0:
+                print(f"Main upload No image found on page {index}")
+                # Get sample image_id from env file
+                image_id = os.environ.get("SAMPLE_IMAGE_ID")
+
+            meta_array["image_id"] = image_id
+            meta_array["image_text"] = image_text
+            # Set new or same category in meta array
+            meta_array["category"] = category
+            print("Entering parse page once meta_array:")
+
+            # Editorial handling, the page has already been cropped during extraction
+            if category == "editorial":
+                # Editorial should have the first page as thumbnail
+                meta_array["image_id"] = meta_array["first_page_image_id"]
+
+            article = checkpoint.get_article(index, "article")
+            if article is None:
+                raw_text, headlines, starting_characters, next_page_needed = parse_page(
+                    page,
+                    meta_array,
+                    job,
+                    publisher,
+                    checkpoint.on_published(
+                        index, "article", pending_pages, pending_media_ids
+                    ),
+                )
+            else:
+                print(f"Article of pages {article['pages']} is already published")
+                next_page_needed = False
+            if next_page_needed:
+                print("Next page needed")
+                # This case occurs when the page has its end on the next pages
+                meta_array["raw_text"] = " ".join(meta_array["raw_text"]) + raw_text
+                meta_array["headlines"] += headlines
+                meta_array["starting_characters"] += starting_characters
+                commit_page(
+                    publisher,
+                    checkpoint,
+                    index,
+                    meta_array,
+                    next_page_needed,
+                    pending_pages,
+                    pending_media_ids,
+                    category,
+                    page_media_ids,
+                )
 
-        # Crop page if category is "editorial"
-        # if category == "editorial":
-        #     page = plugin_utility.crop_by_percentage_page(
-        #         40, page, src, index, path_to_new_directory
-        #     )
+                continue
 
-        print(
-            f""" meta array category not equal 0: {meta_array['category'] != 0}
-                and category: {category != meta_array['category']} and
-                next_page_needed: {next_page_needed}"""
-        )
-        if (
-            meta_array["category"] != 0
-            and category != meta_array["category"]
-            and next_page_needed
-        ):
-            # This is the case when the category has changed
-            print("Category changed, so upload data now.", meta_array)
-            meta_array["upload_data_now"] = True
-            raw_text, headlines, starting_characters, next_page_needed = parse_page(
-                page, meta_array
-            )
-            # Set meta array back to default
-            meta_array["upload_data_now"] = False
             # This is the case when the page has been uploaded
             print("Reset meta_array")
             meta_array = {
@@ -489,66 +935,24 @@ def process_augustin_file(save_path_for_pdf, path_to_new_directory, plugin_utili
                 "category_papers": papers_category_id,  # ausgabennummer
             }
 
-        number_of_images, image_id, image_text, gustl_wp_id = parse_image(
-            page, src, index, path_to_new_directory
-        )
-        if gustl_wp_id is not None:
-            print(f"Uploading post with gustl_wp_id: {gustl_wp_id}")
-            meta = {
-                "protocol": "",
-                "photograph": "",
-                "title": "Gustl",
-                "author": "",
-                "category": category,
-                "category_papers": papers_category_id,
-            }
-            requests.upload_post(meta, "", gustl_wp_id)
-
-        if number_of_images == 0:
-            print(f"Main upload No image found on page {index}")
-            # Get sample image_id from env file
-            image_id = os.environ.get("SAMPLE_IMAGE_ID")
-
-        meta_array["image_id"] = image_id
-        meta_array["image_text"] = image_text
-        # Set new or same category in meta array
-        meta_array["category"] = category
-        print("Entering parse page once meta_array:")
-
-        # Editorial handling
-        if category == "editorial":
-            # Editorial should have the first page as thumbnail
-            meta_array["image_id"] = meta_array["first_page_image_id"]
-            # Crop page if category is "editorial"
-            page = plugin_utility.crop_by_percentage_page(
-                40, page, src, index, path_to_new_directory
+            pending_pages = []
+            pending_media_ids = []
+            commit_page(
+                publisher,
+                checkpoint,
+                index,
+                meta_array,
+                next_page_needed,
+                pending_pages,
+                pending_media_ids,
+                category,
+                page_media_ids,
             )
 
-        raw_text, headlines, starting_characters, next_page_needed = parse_page(
-            page, meta_array
-        )
-        if next_page_needed:
-            print("Next page needed")
-            # This case occurs when the page has its end on the next pages
-            meta_array["raw_text"] = " ".join(meta_array["raw_text"]) + raw_text
-            meta_array["headlines"] += headlines
-            meta_array["starting_characters"] += starting_characters
-
-            continue
-
-        # This is the case when the page has been uploaded
-        print("Reset meta_array")
-        meta_array = {
-            "category": 0,
-            "image_id": "",
-            "image_text": "",
-            "index": 0,
-            "raw_text": "",
-            "headlines": [],
-            "starting_characters": [],
-            "category_papers": papers_category_id,  # ausgabennummer
-        }
-
-        # DTodo: set the cover as image for the main item in the augustin backend # noqa: E501
-        # DTodo: set the color code in the settings of the augustin backend # noqa: E501
-    src.close()
+            # DTodo: set the cover as image for the main item in the augustin backend # noqa: E501
+            # DTodo: set the color code in the settings of the augustin backend # noqa: E501
+        with job.stage("publish"):
+            publisher.flush()
+    print(f"Transcoding saved {transcoder.saved_bytes} bytes of images")
+    # The whole issue is published, a new upload starts from the beginning
+    checkpoint.finish()
@@ -2,10 +2,13 @@
 
 import os
 
-import fitz
 from utils import requests
+from utils.debug_artifacts import get_debug_artifacts
+from utils.documents import open_session
+from utils.jobs import Job
+from utils.papers import get_or_create_papers_category
 from utils.parser_augustin import parse_image
-from utils.requests import check_for_papers_category, create_papers_category
+from utils.span_layer import SpanLayer, get_span_layer
 from utils.utils import PluginUtility
 
 
@@ -16,11 +19,8 @@ class Strawanzerin:
         self.debug = os.environ.get("DEBUG")
         self.global_url = os.environ.get("SAVE_PATH")
 
-    def parse_strawanzerin_image(self, save_path_for_pdf, path_to_new_directory):
-        """Parse the strawanzerin file."""
-
-        # Get source file
-        src = fitz.open(save_path_for_pdf)
+    def parse_strawanzerin_image(self, src, path_to_new_directory, job=None):
+        """Parse the images of the first page of the open strawanzerin file."""
 
         # Get image from first page
         page = src.load_page(0)
@@ -29,7 +29,7 @@ class Strawanzerin:
 
         # Get image from PDF
         number_of_images, image_id, image_text, _ = parse_image(
-            page, src, index, path_to_new_directory
+            page, src, index, path_to_new_directory, job
         )
 
         if number_of_images == 0:
@@ -40,18 +40,15 @@ class Strawanzerin:
         return image_id, image_text
 
     def parse_strawanzerin_headline(self, page):
-        """Parse the strawanzerin file for headlines."""
+        """Parse a page or its span layer for headlines."""
         headlines = []
-        blocks = page.get_text("dict", flags=11)["blocks"]
-        for block in blocks:
-            for line in block["lines"]:
-                for span in line["spans"]:
-                    if span["size"] > 30:
-                        headlines += (
-                            span["text"],
-                            span["bbox"],
-                            span["size"],
-                        )
+        for span in get_span_layer(page).spans:
+            if span["size"] > 30:
+                headlines += (
+                    span["text"],
+                    span["bbox"],
+                    span["size"],
+                )
 
         return headlines
 
@@ -74,54 +71,52 @@ class Strawanzerin:
             flags.append("bold")
         return ", ".join(flags)
 
-    def add_html_tags_to_text(self, page, clip_region):
-        """Extract metadata from the PDF page."""
-        text = ""
-        blocks = page.get_text("dict", clip=clip_region, sort=True, flags=11)["blocks"]
-        for block in blocks:
-            for line in block["lines"]:
-                for span in line["spans"]:
-                    # Cover case for headlines with size > 30
-                    if span["size"] > 30:
-                        text += "<h2>" + span["text"] + "</h2>"
-                        continue
-
-                    # Cover case for headlines with different font color
-                    if (
-                        f'#{span["color"]:06x}' != "#221f1f"
-                        or f'#{span["color"]:06x}' != "#000000"
-                        and span["size"] > 20
-                    ):
-                        text += "<h3><b>" + span["text"] + "<b/></h3>"
-                        continue
-
-                    # Cover case for bold headlines with size > 10
-                    if span["size"] > 10 and span["flags"] & 2**4:
-                        text += "<h4><b>" + span["text"].upper() + "</b></h4>"
-                        continue
-
-                    # Cover case for italic fonts with size > 10
-                    if span["size"] < 10 and span["flags"] & 2**1:
-                        text += "<h5><i>" + span["text"] + "</i></h5>"
-                        continue
-
-                    # Cover case for bold headlines with size > 10
-                    if span["size"] < 10 and span["flags"] & 2**4:
-                        text += "<h5><b>" + span["text"] + "</b></h5>"
-                        continue
-
-                    text += span["text"]
-        return text
-
-    def parse_first_page(self, save_path_for_pdf, path_to_new_directory):
-        """Parse the strawanzerin file."""
-
-        # Get source file
-        src = fitz.open(save_path_for_pdf)
-
+    def add_html_tags(self, span):
+        """Return the text of a span with HTML tags."""
+        # Cover case for headlines with size > 30
+        if span["size"] > 30:
+            return "<h2>" + span["text"] + "</h2>"
+
+        # Cover case for headlines with different font color
+        if (
+            f'#{span["color"]:06x}' != "#221f1f"
+            or f'#{span["color"]:06x}' != "#000000"
+            and span["size"] > 20
+        ):
+            return "<h3><b>" + span["text"] + "<b/></h3>"
+
+        # Cover case for bold headlines with size > 10
+        if span["size"] > 10 and span["flags"] & 2**4:
+            return "<h4><b>" + span["text"].upper() + "</b></h4>"
+
+        # Cover case for italic fonts with size > 10
+        if span["size"] < 10 and span["flags"] & 2**1:
+            return "<h5><i>" + span["text"] + "</i></h5>"
+
+        # Cover case for bold headlines with size > 10
+        if span["size"] < 10 and span["flags"] & 2**4:
+            return "<h5><b>" + span["text"] + "</b></h5>"
+
+        return span["text"]
+
+    def add_html_tags_to_text(self, page, clip_region, buffer=None):
+        """
+        Add the text of the clip region of a page or its span layer with HTML
+        tags to the buffer, a list of strings. Returns the buffer.
+        """
+        if buffer is None:
+            buffer = []
+        spans = get_span_layer(page).get_spans(clip_region)
+        buffer.extend(self.add_html_tags(span) for span in spans)
+        return buffer
+
+    def parse_first_page(self, src, path_to_new_directory):
+        """Parse the first page of the open strawanzerin file."""
         page = src.load_page(0)
+        # The spans are extracted once for the headlines and all columns
+        span_layer = SpanLayer(page)
 
-        headlines = self.parse_strawanzerin_headline(page)
+        headlines = self.parse_strawanzerin_headline(span_layer)
 
         if not headlines:
             raise ValueError("Error: No headline found!")
@@ -138,18 +133,17 @@ class Strawanzerin:
             (320, y0, 460, page.rect.height),
             (460, y0, page.rect.width, page.rect.height),
         ]
-        text = ""
+        text = []
         for i, (x0, y0, x1, y1) in enumerate(clip_regions):
             clip_region = (x0, y0, x1, y1)
-            text += self.add_html_tags_to_text(page, clip_region)
+            self.add_html_tags_to_text(span_layer, clip_region, text)
 
             # Save the image to the new directory
             if self.debug:
                 name_png = f"{path_to_new_directory}page-{page.number}{i + 1}.png"
-                pix = page.get_pixmap(clip=clip_region)
-                pix.save(name_png)
+                get_debug_artifacts().capture(page, clip_region, name_png)
 
-        return text
+        return "".join(text)
 
     def get_clip_regions(self, page, headlines, even_page_number):
         """Get clip regions for specified page."""
@@ -227,9 +221,19 @@ class Strawanzerin:
 
         return clip_regions
 
-    def get_text_from_pages(self, page, headlines, even_page_number):
-        """Parse the strawanzerin file."""
-        text, column_text = "", ""
+    def get_text_from_pages(
+        self, page, headlines, even_page_number, text=None, column_text=None
+    ):
+        """
+        Add the columns of a page or its span layer with HTML tags to the text
+        buffer and the last column to the column_text buffer, both lists of
+        strings. Returns the buffers.
+        """
+        if text is None:
+            text = []
+        if column_text is None:
+            column_text = []
+        page = get_span_layer(page)
         if even_page_number:
             clip_regions = self.get_clip_regions(page, headlines, True)
         else:
@@ -240,44 +244,60 @@ class Strawanzerin:
 
             # Only add the last column to the variable column_text
             if index == len(clip_regions) - 1:
-                column_text += self.add_html_tags_to_text(page, clip_region)
+                self.add_html_tags_to_text(page, clip_region, column_text)
                 continue
 
-            text += self.add_html_tags_to_text(page, clip_region)
+            self.add_html_tags_to_text(page, clip_region, text)
 
         return text, column_text
 
-    def parse_following_pages(self, save_path_for_pdf):
-        """Parse page two of the strawanzerin file."""
-        # Get source file
-        src = fitz.open(save_path_for_pdf)
-
-        text, column_text = "", ""
+    def parse_following_pages(self, src, job=None):
+        """Parse the pages after the first one of the open strawanzerin file."""
+        if job is None:
+            job = Job()
+        text, column_text = [], []
 
         for index, page in enumerate(src):
             if index == 0:
                 continue
+            job.set_page(index, src.page_count)
+            job.add_page()
 
-            headlines = self.parse_strawanzerin_headline(page)
+            # The spans are extracted once for the headlines and all columns
+            span_layer = SpanLayer(page)
+            headlines = self.parse_strawanzerin_headline(span_layer)
 
             # Since index starts at zero, even index number means odd page number
             even_index_number = index % 2 == 1
-            text_array = self.get_text_from_pages(page, headlines, even_index_number)
-            text += text_array[0]
-            column_text += text_array[1]
+            self.get_text_from_pages(
+                span_layer, headlines, even_index_number, text, column_text
+            )
 
         # Finally merge the last column to the text
-        text += column_text
-
-        return text
-
-    def parse_strawanzerin(self, save_path_for_pdf, path_to_new_directory):
-        """Parse the strawanzerin file."""
-        image_id, image_text = self.parse_strawanzerin_image(
-            save_path_for_pdf, path_to_new_directory
-        )
-        text = self.parse_first_page(save_path_for_pdf, path_to_new_directory)
-        text += self.parse_following_pages(save_path_for_pdf)
+        return "".join(text + column_text)
+
+    def parse_strawanzerin(
+        self, save_path_for_pdf, path_to_new_directory, job=None, session=None
+    ):
+        """
+        Parse the strawanzerin file and report the progress to the job.
+        The stages use the document of the session, by default the file is
+        opened for this call only and closed afterwards.
+        """
+        if job is None:
+            job = Job()
+
+        with open_session(session) as issue_session:
+            src = issue_session.open(save_path_for_pdf)
+            with job.stage("images"):
+                image_id, image_text = self.parse_strawanzerin_image(
+                    src, path_to_new_directory, job
+                )
+            with job.stage("text"):
+                job.set_page(0, src.page_count)
+                text = self.parse_first_page(src, path_to_new_directory)
+                job.add_page()
+                text += self.parse_following_pages(src, job)
         text += image_text
 
         plugin_utility = PluginUtility()
@@ -285,13 +305,8 @@ class Strawanzerin:
         # extract version number from directory name
         version_number = plugin_utility.extract_version_number(path_to_new_directory)
 
-        # check if the version number exists already as papers category
-        # if not, create it
-
-        papers_category_id = check_for_papers_category(version_number)
-        if not papers_category_id:
-            papers_category_id = create_papers_category(version_number)
-            print(f"papers_category_id: {papers_category_id}")
+        # get the papers category of the version number, it is created if missing
+        papers_category_id = get_or_create_papers_category(version_number)
 
         meta_array = {
             "category": "Strawanzerin",
@@ -306,4 +321,7 @@ class Strawanzerin:
         }
 
         # Post raw text and category to Wordpress backend with exception handling in function
-        requests.upload_post(meta_array, text, image_id)
+        with job.stage("publish"):
+            response = requests.upload_post(meta_array, text, image_id)
+        job.add_category(meta_array["category"])
+        job.add_post(response.json()["id"])
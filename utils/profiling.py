@@ -0,0 +1,181 @@
+"""Opt-in profiling of single parse jobs."""
+
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from contextlib import contextmanager
+
+# Value of the profile parameter: profiler
+PROFILE_MODES = {
+    "1": "cprofile",
+    "true": "cprofile",
+    "cprofile": "cprofile",
+    "sample": "sample",
+}
+PROFILE_FILENAMES = {"cprofile": "profile.prof", "sample": "profile.txt"}
+
+
+def get_profile_mode(value):
+    """
+    Return the profiler of the profile parameter, None if it is not set.
+    1 selects the deterministic cProfile, sample the sampling profiler which
+    has less overhead on long jobs.
+    """
+    if value is None or value.lower() in ("", "0", "false"):
+        return None
+    mode = PROFILE_MODES.get(value.lower())
+    if mode is None:
+        raise ValueError(f"Unknown profile mode {value}, use 1 or sample")
+    return mode
+
+
+def describe_function(function):
+    """Return a short name of a (filename, line, name) function."""
+    filename, line, name = function
+    if filename == "~":
+        # Built-in functions have no file
+        return name
+    return f"{os.path.basename(filename)}:{line}({name})"
+
+
+class DeterministicProfiler:
+    """cProfile of the calling thread, saved in the pstats format."""
+
+    def __init__(self):
+        self.profiler = cProfile.Profile()
+
+    def enable(self):
+        """Start profiling the calling thread."""
+        self.profiler.enable()
+
+    def disable(self):
+        """Stop profiling."""
+        self.profiler.disable()
+
+    def dump_stats(self, path):
+        """Save the profile, it can be opened with pstats or snakeviz."""
+        self.profiler.dump_stats(path)
+
+    def get_top(self, limit=20):
+        """Return the functions with the most time spent in themselves."""
+        stats = pstats.Stats(self.profiler).stats
+        top = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)
+        return [
+            {
+                "function": describe_function(function),
+                "calls": calls,
+                "self_s": round(self_time, 4),
+                "cumulative_s": round(cumulative_time, 4),
+            }
+            for function, (_, calls, self_time, cumulative_time, _) in top[:limit]
+        ]
+
+
+class SamplingProfiler:
+    """
+    Sample the stack of the calling thread every PROFILE_INTERVAL seconds
+    (default 0.005) from a background thread. Every sample is weighted with
+    the time since the previous one, since the sampler can not run while
+    MuPDF holds the GIL. The profile is saved as collapsed stacks in
+    milliseconds, which flamegraph.pl and speedscope can read.
+    """
+
+    def __init__(self, interval=None):
+        if interval is None:
+            interval = float(os.environ.get("PROFILE_INTERVAL", "0.005"))
+        self.interval = interval
+        self.stacks = Counter()
+        self._thread_id = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def enable(self):
+        """Start sampling the calling thread."""
+        self._thread_id = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="profile-sampler", daemon=True
+        )
+        self._thread.start()
+
+    def disable(self):
+        """Stop sampling."""
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        """Record the stack of the profiled thread until disabled."""
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            # pylint: disable=protected-access
+            frame = sys._current_frames().get(self._thread_id)
+            now = time.perf_counter()
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+                frame = frame.f_back
+            if stack:
+                self.stacks[tuple(reversed(stack))] += now - last
+            last = now
+
+    def dump_stats(self, path):
+        """Save the samples as collapsed stacks, one stack per line."""
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, seconds in self.stacks.most_common():
+                names = ";".join(describe_function(function) for function in stack)
+                f.write(f"{names} {max(1, round(seconds * 1000))}\n")
+
+    def get_top(self, limit=20):
+        """Return the functions most often found on top of the stack."""
+        self_seconds = Counter()
+        seconds = Counter()
+        for stack, weight in self.stacks.items():
+            self_seconds[stack[-1]] += weight
+            # Recursive functions count once per sample
+            for function in set(stack):
+                seconds[function] += weight
+        return [
+            {
+                "function": describe_function(function),
+                "calls": None,
+                "self_s": round(weight, 4),
+                "cumulative_s": round(seconds[function], 4),
+            }
+            for function, weight in self_seconds.most_common(limit)
+        ]
+
+
+PROFILERS = {"cprofile": DeterministicProfiler, "sample": SamplingProfiler}
+
+
+@contextmanager
+def profile(job, directory):
+    """
+    Profile the with block if the job asks for it. The profile is saved in
+    the directory of the issue, also if the block fails, and the top
+    functions are added to the job. Only the thread of the job is profiled,
+    not the upload threads or the parser worker processes.
+    """
+    if job is None or job.profile is None:
+        yield
+        return
+
+    profiler = PROFILERS[job.profile]()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        path = os.path.join(directory, PROFILE_FILENAMES[job.profile])
+        try:
+            profiler.dump_stats(path)
+        except IOError:
+            traceback.print_exc()
+            path = None
+        job.set_profile(path, profiler.get_top())
@@ -0,0 +1,138 @@
+"""Publish the posts of an issue in calls to the Wordpress batch endpoint."""
+
+import os
+import traceback
+
+from fastapi import HTTPException
+from requests.exceptions import ReadTimeout
+from utils import requests
+from utils.wordpress import get_client
+
+# Wordpress rejects batch calls with more sub-requests
+MAX_BATCH_SIZE = 25
+# Error of posts sent without an answer, Wordpress may have created them
+OUTCOME_UNKNOWN = "Wordpress did not answer in time, the post may have been created"
+
+
+class BatchPublisher:
+    """
+    Collect the posts of an issue and create them with calls to the batch
+    endpoint of Wordpress, at most WP_BATCH_SIZE posts per call.
+    The callback of a post is called with its id once it is created, in the
+    order the posts were published. If the batch endpoint is not available,
+    the posts are created with single requests. A batch size of one creates
+    every post right away.
+    """
+
+    def __init__(self, batch_size=None):
+        if batch_size is None:
+            batch_size = int(os.environ.get("WP_BATCH_SIZE", str(MAX_BATCH_SIZE)))
+        self.batch_size = max(1, min(batch_size, MAX_BATCH_SIZE))
+        self.batch_available = self.batch_size > 1
+        # Posts as (endpoint, post, callback) and calls as (None, None, callback)
+        self._queue = []
+        self._posts = 0
+
+    def publish(self, endpoint, post, callback=None):
+        """Queue the post for the endpoint, the batch is sent once it is full."""
+        self._queue.append((endpoint, post, callback))
+        self._posts += 1
+        if self._posts >= self.batch_size:
+            self.flush()
+
+    def call_when_published(self, callback):
+        """Call the callback once all posts queued so far are created."""
+        if self._queue:
+            self._queue.append((None, None, callback))
+        else:
+            callback()
+
+    def flush(self):
+        """
+        Create all queued posts and call their callbacks.
+        If a post could not be created, the callbacks of the other created
+        posts are still called, the queued calls after it are dropped and an
+        HTTPException is raised.
+        If Wordpress did not answer in time, the posts may have been created.
+        Their callbacks are called with None instead of an id, so they are
+        recorded as published with unknown id and not published again.
+        """
+        queue, self._queue, self._posts = self._queue, [], 0
+        posts = [(endpoint, post) for endpoint, post, _ in queue if endpoint]
+        if not posts:
+            results = []
+        elif self.batch_available and len(posts) > 1:
+            results = self._publish_batch(posts)
+        else:
+            results = self._publish_single(posts)
+
+        results = iter(results)
+        error = None
+        for endpoint, post, callback in queue:
+            if endpoint is None:
+                if error is None:
+                    callback()
+                continue
+            post_id, post_error = next(results, (None, "Post was not sent"))
+            if post_error is not None:
+                error = error or post_error
+            if post_error == OUTCOME_UNKNOWN:
+                print(
+                    f"Check in Wordpress if the {endpoint} post exists:", post["title"]
+                )
+            if callback is not None and post_error in (None, OUTCOME_UNKNOWN):
+                callback(post_id)
+
+        if error == OUTCOME_UNKNOWN:
+            raise HTTPException(status_code=504, detail=error)
+        if error is not None:
+            raise HTTPException(
+                status_code=400, detail=f"Post could not be uploaded! {error}"
+            )
+
+    def _publish_batch(self, posts):
+        """Create the posts in one batch call, return (id, error) per post."""
+        try:
+            response = get_client().batch(
+                [("POST", endpoint, post) for endpoint, post in posts]
+            )
+        except ReadTimeout:
+            traceback.print_exc()
+            return [(None, OUTCOME_UNKNOWN)] * len(posts)
+        if response.status_code not in (200, 207):
+            print(
+                "Batch endpoint not available, publishing single posts:",
+                response.status_code,
+                response.content,
+            )
+            self.batch_available = False
+            return self._publish_single(posts)
+
+        results = []
+        for sub_response in response.json()["responses"]:
+            body = sub_response.get("body") or {}
+            if sub_response.get("status") in (200, 201):
+                results.append((body["id"], None))
+            else:
+                results.append(
+                    (None, f"{sub_response.get('status')} {body.get('message')}")
+                )
+        return results
+
+    def _publish_single(self, posts):
+        """Create the posts one by one until a post fails."""
+        results = []
+        for endpoint, post in posts:
+            try:
+                response = requests.publish(endpoint, post)
+            except ReadTimeout:
+                traceback.print_exc()
+                results.append((None, OUTCOME_UNKNOWN))
+                break
+            except (HTTPException, IOError) as e:
+                # Report the posts created so far before giving up
+                traceback.print_exc()
+                results.append((None, getattr(e, "detail", str(e))))
+                break
+            results.append((response.json()["id"], None))
+        return results
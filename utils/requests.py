@@ -1,13 +1,13 @@
 """Send requests to Wordpress API."""
 
-import base64
-import json
 import os
 import traceback
 
-import requests
 from dotenv import load_dotenv
 from fastapi import HTTPException
+from utils import metrics
+from utils.categories import category_cache, papers_category_cache
+from utils.wordpress import get_client
 
 load_dotenv()
 
@@ -18,41 +18,20 @@ if global_url is None:
 debug = os.environ.get("DEBUG")
 
 
-def generate_auth_header():
-    """Generate the authentication header for the Wordpress API."""
-    try:
-        user = os.getenv("WP_API_USER")
-        if user is None:
-            raise ValueError("WP_API_USER not set in .env")
-
-        password = os.getenv("WP_API_KEY")
-        if password is None:
-            raise ValueError("WP_API_KEY not set in .env")
-
-        credentials = user + ":" + password
-
-        token = base64.b64encode(credentials.encode())
-
-        header = {"Authorization": "Basic " + token.decode("utf-8")}
-
-        return header
-
-    except Exception as e:
-        print(e, os.getenv("WP_API_USER"), os.getenv("WP_API_USER"))
-
-        raise e
-
-
 def upload_image(image_path, image_title):
-    """Upload the image to the Wordpress media library."""
-    url = global_url + "media"
+    """Upload the image file to the Wordpress media library."""
+    with open(image_path, "rb") as file:
+        return upload_image_data(os.path.basename(image_path), file, image_title)
 
-    header = generate_auth_header()
 
-    with open(image_path, "rb") as file:
-        media = {"file": file, "caption": image_title}
+def upload_image_data(image_filename, image_data, image_title):
+    """
+    Upload an image from memory to the Wordpress media library.
+    The file type is taken from the extension of the image_filename.
+    """
+    media = {"file": (image_filename, image_data), "caption": image_title}
 
-        response = requests.post(url, headers=header, files=media, timeout=5)
+    response = get_client().post("media", files=media)
 
     if response.status_code not in (200, 201):
         print("Failed to upload image:" + str(response.content))
@@ -63,15 +42,15 @@ def upload_image(image_path, image_title):
             + str(response.content),
         )
 
-    image_id = json.loads(response.content)["id"]
-    try:
-        src = json.loads(response.content)["media_details"]["sizes"]["full"][
-            "source_url"
-        ]
-    except KeyError:
-        pass
+    if isinstance(image_data, bytes):
+        metrics.MEDIA_BYTES.inc(len(image_data))
+    else:
+        metrics.MEDIA_BYTES.inc(os.fstat(image_data.fileno()).st_size)
+
+    image = response.json()
+    image_id = image["id"]
     try:
-        src = json.loads(response.content)["source_url"]
+        src = image["source_url"]
     except KeyError as e:
         traceback.print_exc()
         error_message = f"No image source url found: {e}"
@@ -86,87 +65,44 @@ def check_for_category(category):
     Return Uncategorized if not.
     """
 
-    url = global_url + "categories?per_page=100"
-
-    header = generate_auth_header()
-
     # Try receiving the categories with exception handling
     try:
-        response = requests.get(url, headers=header, timeout=5)
+        category_id = category_cache.lookup(category)
     except IOError as e:
         traceback.print_exc()
         error_message = f"WPLocal not running? Error receiving a get request: {e}"
         raise IOError(error_message) from e
 
-    if response.status_code not in (200, 201):
-        print("check_for_category:" + str(response.content))
-        raise HTTPException(
-            status_code=400,
-            detail="Category could not be checked!"
-            + str(response.status_code)
-            + str(response.content),
-        )
-
-    category_list = json.loads(response.content)
+    if category_id is None:
+        # if category does not exist, return category "Uncategorized", which has always id 1
+        return 1
 
-    for cat in category_list:
-        if category == "tun & lassen" and cat["name"].strip() == "tun &amp; lassen":
-            return cat["id"]
-        if cat["name"].strip() == str(category).strip():
-            return cat["id"]
-
-    # if category does not exist, return category "Uncategorized", which has always id 1
-    return 1
+    return category_id
 
 
 def check_for_papers_category(category):
     """
     Check if the papers category exists and return it.
-    Return Uncategorized if not.
+    Return None if not.
     """
 
-    url = global_url + "category_papers?per_page=100"
-
-    header = generate_auth_header()
-
     # Try receiving the categories with exception handling
     try:
-        response = requests.get(url, headers=header, timeout=5)
+        # A miss could mean the term was created elsewhere, so check Wordpress again
+        return papers_category_cache.lookup(category, refresh_on_miss=True)
     except IOError as e:
         traceback.print_exc()
         error_message = f"WPLocal not running? Error receiving a get request: {e}"
         raise IOError(error_message) from e
 
-    if response.status_code not in (200, 201):
-        print("check_for_papers_category failed:" + str(response.content))
-
-        raise HTTPException(
-            status_code=400,
-            detail="Papers Category could not be checked!"
-            + str(response.status_code)
-            + str(response.content),
-        )
-
-    category_list = json.loads(response.content)
-
-    for cat in category_list:
-        if cat["name"] == str(category):
-            return cat["id"]
-
-    # if category does not exist, return category "Uncategorized", which has always id 1
-    return None
-
 
 def create_papers_category(version_number):
     """Create a new category for the papers."""
-    url = global_url + "category_papers"
-
-    header = generate_auth_header()
     version_string = str(version_number)
 
     category = {"name": version_string}
 
-    response = requests.post(url, headers=header, json=category, timeout=5)
+    response = get_client().post("category_papers", json=category)
 
     if response.status_code not in (200, 201):
         print("create_papers_category failed: ", response.content)
@@ -177,20 +113,18 @@ def create_papers_category(version_number):
             + str(response.content),
         )
 
-    return json.loads(response.content)["id"]
-
+    papers_category_cache.invalidate()
 
-def upload_post(meta_information, readable_text, image_id):
-    """Upload the post via the Wordpress API."""
-    print("upload post")
-    url = global_url + "articles"
+    return response.json()["id"]
 
-    header = generate_auth_header()
 
+def build_post(meta_information, readable_text, image_id):
+    """Return the JSON body of an article post."""
+    print("upload post")
     category_number = check_for_category(meta_information["category"])
     print("category_papers_id", meta_information["category_papers"])
 
-    post = {
+    return {
         "title": meta_information["title"],
         "status": "publish",
         "content": readable_text,
@@ -201,31 +135,14 @@ def upload_post(meta_information, readable_text, image_id):
         "category_papers": [meta_information["category_papers"]],
     }
 
-    response = requests.post(url, headers=header, json=post, timeout=5)
 
-    if response.status_code not in (200, 201):
-        print("upload_post failed: ", response.content)
-        raise HTTPException(
-            status_code=400,
-            detail="Post could not be uploaded!"
-            + str(response.status_code)
-            + str(response.content),
-        )
-
-    return response
-
-
-def upload_paper(meta_information, readable_text, image_id):
-    """Upload the post via the Wordpress API."""
+def build_paper(meta_information, readable_text, image_id):
+    """Return the JSON body of a papers post."""
     print("upload paper")
-    url = global_url + "papers"
-
-    header = generate_auth_header()
-
     category_number = check_for_category(meta_information["category"])
     print("upload_paper: category_papers_id", meta_information["category_papers"])
 
-    post = {
+    return {
         "title": meta_information["title"],
         "status": "publish",
         # WIP: Remove image_id once the image is uploaded to the media library
@@ -241,10 +158,13 @@ def upload_paper(meta_information, readable_text, image_id):
         "category_papers": [meta_information["category_papers"]],
     }
 
-    response = requests.post(url, headers=header, json=post, timeout=5)
+
+def publish(endpoint, post):
+    """Create the post at the endpoint, articles or papers, via the Wordpress API."""
+    response = get_client().post(endpoint, json=post)
 
     if response.status_code not in (200, 201):
-        print("upload_paper failed:", response.content)
+        print(f"Publishing {endpoint} failed: ", response.content)
         raise HTTPException(
             status_code=400,
             detail="Post could not be uploaded!"
@@ -253,3 +173,13 @@ def upload_paper(meta_information, readable_text, image_id):
         )
 
     return response
+
+
+def upload_post(meta_information, readable_text, image_id):
+    """Upload the post via the Wordpress API."""
+    return publish("articles", build_post(meta_information, readable_text, image_id))
+
+
+def upload_paper(meta_information, readable_text, image_id):
+    """Upload the post via the Wordpress API."""
+    return publish("papers", build_paper(meta_information, readable_text, image_id))
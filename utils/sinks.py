@@ -0,0 +1,98 @@
+"""Stand-ins for the Wordpress client writing what would be published to a file."""
+
+import hashlib
+import itertools
+import json
+import os
+import threading
+
+
+class SinkResponse:
+    """Response of a sink with the interface of WordpressResponse."""
+
+    def __init__(self, status_code, data, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.data = data
+        self.content = json.dumps(data).encode()
+
+    def json(self):
+        """Return the body like requests.Response.json."""
+        return self.data
+
+
+def describe_file(value):
+    """Describe an uploaded file by name, size and hash instead of its content."""
+    if not isinstance(value, tuple):
+        return value
+    filename, content = value[:2]
+    if hasattr(content, "read"):
+        content = content.read()
+    return {
+        "filename": filename,
+        "size": len(content),
+        "sha256": hashlib.sha256(content).hexdigest(),
+    }
+
+
+class JsonlSink:
+    """
+    Client appending every POST request as a JSON line instead of sending it,
+    for dry runs and benchmarks. GET requests find no terms, so all posts
+    are uncategorized and every papers category is created.
+    The ids count up in each process, the lines record the process id.
+    """
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        self.url = f"file://{self.path}"
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def request(self, method, endpoint, **kwargs):
+        """Record the request and answer it like Wordpress would."""
+        if method == "GET":
+            return SinkResponse(200, [], {"X-WP-Total": "0", "X-WP-TotalPages": "1"})
+
+        record = {"pid": os.getpid(), "method": method, "endpoint": endpoint}
+        if "json" in kwargs:
+            record["json"] = kwargs["json"]
+        if "files" in kwargs:
+            record["files"] = {
+                name: describe_file(value) for name, value in kwargs["files"].items()
+            }
+        with self._lock:
+            record["id"] = next(self._ids)
+            line = (json.dumps(record) + "\n").encode()
+            # A single append keeps the lines of several processes apart
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line)
+            finally:
+                os.close(fd)
+
+        data = {"id": record["id"]}
+        if endpoint == "media":
+            data["source_url"] = f"{self.url}#media-{record['id']}"
+        if "json" in kwargs and "name" in kwargs["json"]:
+            data["name"] = kwargs["json"]["name"]
+        return SinkResponse(201, data)
+
+    def get(self, endpoint, **kwargs):
+        """Answer a GET request."""
+        return self.request("GET", endpoint, **kwargs)
+
+    def post(self, endpoint, **kwargs):
+        """Record a POST request."""
+        return self.request("POST", endpoint, **kwargs)
+
+    def batch(self, sub_requests):
+        """Record the sub-requests and answer like the batch endpoint."""
+        responses = []
+        for method, endpoint, data in sub_requests:
+            response = self.request(method, endpoint, json=data)
+            responses.append({"status": response.status_code, "body": response.json()})
+        return SinkResponse(207, {"responses": responses})
+
+    def close(self):
+        """Nothing to close, every line is written right away."""
@@ -0,0 +1,169 @@
+"""Text spans of a PDF page extracted once and cut into clip regions in memory."""
+
+import fitz
+
+# Flags of the Strawanzerin parser, i.e. no images and no added spaces
+SPAN_FLAGS = (
+    fitz.TEXT_PRESERVE_LIGATURES
+    | fitz.TEXT_PRESERVE_WHITESPACE
+    | fitz.TEXT_INHIBIT_SPACES
+)
+# A new span starts where one of these changes
+STYLE_KEYS = ("size", "flags", "font", "color")
+EMPTY_RECT = tuple(fitz.EMPTY_RECT())
+
+
+def rects_overlap(a, b):
+    """Check if the rects overlap the way PyMuPDF clips characters."""
+    return not (a[0] >= b[2] or a[1] >= b[3] or a[2] <= b[0] or a[3] <= b[1])
+
+
+def union_rect(a, b):
+    """Return the union of the rects like MuPDF, empty rects are ignored."""
+    if b[0] >= b[2] or b[1] >= b[3]:
+        return a
+    if a[0] >= a[2] or a[1] >= a[3]:
+        return tuple(b)
+    return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+
+
+class Line:
+    """
+    Line of a text block with its spans as (style, text, bbox, chars) tuples
+    and the characters as (character, bbox) tuples.
+    """
+
+    def __init__(self, spans):
+        self.spans = spans
+        lefts, tops, rights, bottoms = zip(
+            *(bbox for _, _, _, chars in spans for _, bbox in chars)
+        )
+        # A clip which misses the outer extent misses all characters
+        self.outer = (min(lefts), min(tops), max(rights), max(bottoms))
+        # Largest left and top, smallest right and bottom of the characters
+        self.inner = (max(lefts), max(tops), min(rights), min(bottoms))
+
+    def clip(self, clip):
+        """Return the (style, text, bbox) spans of the characters overlapping clip."""
+        if not rects_overlap(self.outer, clip):
+            return []
+        # Usually the line is in one column and every character overlaps it
+        if (
+            self.inner[0] < clip[2]
+            and self.inner[1] < clip[3]
+            and self.inner[2] > clip[0]
+            and self.inner[3] > clip[1]
+        ):
+            return [(style, text, bbox) for style, text, bbox, _ in self.spans]
+
+        spans = []
+        for style, _, _, chars in self.spans:
+            kept = [(c, bbox) for c, bbox in chars if rects_overlap(bbox, clip)]
+            if not kept:
+                continue
+            text = "".join(c for c, _ in kept)
+            bbox = EMPTY_RECT
+            for _, char_bbox in kept:
+                bbox = union_rect(bbox, char_bbox)
+            if spans and spans[-1][0] == style:
+                # The characters in between are clipped, the span goes on
+                _, previous_text, previous_bbox = spans[-1]
+                spans[-1] = (
+                    style,
+                    previous_text + text,
+                    union_rect(previous_bbox, bbox),
+                )
+            else:
+                spans.append((style, text, bbox))
+        return spans
+
+
+class SpanLayer:
+    """
+    Characters of a page, extracted once with get_text("rawdict").
+    page.get_text("dict", clip=clip, sort=True) runs the whole page again for
+    every clip. PyMuPDF keeps the characters overlapping the clip, joins them
+    into spans of one style and sorts the blocks by the bbox of the kept
+    characters. get_spans does the same in memory, so its spans are the ones
+    of page.get_text for any clip.
+    """
+
+    def __init__(self, page, flags=SPAN_FLAGS):
+        self.page = page
+        self.number = page.number
+        self.rect = page.rect
+        self.flags = flags
+        self._blocks = None
+
+    @property
+    def blocks(self):
+        """Text blocks of the page as lists of Line objects."""
+        if self._blocks is None:
+            raw = self.page.get_text("rawdict", flags=self.flags)
+            self._blocks = []
+            for block in raw["blocks"]:
+                if block["type"] != 0:
+                    continue
+                lines = []
+                for line in block["lines"]:
+                    spans = [
+                        make_raw_span(span) for span in line["spans"] if span["chars"]
+                    ]
+                    if spans:
+                        lines.append(Line(spans))
+                if lines:
+                    self._blocks.append(lines)
+        return self._blocks
+
+    @property
+    def spans(self):
+        """Spans of the page like the ones of page.get_text("dict")."""
+        return [
+            make_span(style, text, bbox)
+            for lines in self.blocks
+            for line in lines
+            for style, text, bbox, _ in line.spans
+        ]
+
+    def get_spans(self, clip):
+        """Spans in the clip like the ones of page.get_text("dict", clip, sort=True)."""
+        clip = tuple(clip)
+        blocks = []
+        for lines in self.blocks:
+            bbox = EMPTY_RECT
+            spans = []
+            for line in lines:
+                line_spans = line.clip(clip)
+                for _, _, span_bbox in line_spans:
+                    bbox = union_rect(bbox, span_bbox)
+                spans += line_spans
+            if spans:
+                blocks.append((bbox, spans))
+        # Sorting is stable, like the sort of PyMuPDF
+        blocks.sort(key=lambda block: (block[0][3], block[0][0]))
+        return [make_span(*span) for _, spans in blocks for span in spans]
+
+
+def make_raw_span(span):
+    """
+    Return the (style, text, bbox, chars) tuple of a span of the rawdict.
+    Its bbox is the union_rect of the bboxes of its characters.
+    """
+    chars = [(char["c"], char["bbox"]) for char in span["chars"]]
+    text = "".join(c for c, _ in chars)
+    return tuple(span[key] for key in STYLE_KEYS), text, tuple(span["bbox"]), chars
+
+
+def make_span(style, text, bbox):
+    """Return a span dict with the keys of page.get_text("dict")."""
+    span = dict(zip(STYLE_KEYS, style))
+    span["text"] = text
+    span["bbox"] = bbox
+    return span
+
+
+def get_span_layer(page):
+    """Return the span layer of the page, the page itself if it is one."""
+    if isinstance(page, SpanLayer):
+        return page
+    return SpanLayer(page)
@@ -0,0 +1,58 @@
+"""Sorted interval index over bounding boxes to find the words in a rect."""
+
+from bisect import bisect_left, bisect_right
+
+
+def scan_inside(items, rect, get_bbox=None):
+    """Return the items fully inside the rect by checking every item."""
+    left, top, right, bottom = rect
+    inside = []
+    for item in items:
+        bbox = item if get_bbox is None else get_bbox(item)
+        if (
+            left <= bbox[0] <= right
+            and top <= bbox[1] <= bottom
+            and left <= bbox[2] <= right
+            and top <= bbox[3] <= bottom
+        ):
+            inside.append(item)
+    return inside
+
+
+class IntervalIndex:
+    """
+    Index of items sorted by the top of their bbox.
+    An item fully inside a rect has its top inside the rect, so only the items
+    in that interval are checked with a binary search instead of all items.
+    Without get_bbox the items are bboxes themselves, like the words of
+    page.get_text("words").
+    """
+
+    def __init__(self, items, get_bbox=None):
+        self.items = list(items)
+        if get_bbox is None:
+            self.bboxes = self.items
+        else:
+            self.bboxes = [get_bbox(item) for item in self.items]
+        tops = [bbox[1] for bbox in self.bboxes]
+        # Sorting is stable, items with the same top keep their order
+        self._order = sorted(range(len(tops)), key=tops.__getitem__)
+        self._tops = [tops[position] for position in self._order]
+
+    def inside(self, rect):
+        """Return the items fully inside the rect in their original order."""
+        left, top, right, bottom = rect
+        first = bisect_left(self._tops, top)
+        last = bisect_right(self._tops, bottom)
+
+        positions = []
+        for position in self._order[first:last]:
+            bbox = self.bboxes[position]
+            if (
+                left <= bbox[0] <= right
+                and left <= bbox[2] <= right
+                and top <= bbox[3] <= bottom
+            ):
+                positions.append(position)
+        positions.sort()
+        return [self.items[position] for position in positions]
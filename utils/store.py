@@ -0,0 +1,82 @@
+"""Small persistent JSON key-value stores for local parser state."""
+
+import fcntl
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+
+def get_state_path(filename):
+    """Return the path of a state file in STATE_PATH, defaulting to SAVE_PATH."""
+    directory = os.environ.get("STATE_PATH") or os.environ.get("SAVE_PATH") or "."
+    return os.path.join(directory, filename)
+
+
+class JsonStore:
+    """
+    Dictionary persisted as JSON file.
+    Every change is written to a temporary file which replaces the store,
+    so a crash never leaves a half written store behind.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._data = self._load()
+
+    def get(self, key, default=None):
+        """Return the value stored for the key."""
+        with self._lock:
+            return self._data.get(key, default)
+
+    def set(self, key, value):
+        """Store the value for the key and persist the store."""
+        with self._locked():
+            # Merge with changes of other processes since the last write
+            self._data = self._load()
+            self._data[key] = value
+            self._save()
+
+    def delete(self, key):
+        """Remove the key from the store."""
+        with self._locked():
+            self._data = self._load()
+            if self._data.pop(key, None) is not None:
+                self._save()
+
+    @contextmanager
+    def _locked(self):
+        """
+        Lock the store against the threads of this process and against other
+        processes, e.g. the workers of cli.py sharing STATE_PATH, so no
+        change is lost between loading and saving the store.
+        """
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(f"{self.path}.lock", "a", encoding="utf-8") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load(self):
+        """Read the store from disk, an unreadable store is started anew."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except ValueError as e:
+            print(f"Ignoring unreadable store {self.path}: {e}")
+            return {}
+
+    def _save(self):
+        """Write the store atomically, the caller holds the lock."""
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._data, f)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,35 @@
+"""Test the blank_page.py file."""
+
+import fitz
+import pytest
+from utils.blank_page import is_blank
+
+
+class TestBlankPage:
+    """Test class for the blank page detectors."""
+
+    def setup_method(self):
+        """Create an A3 spread with content on the left and a blank right half."""
+        self.document = fitz.open()
+        self.page = self.document.new_page(width=1190, height=842)
+        self.page.insert_text((72, 100), "Augustin", fontsize=24)
+        self.page.draw_rect(
+            fitz.Rect(72, 200, 500, 700), color=(0, 0, 0), fill=(1, 0, 0)
+        )
+        self.left = fitz.Rect(0, 0, 595, 842)
+        self.right = fitz.Rect(595, 0, 1190, 842)
+
+    def teardown_method(self):
+        """Close the spread."""
+        self.document.close()
+
+    @pytest.mark.parametrize("detector", ["pixmap", "content"])
+    def test_detectors(self, detector) -> None:
+        """Test if only the empty half is blank."""
+        assert not is_blank(self.page, self.left, detector)
+        assert is_blank(self.page, self.right, detector)
+
+    def test_unknown_detector(self) -> None:
+        """Test if unknown detectors are rejected."""
+        with pytest.raises(ValueError):
+            is_blank(self.page, self.left, "unknown")
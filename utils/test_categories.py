@@ -0,0 +1,71 @@
+"""Test the categories.py file."""
+
+from utils.categories import CategoryCache, normalize_name
+
+
+class StubResponse:
+    """Response of the stub client."""
+
+    def __init__(self, terms, total_pages):
+        self.status_code = 200
+        self.content = b""
+        self.headers = {"X-WP-TotalPages": str(total_pages)}
+        self.terms = terms
+
+    def json(self):
+        """Return the terms of the page."""
+        return self.terms
+
+
+class StubClient:
+    """Client serving the given terms with two terms per page."""
+
+    def __init__(self, terms):
+        self.terms = terms
+        self.requests = []
+
+    def get(self, endpoint):
+        """Return the page requested in the endpoint."""
+        self.requests.append(endpoint)
+        page = int(endpoint.split("page=")[-1])
+        total_pages = (len(self.terms) + 1) // 2
+        return StubResponse(self.terms[(page - 1) * 2 : page * 2], total_pages)
+
+
+class TestCategories:
+    """Test class for the category cache."""
+
+    def test_normalize_name(self) -> None:
+        """Test if entities, whitespace and case are normalized."""
+        assert normalize_name(" Tun &amp; Lassen ") == "tun & lassen"
+        assert normalize_name(582) == "582"
+
+    def test_lookup_pages_once(self) -> None:
+        """Test if all pages are loaded once and used for several lookups."""
+        client = StubClient(
+            [
+                {"id": 2, "name": "editorial"},
+                {"id": 3, "name": "tun &amp; lassen"},
+                {"id": 4, "name": "cover "},
+            ]
+        )
+        cache = CategoryCache(ttl=300, client=client)
+
+        assert cache.lookup("tun & lassen") == 3
+        assert cache.lookup("cover") == 4
+        assert cache.lookup("vorstadt") is None
+        assert len(client.requests) == 2
+
+    def test_invalidate_and_refresh_on_miss(self) -> None:
+        """Test if new terms are found after invalidation or on a miss."""
+        client = StubClient([{"id": 10, "name": "581"}])
+        cache = CategoryCache("category_papers", ttl=300, client=client)
+        assert cache.lookup("582") is None
+
+        client.terms.append({"id": 11, "name": "582"})
+        assert cache.lookup("582") is None
+        assert cache.lookup("582", refresh_on_miss=True) == 11
+
+        client.terms.append({"id": 12, "name": "583"})
+        cache.invalidate()
+        assert cache.lookup("583") == 12
@@ -0,0 +1,66 @@
+"""Test the checkpoints.py file."""
+
+from utils.checkpoints import CheckpointJournal
+from utils.jobs import Job
+from utils.store import JsonStore
+
+
+class TestCheckpoints:
+    """Test class for the checkpoint journal of an issue."""
+
+    def test_resume_after_failure(self, tmp_path) -> None:
+        """Test if a new run continues with the state of the failed run."""
+        path = str(tmp_path / "checkpoints.json")
+        checkpoint = CheckpointJournal(JsonStore(path), "site").open("abc", "570.pdf")
+        assert not checkpoint.resumed
+
+        checkpoint.commit_page(0, {"category": 0}, False, [], [], media_ids=[1])
+        checkpoint.commit_article(1, "article", [1], 10, [2])
+        checkpoint.commit_page(1, {"category": 0}, False, [], [], "cover", [2])
+        checkpoint.commit_article(2, "gustl", [2], 11, [3])
+        meta_array = {"category": "cover", "raw_text": "Anfang"}
+        checkpoint.commit_page(2, meta_array, True, [2], [3, 4], "cover", [3, 4])
+        # The run fails on page 3 after its first article is published
+        checkpoint.commit_article(3, "flush", [2], 12, [3, 4])
+
+        checkpoint = CheckpointJournal(JsonStore(path), "site").open("abc")
+        job = Job("570.pdf", "abc")
+        checkpoint.restore(job)
+
+        assert checkpoint.resumed
+        assert checkpoint.next_page == 3
+        assert checkpoint.data["meta_array"] == meta_array
+        assert checkpoint.data["next_page_needed"]
+        assert checkpoint.data["pending_pages"] == [2]
+        assert checkpoint.get_article(3, "flush")["post_id"] == 12
+        assert checkpoint.get_article(3, "article") is None
+        assert job.result() == {
+            "post_ids": [10, 11, 12],
+            "media_ids": [1, 2, 3, 4],
+            "categories": ["cover", "cover"],
+        }
+
+    def test_finish(self, tmp_path) -> None:
+        """Test if a finished issue starts from the beginning again."""
+        path = str(tmp_path / "checkpoints.json")
+        checkpoint = CheckpointJournal(JsonStore(path), "site").open("abc")
+        checkpoint.commit_page(0, {}, False, [], [])
+        assert CheckpointJournal(JsonStore(path), "other").open("abc").next_page == 0
+
+        checkpoint.finish()
+
+        assert CheckpointJournal(JsonStore(path), "site").open("abc").next_page == 0
+
+    def test_article_with_unknown_post(self, tmp_path) -> None:
+        """Test if an article which may have been created is not published again."""
+        path = str(tmp_path / "checkpoints.json")
+        checkpoint = CheckpointJournal(JsonStore(path), "site").open("abc")
+        checkpoint.commit_page(0, {}, False, [], [])
+        checkpoint.on_published(1, "article", [1], [5])(None)
+
+        checkpoint = CheckpointJournal(JsonStore(path), "site").open("abc")
+        job = Job("570.pdf", "abc")
+        checkpoint.restore(job)
+
+        assert checkpoint.get_article(1, "article") is not None
+        assert job.post_ids == []
@@ -0,0 +1,58 @@
+"""Test the debug_artifacts.py file."""
+
+import fitz
+from utils.debug_artifacts import DebugArtifacts
+
+
+class TestDebugArtifacts:
+    """Test class for the debug images rendered in the background."""
+
+    def create_document(self, tmp_path):
+        """Create a PDF file with two pages of text."""
+        path = str(tmp_path / "issue.pdf")
+        with fitz.open() as src:
+            for number in range(2):
+                page = src.new_page()
+                page.insert_text((72, 72), f"Seite {number}")
+            src.save(path)
+        return path
+
+    def test_identical_clips_are_captured_once(self, tmp_path) -> None:
+        """Test if identical clips of a page are merged into one capture."""
+        path = self.create_document(tmp_path)
+        artifacts = DebugArtifacts()
+        with fitz.open(path) as src:
+            artifacts.capture(src[0], fitz.Rect(60, 30, 200, 60), "a.png")
+            artifacts.capture(src[0], (60, 30, 200, 60.00001), "b.png")
+            artifacts.capture(src[1], (60, 30, 200, 60), "c.png")
+
+        pending = artifacts.pop_captures()
+        assert len(pending) == 2
+        captures = next(iter(pending.values()))
+        assert captures == {(60, 30, 200, 60): ({"a.png", "b.png"}, {"a", "b"})}
+        assert artifacts.pop_captures() == {}
+
+        artifacts.add_captures(pending)
+        assert artifacts.pop_captures() == pending
+
+    def test_render_in_background(self, tmp_path) -> None:
+        """Test if the clips and one overlay per page are rendered on close."""
+        path = self.create_document(tmp_path)
+        artifacts = DebugArtifacts()
+        with fitz.open(path) as src:
+            artifacts.capture(src[1], (60, 30, 200, 60), str(tmp_path / "top.png"))
+            artifacts.capture(src[1], (60, 30, 200, 60), str(tmp_path / "same.png"))
+            artifacts.capture(src[1], (10, 55, 80, 450), str(tmp_path / "side.png"))
+            artifacts.capture_file(path, 0, None, str(tmp_path / "page-0.png"))
+        artifacts.close()
+
+        top = fitz.Pixmap(str(tmp_path / "top.png"))
+        assert (top.width, top.height) == (140, 30)
+        assert (tmp_path / "same.png").read_bytes() == (
+            tmp_path / "top.png"
+        ).read_bytes()
+        assert (tmp_path / "side.png").exists()
+        assert (tmp_path / "upload-page-1-overlay.png").exists()
+        # The whole page needs no overlay
+        assert (tmp_path / "page-0.png").exists()
+        assert not (tmp_path / "upload-page-0-overlay.png").exists()
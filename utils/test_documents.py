@@ -0,0 +1,43 @@
+"""Test the documents.py file."""
+
+import pytest
+from test_setup import TestMain
+from utils.documents import DocumentSession, open_session
+
+
+class TestDocumentSession(TestMain):
+    """Test class for the documents shared by the stages of a parse job."""
+
+    def test_open_reuses_document(self) -> None:
+        """Test if a file is opened once per session."""
+        with DocumentSession() as session:
+            src = session.open(self.test1)
+            assert session.open(self.test1) is src
+            assert session.open(self.test2) is not src
+            # The session keeps the document of the page alive
+            page = src[0]
+            del src
+            assert page.get_text()
+
+    def test_close_closes_documents(self) -> None:
+        """Test if closing the session closes its documents, also on errors."""
+        with pytest.raises(RuntimeError):
+            with DocumentSession() as session:
+                src = session.open(self.test1)
+                raise RuntimeError("Parsing failed")
+        assert src.is_closed
+        with pytest.raises(ValueError):
+            session.open(self.test1)
+
+    def test_open_session(self) -> None:
+        """Test if a given session stays open and an own one is closed."""
+        with DocumentSession() as session:
+            with open_session(session) as shared_session:
+                assert shared_session is session
+                src = shared_session.open(self.test1)
+            assert not src.is_closed
+
+        with open_session() as own_session:
+            src = own_session.open(self.test1)
+        assert own_session.closed
+        assert src.is_closed
@@ -0,0 +1,73 @@
+"""Test the ingest.py file."""
+
+import hashlib
+import io
+import os
+
+import pytest
+from fastapi import HTTPException
+from test_setup import TestMain
+from utils.ingest import ingest_upload
+
+
+class Upload:
+    """Minimal stand-in for an UploadFile."""
+
+    def __init__(self, filename, content):
+        self.filename = filename
+        self.file = io.BytesIO(content)
+
+
+class TestIngest(TestMain):
+    """Test class for streaming uploads to their directory."""
+
+    def test_ingest_upload(self, tmp_path) -> None:
+        """Test if the file is saved with its hash and size."""
+        with open(self.test1, "rb") as f:
+            content = f.read()
+
+        ingested_file = ingest_upload(
+            Upload("582_augustin_fertig_kontrolle.pdf", content), str(tmp_path)
+        )
+
+        assert (
+            ingested_file.directory
+            == str(tmp_path / "582_augustin_fertig_kontrolle") + "/"
+        )
+        assert ingested_file.size == len(content)
+        assert ingested_file.sha256 == hashlib.sha256(content).hexdigest()
+        with open(ingested_file.path, "rb") as f:
+            assert f.read() == content
+        assert os.listdir(ingested_file.directory) == [
+            "582_augustin_fertig_kontrolle.pdf"
+        ]
+
+    @pytest.mark.parametrize(
+        "content, max_size, status_code",
+        [(b"", 100, 400), (b"no pdf", 100, 400), (b"%PDF-1.7" + b"0" * 100, 50, 413)],
+    )
+    def test_rejected_uploads(self, tmp_path, content, max_size, status_code) -> None:
+        """Test if empty, invalid and too large uploads leave no file behind."""
+        with pytest.raises(HTTPException) as error:
+            ingest_upload(Upload("test.pdf", content), str(tmp_path), max_size)
+
+        assert error.value.status_code == status_code
+        assert os.listdir(tmp_path / "test") == []
+
+    def test_same_filename(self, tmp_path) -> None:
+        """Test if an upload with the same name leaves the earlier file as it is."""
+        contents = []
+        for test_file in (self.test1, self.test2):
+            with open(test_file, "rb") as f:
+                contents.append(f.read())
+
+        first = ingest_upload(Upload("570_augustin.pdf", contents[0]), str(tmp_path))
+        second = ingest_upload(Upload("570_augustin.pdf", contents[1]), str(tmp_path))
+        again = ingest_upload(Upload("570_augustin.pdf", contents[0]), str(tmp_path))
+
+        assert second.path != first.path
+        assert again.path == first.path
+        for ingested_file, content in ((first, contents[0]), (second, contents[1])):
+            with open(ingested_file.path, "rb") as f:
+                assert f.read() == content
+        assert len(os.listdir(first.directory)) == 2
@@ -0,0 +1,81 @@
+"""Test the media.py file."""
+
+import threading
+import time
+
+from utils import media
+from utils.media import MediaIndex, MediaUploader
+from utils.store import JsonStore
+
+
+class TestMedia:
+    """Test class for the concurrent media uploader."""
+
+    def test_upload_many_keeps_order_and_limit(self, monkeypatch, tmp_path) -> None:
+        """Test if results keep the image order and uploads are bounded."""
+        lock = threading.Lock()
+        running = []
+        peak = []
+
+        def upload_image_data(image_filename, image_data, image_title):
+            with lock:
+                running.append(image_filename)
+                peak.append(len(running))
+            # Later images finish first
+            time.sleep(0.01 * (10 - int(image_data)))
+            with lock:
+                running.remove(image_filename)
+            return int(image_data), f"http://wordpress/{image_title}"
+
+        monkeypatch.setattr(media.requests, "upload_image_data", upload_image_data)
+
+        images = [(f"img_{i}.png", str(i).encode()) for i in range(8)]
+        media_index = MediaIndex(JsonStore(str(tmp_path / "media.json")), "site")
+        with MediaUploader(max_concurrency=3, media_index=media_index) as uploader:
+            uploaded_images = uploader.upload_many(images)
+
+        assert [image_id for image_id, _ in uploaded_images] == list(range(8))
+        assert uploaded_images[2][1] == "http://wordpress/img_2.png"
+        assert max(peak) <= 3
+
+    def test_known_images_are_not_uploaded(self, monkeypatch, tmp_path) -> None:
+        """Test if identical images are uploaded once, also after a restart."""
+        uploads = []
+
+        def upload_image_data(image_filename, image_data, image_title):
+            uploads.append(image_title)
+            return len(uploads), f"http://wordpress/{image_filename}"
+
+        monkeypatch.setattr(media.requests, "upload_image_data", upload_image_data)
+
+        images = [("logo.png", b"logo"), ("copy.png", b"logo")]
+        path = str(tmp_path / "media.json")
+        with MediaUploader(media_index=MediaIndex(JsonStore(path), "site")) as uploader:
+            first = uploader.upload_many(images)
+        with MediaUploader(media_index=MediaIndex(JsonStore(path), "site")) as uploader:
+            second = uploader.upload_many(images)
+            gustl = uploader.upload("gustl.png", b"gustl", "Gustl")
+
+        assert uploads == ["logo.png", "Gustl"]
+        assert first == second == [(1, "http://wordpress/logo.png")] * 2
+        assert gustl == (2, "http://wordpress/gustl.png")
+
+    def test_upload_file(self, monkeypatch, tmp_path) -> None:
+        """Test if image files are uploaded with their name and content."""
+        uploads = []
+
+        def upload_image_data(image_filename, image_data, image_title):
+            uploads.append((image_filename, image_data, image_title))
+            return 1, f"http://wordpress/{image_filename}"
+
+        monkeypatch.setattr(media.requests, "upload_image_data", upload_image_data)
+
+        image_path = tmp_path / "cover.png"
+        image_path.write_bytes(b"cover")
+        media_index = MediaIndex(JsonStore(str(tmp_path / "media.json")), "site")
+
+        assert media_index.upload_file(str(image_path), "Cover") == (
+            1,
+            "http://wordpress/cover.png",
+        )
+        assert uploads == [("cover.png", b"cover", "Cover")]
@@ -0,0 +1,172 @@
+"""Test the metrics.py file."""
+
+import shutil
+
+import fitz
+import pytest
+from test_setup import TestMain
+from utils import metrics
+from utils.checkpoints import CheckpointJournal
+from utils.jobs import Job
+from utils.parser_augustin import parse_augustin_document
+from utils.parser_strawanzerin import Strawanzerin
+from utils.sinks import JsonlSink
+from utils.store import JsonStore
+from utils.utils import PluginUtility
+from utils.wordpress import get_endpoint_label
+
+
+class TestMetrics(TestMain):
+    """Test class for the Prometheus metrics."""
+
+    def test_counter(self) -> None:
+        """Test if counters add up per label and render in the text format."""
+        counter = metrics.Counter("test_total", "Test counter.", ("state",))
+        counter.inc(state="done")
+        counter.inc(2, state="done")
+        counter.inc(state='fail"ed')
+
+        assert counter.get(state="done") == 3
+        assert counter.render().splitlines() == [
+            "# HELP test_total Test counter.",
+            "# TYPE test_total counter",
+            'test_total{state="done"} 3',
+            'test_total{state="fail\\"ed"} 1',
+        ]
+        with pytest.raises(ValueError):
+            counter.inc(-1, state="done")
+        with pytest.raises(ValueError):
+            counter.inc(stage="done")
+
+    def test_histogram(self) -> None:
+        """Test if observations are counted in cumulative buckets."""
+        histogram = metrics.Histogram(
+            "test_seconds", "Test histogram.", ("stage",), buckets=(0.1, 1)
+        )
+        histogram.observe(0.05, stage="text")
+        histogram.observe(0.1, stage="text")
+        histogram.observe(5, stage="text")
+
+        assert histogram.render().splitlines()[2:] == [
+            'test_seconds_bucket{stage="text",le="0.1"} 2',
+            'test_seconds_bucket{stage="text",le="1"} 2',
+            'test_seconds_bucket{stage="text",le="+Inf"} 3',
+            'test_seconds_sum{stage="text"} 5.15',
+            'test_seconds_count{stage="text"} 3',
+        ]
+
+    def test_gauge_function(self) -> None:
+        """Test if a gauge reads its value from the function on scrape."""
+        gauge = metrics.Gauge("test_queued", "Test gauge.")
+        assert gauge.render().splitlines()[-1] == "test_queued 0"
+        gauge.inc()
+        assert gauge.render().splitlines()[-1] == "test_queued 1"
+        gauge.set_function(lambda: 7)
+        assert gauge.render().splitlines()[-1] == "test_queued 7"
+
+    def test_job_metrics(self) -> None:
+        """Test if jobs report their stages, pages and outcome."""
+        done = metrics.ISSUES.get(state="done")
+        failed = metrics.ISSUES.get(state="failed")
+        pages = metrics.PAGES.get()
+
+        def parse(job):
+            job.set_page(0, 2)
+            with job.stage("metrics-test"):
+                job.set_page(1)
+                job.add_page()
+                job.add_page()
+
+        def fail(job):
+            raise ValueError("broken")
+
+        Job().run(parse)
+        Job().run(fail)
+
+        assert metrics.ISSUES.get(state="done") == done + 1
+        assert metrics.ISSUES.get(state="failed") == failed + 1
+        assert metrics.PAGES.get() == pages + 2
+        text = metrics.registry.render()
+        assert 'pdf_parser_stage_seconds_count{stage="metrics-test"} 1' in text
+        assert "pdf_parser_jobs_running 0" in text
+
+    def stub_wordpress(self, monkeypatch, tmp_path):
+        """Write the posts of the test to a JSONL file instead of Wordpress."""
+        monkeypatch.setenv("STATE_PATH", str(tmp_path))
+        monkeypatch.setattr("utils.media._media_index", None)
+        monkeypatch.setattr(
+            "utils.wordpress._client", JsonlSink(tmp_path / "posts.jsonl")
+        )
+
+    def test_job_metrics_resumed(self, monkeypatch, tmp_path) -> None:
+        """Test if a resumed job counts only the pages it parses."""
+        self.stub_wordpress(monkeypatch, tmp_path)
+        path_to_new_directory = str(tmp_path) + "/"
+        save_path_for_pdf = path_to_new_directory + "582.pdf"
+        shutil.copy(self.test1, save_path_for_pdf)
+        journal = CheckpointJournal(JsonStore(str(tmp_path / "checkpoints.json")))
+        checkpoint = journal.open("hash", "582.pdf")
+
+        with fitz.open(save_path_for_pdf) as src:
+            total_pages = len(PluginUtility().split_pages(src, path_to_new_directory))
+            # The run failed after all but the last two pages were processed
+            meta_array = {
+                "category": 0,
+                "image_id": "",
+                "image_text": "",
+                "index": 0,
+                "raw_text": "",
+                "headlines": [],
+                "starting_characters": [],
+                "category_papers": 1,
+            }
+            checkpoint.commit_page(total_pages - 3, meta_array, False, [], [])
+            pages = metrics.PAGES.get()
+
+            job = Job("582.pdf", "hash")
+            parse_augustin_document(
+                src,
+                save_path_for_pdf,
+                path_to_new_directory,
+                PluginUtility(),
+                job,
+                workers=1,
+                journal=journal,
+            )
+
+        assert job.total_pages == total_pages
+        assert metrics.PAGES.get() == pages + 2
+
+    def test_job_metrics_strawanzerin(self, monkeypatch, tmp_path) -> None:
+        """Test if a Strawanzerin job counts every page of the file."""
+        self.stub_wordpress(monkeypatch, tmp_path)
+        # There is no Strawanzerin issue in the test data, the file is made of
+        # a first page with its headlines and two pages of dates
+        save_path_for_pdf = str(tmp_path / "strawanzerin.pdf")
+        with fitz.open() as doc:
+            page = doc.new_page(width=595, height=842)
+            page.insert_text((40, 80), "Strawanzerin", fontsize=40)
+            page.insert_text((40, 140), "Gratis", fontsize=40)
+            for _ in range(2):
+                page = doc.new_page(width=595, height=842)
+                page.insert_text((40, 200), "Termine im Mai", fontsize=9)
+            doc.save(save_path_for_pdf)
+        # The file has no images, the text pages are counted
+        monkeypatch.setattr(
+            Strawanzerin,
+            "parse_strawanzerin_image",
+            lambda self, src, path_to_new_directory, job=None: ("", ""),
+        )
+        pages = metrics.PAGES.get()
+
+        job = Job("strawanzerin.pdf")
+        Strawanzerin().parse_strawanzerin(save_path_for_pdf, str(tmp_path) + "/", job)
+
+        assert job.total_pages == 3
+        assert metrics.PAGES.get() == pages + 3
+
+    def test_endpoint_label(self) -> None:
+        """Test if ids and queries are dropped from the endpoint label."""
+        assert get_endpoint_label("categories?per_page=100&page=2") == "categories"
+        assert get_endpoint_label("posts/12") == "posts"
+        assert get_endpoint_label("media") == "media"
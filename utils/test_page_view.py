@@ -0,0 +1,106 @@
+"""Test the page_view.py file."""
+
+import fitz
+import pytest
+from utils.page_view import PageView, get_halves, get_split_image_infos
+from utils.text_layer import TextLayer
+
+
+class TestPageView:
+    """Test class for the views on the halves of A3 spreads."""
+
+    def setup_method(self):
+        """Create an A3 spread and the A4 pages show_pdf_page splits it into."""
+        self.document = fitz.open()
+        self.spread = self.document.new_page(width=1190, height=842)
+        self.spread.insert_text((72, 100), "Links oben", fontsize=24)
+        self.spread.insert_text((700, 400), "Rechts Mitte", fontsize=12)
+        self.spread.draw_rect(fitz.Rect(900, 600, 1000, 700), fill=(1, 0, 0))
+        pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 10, 10), False)
+        pix.clear_with(0)
+        self.spread.insert_image(fitz.Rect(700, 100, 800, 200), pixmap=pix)
+
+        self.split = fitz.open()
+        for half in get_halves(self.spread):
+            page = self.split.new_page(width=half.width, height=half.height)
+            page.show_pdf_page(page.rect, self.document, 0, clip=half)
+        self.views = [
+            PageView(self.spread, half, number)
+            for number, half in enumerate(get_halves(self.spread))
+        ]
+
+    def teardown_method(self):
+        """Close the documents."""
+        self.split.close()
+        self.document.close()
+
+    def test_halves(self) -> None:
+        """Test if the halves cover the spread side by side."""
+        assert get_halves(self.spread) == [
+            fitz.Rect(0, 0, 595, 842),
+            fitz.Rect(595, 0, 1190, 842),
+        ]
+        assert self.views[1].rect == fitz.Rect(0, 0, 595, 842)
+        assert self.views[1].number == 1
+
+    @pytest.mark.parametrize("number", [0, 1])
+    def test_text_matches_split_page(self, number) -> None:
+        """Test if a view extracts the text of the split page in its coordinates."""
+        view = TextLayer(self.views[number])
+        page = TextLayer(self.split[number])
+
+        assert view.text == page.text
+        assert [word[4] for word in view.words] == [word[4] for word in page.words]
+        for view_word, page_word in zip(view.words, page.words):
+            assert view_word[:4] == pytest.approx(page_word[:4], abs=0.01)
+        assert self.views[number].get_text("words") == view.words
+
+    def test_clipped_dict_matches_split_page(self) -> None:
+        """Test if get_text takes a clip and flags like fitz.Page.get_text."""
+        kwargs = {"clip": (0, 300, 595, 500), "flags": 11, "sort": True}
+        view = self.views[1].get_text("dict", **kwargs)
+        page = self.split[1].get_text("dict", **kwargs)
+
+        assert view["width"] == pytest.approx(page["width"])
+        assert [
+            span["text"]
+            for block in view["blocks"]
+            for line in block["lines"]
+            for span in line["spans"]
+        ] == ["Rechts Mitte"]
+        assert len(view["blocks"]) == len(page["blocks"])
+
+    def test_split_image_infos(self) -> None:
+        """Test if the images are listed like on the pages of the saved split file."""
+        # Like a page split with show_pdf_page, both halves list the image
+        assert self.views[0].get_images() == self.views[1].get_images()
+
+        split = fitz.open("pdf", self.split.tobytes())
+        assert get_split_image_infos(self.views) == [
+            page.get_images(full=True) for page in split
+        ]
+        assert get_split_image_infos(self.views)[1][0][0] != (
+            self.views[1].get_images()[0][0]
+        )
+        split.close()
+
+    def test_crop(self) -> None:
+        """Test if a crop of a view only has the text of the cropped rect."""
+        crop = self.views[1].crop((0, 0, 595, 200))
+        assert crop.rect == fitz.Rect(0, 0, 595, 200)
+        assert crop.get_source_clip() == fitz.Rect(595, 0, 1190, 200)
+        assert crop.get_text() == ""
+        assert "Links" in self.views[0].crop((0, 0, 595, 200)).get_text()
+
+    def test_pixmap_and_spec(self) -> None:
+        """Test if views render their clip and can be rebuilt from their spec."""
+        pix = self.views[1].get_pixmap()
+        assert (pix.width, pix.height) == (595, 842)
+        pix = self.views[1].get_pixmap(clip=(305, 600, 405, 700))
+        # The rect is red on the spread
+        assert pix.pixel(50, 50) == (255, 0, 0)
+
+        view = PageView.from_spec(self.document, self.views[1].spec)
+        assert view.clip == self.views[1].clip
+        assert view.number == 1
+        assert view.get_images(full=True) == self.spread.get_images(full=True)
@@ -0,0 +1,44 @@
+"""Test the papers.py file."""
+
+import threading
+import time
+
+from utils import papers
+from utils.papers import PapersCategoryService
+from utils.store import JsonStore
+
+
+class TestPapers:
+    """Test class for the papers category get-or-create service."""
+
+    def test_concurrent_get_or_create(self, tmp_path, monkeypatch) -> None:
+        """Test if concurrent calls create the papers category only once."""
+        created = []
+
+        def create_papers_category(version_number):
+            time.sleep(0.05)
+            created.append(version_number)
+            return 42
+
+        monkeypatch.setattr(papers, "check_for_papers_category", lambda _: None)
+        monkeypatch.setattr(papers, "create_papers_category", create_papers_category)
+
+        store_path = str(tmp_path / "papers_categories.json")
+        service = PapersCategoryService(JsonStore(store_path), site="test")
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(service.get_or_create(582)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results == [42] * 5
+        assert created == [582]
+
+        # A restarted worker reads the id from the store without asking Wordpress
+        monkeypatch.setattr(papers, "check_for_papers_category", None)
+        restarted = PapersCategoryService(JsonStore(store_path), site="test")
+        assert restarted.get_or_create(582) == 42
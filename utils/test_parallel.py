@@ -0,0 +1,62 @@
+"""Test the parallel page extraction of the parser_augustin.py file."""
+
+import os
+import shutil
+
+import fitz
+import pytest
+from test_setup import TestMain
+from utils.jobs import Job
+from utils.parallel import map_pages
+from utils.parser_augustin import iter_page_contents
+from utils.utils import PluginUtility
+
+
+class TestParallel(TestMain):
+    """Test if the parallel extraction matches the sequential extraction."""
+
+    def extract(self, save_path_for_pdf, path_to_new_directory, workers):
+        """Return the comparable content of all pages."""
+        src = fitz.open(save_path_for_pdf)
+        pages = PluginUtility().split_pages(src, path_to_new_directory)
+        contents = []
+        for content in iter_page_contents(
+            pages,
+            save_path_for_pdf,
+            path_to_new_directory,
+            PluginUtility(),
+            Job(),
+            workers,
+        ):
+            text_page = content.pop("text_page")
+            content.pop("timings")
+            content["text"] = text_page.get_text()
+            content["headlines"] = [
+                span["text"]
+                for block in text_page.get_text("dict", sort=True)["blocks"]
+                for line in block.get("lines", [])
+                for span in line["spans"]
+            ]
+            contents.append(content)
+        src.close()
+        return contents
+
+    @pytest.mark.parametrize("issue", ["test1", "test2", "test3", "test4", "test5"])
+    def test_parallel_matches_sequential(self, issue, tmp_path) -> None:
+        """Test if the page contents are the same with and without worker pool."""
+        path_to_new_directory = str(tmp_path) + "/"
+        save_path_for_pdf = os.path.join(path_to_new_directory, "test.pdf")
+        shutil.copy(getattr(self, issue), save_path_for_pdf)
+
+        sequential = self.extract(save_path_for_pdf, path_to_new_directory, 1)
+        parallel = self.extract(save_path_for_pdf, path_to_new_directory, 2)
+
+        assert len(sequential) > 0
+        assert sequential == parallel
+
+    def test_map_pages_pending(self) -> None:
+        """Test if the results keep their order with few pending pages."""
+        arguments = [("page_count",), ("name",)] * 3
+        results = list(map_pages(getattr, self.test1, arguments, 2, pending=1))
+        with fitz.open(self.test1) as src:
+            assert results == [getattr(src, name) for name, in arguments]
@@ -0,0 +1,62 @@
+"""Test the profiling.py file."""
+
+import pstats
+
+import pytest
+from utils.jobs import Job
+from utils.profiling import get_profile_mode, profile
+
+
+def busy_function():
+    """Spend some time in Python code."""
+    return sum(index * index for index in range(200000))
+
+
+class TestProfiling:
+    """Test class for the opt-in profiling of jobs."""
+
+    def test_get_profile_mode(self) -> None:
+        """Test if the profile parameter selects the profiler."""
+        assert get_profile_mode(None) is None
+        assert get_profile_mode("0") is None
+        assert get_profile_mode("1") == "cprofile"
+        assert get_profile_mode("Sample") == "sample"
+        with pytest.raises(ValueError):
+            get_profile_mode("perf")
+
+    def test_unprofiled_job(self, tmp_path) -> None:
+        """Test if jobs without profile are not profiled."""
+        job = Job()
+        with profile(job, str(tmp_path)):
+            busy_function()
+        assert job.profile_path is None
+        assert job.to_dict()["profile"] is None
+
+    def test_cprofile(self, tmp_path) -> None:
+        """Test if the cProfile is saved and summarized in the job."""
+        job = Job(profile="cprofile")
+        with profile(job, str(tmp_path)):
+            busy_function()
+
+        assert job.profile_path == str(tmp_path / "profile.prof")
+        functions = pstats.Stats(job.profile_path).stats
+        assert any(name == "busy_function" for _, _, name in functions)
+        status = job.to_dict()["profile"]
+        assert status["mode"] == "cprofile"
+        assert status["available"]
+        assert any("busy_function" in entry["function"] for entry in status["top"])
+
+    def test_sampling_profile_of_failed_block(self, tmp_path) -> None:
+        """Test if the samples are saved as collapsed stacks also on errors."""
+        job = Job(profile="sample")
+        with pytest.raises(ValueError):
+            with profile(job, str(tmp_path)):
+                for _ in range(10):
+                    busy_function()
+                raise ValueError("broken")
+
+        lines = (tmp_path / "profile.txt").read_text().splitlines()
+        assert lines
+        assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+        assert any("busy_function" in line for line in lines)
+        assert job.profile_top
@@ -0,0 +1,146 @@
+"""Test the publisher.py file."""
+
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from requests.exceptions import ReadTimeout
+from utils import publisher as publisher_module
+from utils.publisher import BatchPublisher
+from utils.sinks import SinkResponse
+from utils.wordpress import WordpressClient
+
+
+class FakeClient:
+    """Client answering batch calls with increasing ids."""
+
+    def __init__(self, status_code=207, failing_title=None):
+        self.status_code = status_code
+        self.failing_title = failing_title
+        self.batches = []
+        self.next_id = 100
+
+    def batch(self, sub_requests):
+        """Answer the sub-requests, the post with the failing title fails."""
+        self.batches.append([body["title"] for _, _, body in sub_requests])
+        responses = []
+        for _, _, body in sub_requests:
+            if body["title"] == self.failing_title:
+                responses.append({"status": 500, "body": {"message": "failed"}})
+            else:
+                self.next_id += 1
+                responses.append({"status": 201, "body": {"id": self.next_id}})
+        return SinkResponse(self.status_code, {"responses": responses})
+
+
+class TestPublisher:
+    """Test class for the batch publisher."""
+
+    def test_batches(self, monkeypatch) -> None:
+        """Test if posts are sent in full batches and ids reach their callbacks."""
+        client = FakeClient()
+        monkeypatch.setattr(publisher_module, "get_client", lambda: client)
+        # A single post is sent without the batch endpoint
+        monkeypatch.setattr(
+            publisher_module.requests,
+            "publish",
+            lambda endpoint, post: SinkResponse(201, {"id": 200}),
+        )
+        published = []
+        publisher = BatchPublisher(batch_size=3)
+
+        for index in range(4):
+            publisher.publish("articles", {"title": f"post {index}"}, published.append)
+        publisher.call_when_published(lambda: published.append("page done"))
+        assert published == [101, 102, 103]
+
+        publisher.flush()
+        publisher.call_when_published(lambda: published.append("issue done"))
+
+        assert client.batches == [["post 0", "post 1", "post 2"]]
+        assert published == [101, 102, 103, 200, "page done", "issue done"]
+
+    def test_batch_size_is_limited(self) -> None:
+        """Test if Wordpress' limit of 25 sub-requests is kept."""
+        assert BatchPublisher(batch_size=100).batch_size == 25
+        assert not BatchPublisher(batch_size=1).batch_available
+
+    def test_fallback_to_single_posts(self, monkeypatch) -> None:
+        """Test if single requests are sent if the batch endpoint is missing."""
+        client = FakeClient(status_code=404)
+        monkeypatch.setattr(publisher_module, "get_client", lambda: client)
+        single_posts = []
+
+        def publish(endpoint, post):
+            single_posts.append((endpoint, post["title"]))
+            return SinkResponse(201, {"id": len(single_posts)})
+
+        monkeypatch.setattr(publisher_module.requests, "publish", publish)
+        published = []
+        publisher = BatchPublisher(batch_size=25)
+        publisher.publish("articles", {"title": "article"}, published.append)
+        publisher.publish("papers", {"title": "paper"}, published.append)
+        publisher.flush()
+
+        assert single_posts == [("articles", "article"), ("papers", "paper")]
+        assert published == [1, 2]
+        assert not publisher.batch_available
+
+    def test_failed_post(self, monkeypatch) -> None:
+        """Test if created posts are reported and later calls dropped on failure."""
+        client = FakeClient(failing_title="post 1")
+        monkeypatch.setattr(publisher_module, "get_client", lambda: client)
+        published = []
+        publisher = BatchPublisher(batch_size=25)
+        publisher.publish("articles", {"title": "post 0"}, published.append)
+        publisher.call_when_published(lambda: published.append("page 0 done"))
+        publisher.publish("articles", {"title": "post 1"}, published.append)
+        publisher.call_when_published(lambda: published.append("page 1 done"))
+        publisher.publish("articles", {"title": "post 2"}, published.append)
+
+        with pytest.raises(HTTPException):
+            publisher.flush()
+
+        assert published == [101, "page 0 done", 102]
+
+    def test_timed_out_batch(self, monkeypatch) -> None:
+        """Test if posts of a timed out batch are reported as maybe created."""
+
+        def batch(sub_requests):
+            raise ReadTimeout("Read timed out")
+
+        monkeypatch.setattr(
+            publisher_module, "get_client", lambda: SimpleNamespace(batch=batch)
+        )
+        published = []
+        publisher = BatchPublisher(batch_size=25)
+        publisher.publish("articles", {"title": "post 0"}, published.append)
+        publisher.call_when_published(lambda: published.append("page 0 done"))
+        publisher.publish("articles", {"title": "post 1"}, published.append)
+
+        with pytest.raises(HTTPException) as error:
+            publisher.flush()
+
+        assert error.value.status_code == 504
+        assert published == [None, None]
+
+    def test_batch_timeout(self, monkeypatch) -> None:
+        """Test if batch calls wait longer than single requests."""
+        monkeypatch.setenv("WP_API_USER", "user")
+        monkeypatch.setenv("WP_API_KEY", "key")
+        monkeypatch.delenv("WP_BATCH_TIMEOUT", raising=False)
+        timeouts = []
+
+        def post(url, json, timeout):
+            timeouts.append(timeout)
+            return SimpleNamespace(status_code=207, headers={}, content=b"", json=dict)
+
+        client = WordpressClient("http://wp/wp-json/wp/v2/", timeout=5)
+        monkeypatch.setattr(client.session, "post", post)
+        client.batch([("POST", "articles", {})] * 3)
+        monkeypatch.setenv("WP_BATCH_TIMEOUT", "60")
+        client = WordpressClient("http://wp/wp-json/wp/v2/", timeout=5)
+        monkeypatch.setattr(client.session, "post", post)
+        client.batch([("POST", "articles", {})] * 3)
+
+        assert timeouts == [(5, 15), (5, 60.0)]
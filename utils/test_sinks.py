@@ -0,0 +1,41 @@
+"""Test the sinks.py file."""
+
+import hashlib
+import json
+
+from utils.sinks import JsonlSink
+
+
+class TestSinks:
+    """Test class for the JSONL sink."""
+
+    def test_jsonl_sink(self, tmp_path) -> None:
+        """Test if posts are written as lines and answered with new ids."""
+        path = tmp_path / "posts.jsonl"
+        sink = JsonlSink(str(path))
+
+        response = sink.get("categories?per_page=100&page=1")
+        assert response.status_code == 200
+        assert response.json() == []
+        assert response.headers["X-WP-TotalPages"] == "1"
+
+        media = sink.post(
+            "media", files={"file": ("img.jpg", b"image"), "caption": "Bild"}
+        )
+        post = sink.post("articles", json={"title": "Gustl", "featured_media": 1})
+
+        assert media.status_code == 201
+        assert media.json()["id"] == 1
+        assert media.json()["source_url"].startswith("file://")
+        assert post.json() == {"id": 2}
+        records = [json.loads(line) for line in path.read_text().splitlines()]
+        assert records[0]["files"] == {
+            "file": {
+                "filename": "img.jpg",
+                "size": 5,
+                "sha256": hashlib.sha256(b"image").hexdigest(),
+            },
+            "caption": "Bild",
+        }
+        assert records[1]["endpoint"] == "articles"
+        assert records[1]["json"]["title"] == "Gustl"
@@ -0,0 +1,72 @@
+"""Test the span_layer.py file."""
+
+import fitz
+from test_setup import TestMain
+from utils.span_layer import SPAN_FLAGS, SpanLayer, get_span_layer, union_rect
+
+
+def get_page_spans(page, clip=None, sort=False):
+    """Return the spans of page.get_text("dict") with the keys of the span layer."""
+    blocks = page.get_text("dict", clip=clip, sort=sort, flags=SPAN_FLAGS)["blocks"]
+    return [
+        (span["text"], span["size"], span["flags"], span["font"], span["color"])
+        for block in blocks
+        for line in block["lines"]
+        for span in line["spans"]
+    ]
+
+
+def get_layer_spans(spans):
+    """Return the spans of the span layer like get_page_spans."""
+    return [
+        (span["text"], span["size"], span["flags"], span["font"], span["color"])
+        for span in spans
+    ]
+
+
+class TestSpanLayer(TestMain):
+    """Test class for the spans of a page cut into clip regions in memory."""
+
+    def test_spans_match_page(self) -> None:
+        """Test if the spans of the page match page.get_text("dict")."""
+        src = fitz.open(self.test1)
+        for page in src:
+            span_layer = SpanLayer(page)
+            assert get_layer_spans(span_layer.spans) == get_page_spans(page)
+        src.close()
+
+    def test_clipped_spans_match_page(self) -> None:
+        """
+        Test if the spans of the columns match the clipped extraction, also
+        for lines and spans cut by the edges of the columns.
+        """
+        src = fitz.open(self.test1)
+        for page in src:
+            span_layer = SpanLayer(page)
+            width, height = page.rect.width, page.rect.height
+            clips = [
+                (0, 0, 180, height),
+                (180, 0, 320, height),
+                (320, 200.5, 460, height),
+                (460, 0, width, 431.25),
+                (0, 0, width, 150.3),
+            ]
+            for clip in clips:
+                assert get_layer_spans(span_layer.get_spans(clip)) == get_page_spans(
+                    page, clip, sort=True
+                )
+        src.close()
+
+    def test_union_rect(self) -> None:
+        """Test if empty rects are left out of the union like in MuPDF."""
+        assert union_rect((0, 0, 1, 1), (2, 2, 3, 3)) == (0, 0, 3, 3)
+        assert union_rect((0, 0, 1, 1), (5, 0, 5, 1)) == (0, 0, 1, 1)
+        assert union_rect(tuple(fitz.EMPTY_RECT()), (2, 2, 3, 3)) == (2, 2, 3, 3)
+
+    def test_get_span_layer(self) -> None:
+        """Test if a span layer is passed on and a page gets a new one."""
+        src = fitz.open(self.test1)
+        span_layer = get_span_layer(src[0])
+        assert get_span_layer(span_layer) is span_layer
+        assert span_layer.rect == src[0].rect
+        src.close()
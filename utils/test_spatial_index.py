@@ -0,0 +1,50 @@
+"""Test the spatial_index.py file."""
+
+import fitz
+from test_setup import TestMain
+from utils.spatial_index import IntervalIndex
+
+
+def scan(words, rect):
+    """Find the words fully inside the rect by checking every word."""
+    left, top, right, bottom = rect
+    return [
+        word
+        for word in words
+        if left <= word[0] <= right
+        and top <= word[1] <= bottom
+        and left <= word[2] <= right
+        and top <= word[3] <= bottom
+    ]
+
+
+class TestSpatialIndex(TestMain):
+    """Test class for the interval index of bounding boxes."""
+
+    def test_inside_matches_scan(self) -> None:
+        """Test if the index finds the same words in the same order as a scan."""
+        rects = [
+            fitz.Rect(60, 30, 200, 60),
+            fitz.Rect(400, 30, 580, 60),
+            fitz.Rect(10, 55, 80, 450),
+            fitz.Rect(450, 55, 580, 350),
+            fitz.Rect(0, 0, 2000, 2000),
+        ]
+        src = fitz.open(self.test1)
+        for page in src:
+            words = page.get_text("words")
+            index = IntervalIndex(words)
+            for rect in rects:
+                assert index.inside(rect) == scan(words, rect)
+        src.close()
+
+    def test_boundaries(self) -> None:
+        """Test if words touching the rect are inside and negative boxes work."""
+        words = [
+            (-10, -10, -5, -5, "outside"),
+            (0, 0, 50, 50, "touching"),
+            (49, 49, 51, 51, "crossing"),
+        ]
+        index = IntervalIndex(words)
+        assert [word[4] for word in index.inside((0, 0, 50, 50))] == ["touching"]
+        assert len(index.inside((-20, -20, 100, 100))) == 3
@@ -0,0 +1,47 @@
+"""Test the store.py file."""
+
+import multiprocessing
+
+from utils.store import JsonStore
+
+PROCESSES = 4
+KEYS_PER_PROCESS = 25
+
+
+def set_keys(path, process):
+    """Set the keys of one process, each with its own load and save."""
+    store = JsonStore(path)
+    for number in range(KEYS_PER_PROCESS):
+        store.set(f"{process}-{number}", number)
+
+
+class TestJsonStore:
+    """Test class for the JSON stores shared by several processes."""
+
+    def test_set_and_delete(self, tmp_path) -> None:
+        """Test if changes are persisted and seen by a new store."""
+        path = str(tmp_path / "state" / "store.json")
+        store = JsonStore(path)
+        store.set("a", 1)
+        store.set("b", 2)
+        store.delete("a")
+        assert JsonStore(path).get("a") is None
+        assert JsonStore(path).get("b") == 2
+
+    def test_processes_lose_no_changes(self, tmp_path) -> None:
+        """Test if the changes of processes writing at the same time are all kept."""
+        path = str(tmp_path / "store.json")
+        context = multiprocessing.get_context("fork")
+        processes = [
+            context.Process(target=set_keys, args=(path, process))
+            for process in range(PROCESSES)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+        store = JsonStore(path)
+        for process in range(PROCESSES):
+            for number in range(KEYS_PER_PROCESS):
+                assert store.get(f"{process}-{number}") == number
@@ -0,0 +1,50 @@
+"""Test the text_layer.py file."""
+
+import pickle
+
+import fitz
+from test_setup import TestMain
+from utils.text_layer import SCAN_QUERIES, TextLayer
+
+
+class TestTextLayer(TestMain):
+    """Test class for the cached text layer of a page."""
+
+    def test_views_match_page(self) -> None:
+        """Test if the views match the text extracted from the page."""
+        src = fitz.open(self.test1)
+        for page in src:
+            text_layer = TextLayer(page)
+            assert text_layer.get_text("dict", sort=True) == page.get_text(
+                "dict", sort=True
+            )
+            assert [word[:5] for word in text_layer.get_text("words")] == [
+                word[:5] for word in page.get_text("words")
+            ]
+            text_layer.release()
+        src.close()
+
+    def test_release_and_pickle(self) -> None:
+        """Test if built views survive the release and pickling builds all views."""
+        src = fitz.open(self.test1)
+        text_layer = TextLayer(src[1])
+        words = text_layer.words
+        copy = pickle.loads(pickle.dumps(text_layer))
+        text_layer.release()
+
+        assert text_layer.words == words
+        assert copy.page is None
+        assert copy.get_text() == src[1].get_text()
+        src.close()
+
+    def test_words_inside(self) -> None:
+        """Test if the words are the same before and after the index is built."""
+        src = fitz.open(self.test1)
+        text_layer = TextLayer(src[1])
+        rect = fitz.Rect(60, 30, 580, 450)
+        found = [text_layer.words_inside(rect) for _ in range(SCAN_QUERIES)]
+        assert text_layer._word_index is None  # pylint: disable=protected-access
+        found.append(text_layer.words_inside(rect))
+        assert text_layer._word_index is not None  # pylint: disable=protected-access
+        assert found[0] and all(words == found[0] for words in found)
+        src.close()
@@ -0,0 +1,34 @@
+"""Test the text_normalizer.py file."""
+
+from utils.parser_augustin import clean_text
+from utils.text_normalizer import TextNormalizer, normalize_lines
+
+
+class TestTextNormalizer:
+    """Test class for the streaming text normalizer."""
+
+    def test_lines_are_joined(self) -> None:
+        """Test if lines are dehyphenated and joined unless a paragraph ends."""
+        text = (
+            "Ein Wort wird ge-\ntrennt und \nweiter geht es. \n\nNeu:\nEnde - \ndamit"
+        )
+        assert normalize_lines(text) == (
+            "Ein Wort wird getrennt und weiter geht es.\nNeu:\nEnde - damit"
+        )
+
+    def test_spaces_are_collapsed(self) -> None:
+        """Test if runs of spaces are collapsed, also across lines."""
+        assert normalize_lines("a   b  \n  c    d") == "a b c d"
+
+    def test_end_of_article(self) -> None:
+        """Test if the text is cut at the end of article symbol."""
+        normalizer = TextNormalizer()
+        normalizer.add_line("Letzter Satz.  ■ Nächster Artikel")
+        normalizer.add_line("wird ignoriert")
+        assert normalizer.finished
+        assert normalizer.getvalue() == "Letzter Satz. "
+
+    def test_clean_text(self) -> None:
+        """Test if the article starts with the starting characters."""
+        raw_text = "Überschrift\nI\nch bin ein Ar-\ntikel. \n\n■ Inserat"
+        assert clean_text(raw_text, ["I"]) == "Ich bin ein Artikel.\n"
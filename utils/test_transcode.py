@@ -0,0 +1,77 @@
+"""Test the transcode.py file."""
+
+import fitz
+import pytest
+from utils.transcode import TranscodeSettings, Transcoder, transcode_image
+
+
+def make_image(width, height, alpha=False, opaque=True):
+    """Return a PNG image with a gradient to keep it from compressing too well."""
+    samples = bytearray()
+    for y in range(height):
+        for x in range(width):
+            samples += bytes(((x * 7) % 256, (y * 5) % 256, (x * y) % 256))
+            if alpha:
+                samples.append(255 if opaque or x < width // 2 else 0)
+    pix = fitz.Pixmap(fitz.csRGB, width, height, bytes(samples), alpha)
+    return pix.tobytes("png")
+
+
+class TestTranscode:
+    """Test class for the image transcoding."""
+
+    def test_jpeg_with_capped_edge(self) -> None:
+        """Test if opaque images become JPEG no larger than the maximum edge."""
+        settings = TranscodeSettings("jpeg", max_edge=100, quality=80)
+
+        image_filename, image_data = transcode_image(
+            "page_1_img_0.png", make_image(300, 150, alpha=True), settings
+        )
+
+        pix = fitz.Pixmap(image_data)
+        assert image_filename == "page_1_img_0.jpg"
+        assert (pix.width, pix.height) == (100, 50)
+        assert pix.colorspace.n == 3
+        assert not pix.alpha
+
+    def test_transparency_stays_png(self) -> None:
+        """Test if images with transparency are still PNG after scaling."""
+        settings = TranscodeSettings("jpeg", max_edge=100, quality=80)
+
+        image_filename, image_data = transcode_image(
+            "page_1_img_0.png", make_image(200, 100, alpha=True, opaque=False), settings
+        )
+
+        pix = fitz.Pixmap(image_data)
+        assert image_filename == "page_1_img_0.png"
+        assert (pix.width, pix.height) == (100, 50)
+        assert pix.alpha
+
+    def test_original(self) -> None:
+        """Test if the original format leaves the images untouched."""
+        image = make_image(300, 150)
+
+        assert transcode_image(
+            "page_1_img_0.png", image, TranscodeSettings("original")
+        ) == ("page_1_img_0.png", image)
+
+    def test_unknown_format(self) -> None:
+        """Test if an unknown format is rejected."""
+        with pytest.raises(ValueError):
+            TranscodeSettings("gif")
+
+    def test_transcoder_counts_bytes(self) -> None:
+        """Test if the transcoder keeps the order and counts the saved bytes."""
+        images = [(f"img_{i}.png", make_image(120 + i, 80)) for i in range(3)]
+
+        with Transcoder(TranscodeSettings("jpeg", 2048, 85), workers=1) as transcoder:
+            transcoded = transcoder.transcode_many(images)
+
+        assert [name for name, _ in transcoded] == [
+            "img_0.jpg",
+            "img_1.jpg",
+            "img_2.jpg",
+        ]
+        assert transcoder.original_bytes == sum(len(data) for _, data in images)
+        assert transcoder.transcoded_bytes == sum(len(data) for _, data in transcoded)
+        assert transcoder.saved_bytes > 0
@@ -0,0 +1,38 @@
+"""Test the uploads.py file."""
+
+from utils.jobs import Job
+from utils.store import JsonStore
+from utils.uploads import UploadRegistry
+
+
+class TestUploads:
+    """Test class for the registry of processed uploads."""
+
+    def test_record_and_get(self, tmp_path) -> None:
+        """Test if finished jobs are found by content hash and site."""
+        path = str(tmp_path / "uploads.json")
+        registry = UploadRegistry(JsonStore(path), "http://one/")
+        job = Job("570_augustin_fertig_kontrolle.pdf", "abc")
+        job.add_done_callback(registry.record)
+        job.add_post(7)
+        job.add_media(8)
+        job.add_category("cover")
+
+        assert registry.get("abc") is None
+        job.finish()
+
+        result = UploadRegistry(JsonStore(path), "http://one/").get("abc")
+        assert result["job_id"] == job.id
+        assert result["post_ids"] == [7]
+        assert result["media_ids"] == [8]
+        assert result["categories"] == ["cover"]
+        assert UploadRegistry(JsonStore(path), "http://two/").get("abc") is None
+
+    def test_failed_job_is_not_recorded(self, tmp_path) -> None:
+        """Test if only successfully finished jobs are recorded."""
+        registry = UploadRegistry(JsonStore(str(tmp_path / "uploads.json")), "site")
+        job = Job("test.pdf", "abc")
+        job.add_done_callback(registry.record)
+        job.fail("error")
+
+        assert registry.get("abc") is None
@@ -0,0 +1,126 @@
+"""Text of a PDF page extracted once and shared by all parsing steps."""
+
+import fitz
+from utils.spatial_index import IntervalIndex, scan_inside
+
+# Rect queries of a page answered by scanning its words before the word
+# index is built, see benchmarks/bench_spatial_index.py
+SCAN_QUERIES = 3
+
+
+class TextLayer:
+    """
+    Cache of the text layer of a page.
+    MuPDF extracts the text once into a TextPage, the words, dict and text
+    views are built from it on first use. The layer provides the get_text
+    calls of fitz.Page used by the parser, so it can be passed instead of the
+    page. When pickled, e.g. to return it from a worker process, all views are
+    built and the page is left behind.
+    """
+
+    def __init__(self, page):
+        self.page = page
+        self.number = page.number
+        self.rect = tuple(page.rect)
+        self._textpage = None
+        self._words = None
+        self._dict = None
+        self._text = None
+        self._word_index = None
+        self._word_queries = 0
+
+    @property
+    def textpage(self):
+        """Return the TextPage of the page, extracted on first use."""
+        if self._textpage is None:
+            if self.page is None:
+                raise ValueError(f"Text layer of page {self.number} was released")
+            # Keep the images, they separate the text blocks of the dict view
+            self._textpage = self.page.get_textpage(flags=fitz.TEXTFLAGS_DICT)
+        return self._textpage
+
+    @property
+    def words(self):
+        """Words of the page like page.get_text("words")."""
+        if self._words is None:
+            textpage = self.textpage
+            self._words = self.page.get_text("words", textpage=textpage)
+        return self._words
+
+    @property
+    def dict(self):
+        """Text blocks of the page like page.get_text("dict", sort=True)."""
+        if self._dict is None:
+            textpage = self.textpage
+            self._dict = self.page.get_text("dict", textpage=textpage, sort=True)
+        return self._dict
+
+    @property
+    def text(self):
+        """Plain text of the page like page.get_text()."""
+        if self._text is None:
+            textpage = self.textpage
+            self._text = self.page.get_text(textpage=textpage)
+        return self._text
+
+    @property
+    def word_index(self):
+        """Spatial index of the words, see IntervalIndex.inside."""
+        if self._word_index is None:
+            self._word_index = IntervalIndex(self.words)
+        return self._word_index
+
+    def get_text(self, option="text", sort=False):
+        """Return a view of the text layer like fitz.Page.get_text."""
+        if option == "words":
+            return self.words
+        if option == "dict" and sort:
+            return self.dict
+        if option == "text":
+            return self.text
+        raise ValueError(f"Text option {option} with sort={sort} not cached")
+
+    def words_inside(self, rect):
+        """
+        Return the words fully inside the rect in reading order.
+        Building the index costs about as much as scanning the words for three
+        rects, so the index is only built for further queries of the page.
+        """
+        self._word_queries += 1
+        if self._word_index is None and self._word_queries <= SCAN_QUERIES:
+            return scan_inside(self.words, rect)
+        return self.word_index.inside(rect)
+
+    def get_pixmap(self, *args, **kwargs):
+        """Render the page, used for debug images."""
+        return self.page.get_pixmap(*args, **kwargs)
+
+    @property
+    def parent(self):
+        """Return the document of the page, used for debug images."""
+        return self.page.parent
+
+    def materialize(self):
+        """Build all views so the layer no longer needs the page."""
+        if self.page is not None:
+            self._words, self._dict, self._text = self.words, self.dict, self.text
+        return self
+
+    def release(self):
+        """Free the TextPage and the page, the built views stay available."""
+        self._textpage = None
+        self.page = None
+
+    def __getstate__(self):
+        self.materialize()
+        state = self.__dict__.copy()
+        state["page"] = None
+        state["_textpage"] = None
+        return state
+
+
+def get_text_layer(page):
+    """Return the text layer of the page, the page itself if it is one."""
+    if isinstance(page, TextLayer):
+        return page
+    return TextLayer(page)
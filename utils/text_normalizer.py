@@ -0,0 +1,79 @@
+"""Join the extracted lines of an article into readable text in one pass."""
+
+import io
+import re
+
+# A line ending with one of these characters ends a paragraph
+ENDING_PUNCTUATION = (".", "!", "?", ":")
+# Everything after this symbol is not part of the article anymore
+END_OF_ARTICLE = "■"
+
+_SPACES = re.compile(" {2,}")
+
+
+class TextNormalizer:
+    """
+    Streaming normalizer for the text of an article.
+    Lines are dehyphenated and joined unless they end a paragraph, runs of
+    spaces are collapsed and the text is cut at the end of article symbol.
+    Every line is processed once and written to a single buffer, so the
+    time grows linearly with the length of the article.
+    """
+
+    def __init__(self):
+        self._buffer = io.StringIO()
+        self._previous_space = False
+        self.finished = False
+
+    def add_line(self, line):
+        """Add a line of the extracted text, empty lines are skipped."""
+        if not line.strip():
+            return
+
+        if line.endswith(" "):
+            # Remove the space in front of the newline of a paragraph
+            if line[-2] in ENDING_PUNCTUATION:
+                self.write(line[:-1] + "\n")
+            else:
+                self.write(line)
+        elif line.endswith(ENDING_PUNCTUATION):
+            self.write(line + "\n")
+        elif line.endswith(" -"):
+            # A dash set on purpose stays
+            self.write(line + " ")
+        elif line.endswith("-"):
+            # Remove the hyphen of a word split over two lines
+            self.write(line[:-1])
+        else:
+            self.write(line)
+
+    def write(self, text):
+        """Add text as it is, apart from collapsing spaces."""
+        if self.finished:
+            return
+
+        end = text.find(END_OF_ARTICLE)
+        if end != -1:
+            text = text[:end]
+            self.finished = True
+
+        if self._previous_space:
+            text = text.lstrip(" ")
+        text = _SPACES.sub(" ", text)
+        if text:
+            self._previous_space = text.endswith(" ")
+            self._buffer.write(text)
+
+    def getvalue(self):
+        """Return the normalized text."""
+        return self._buffer.getvalue()
+
+
+def normalize_lines(text):
+    """Normalize all lines of the text."""
+    normalizer = TextNormalizer()
+    for line in text.split("\n"):
+        normalizer.add_line(line)
+        if normalizer.finished:
+            break
+    return normalizer.getvalue()
@@ -0,0 +1,161 @@
+"""Transcode print resolution images to web sized JPEG, WebP or PNG."""
+
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import fitz
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional, it is only needed for WebP
+    Image = None
+
+
+class TranscodeSettings:
+    """
+    Target of the transcoding, configured via environment variables:
+    IMAGE_FORMAT is jpeg (default), webp or original to upload the images
+    as extracted, IMAGE_MAX_EDGE caps the longest edge in pixels and
+    IMAGE_QUALITY is the JPEG or WebP quality.
+    """
+
+    def __init__(self, image_format=None, max_edge=None, quality=None):
+        if image_format is None:
+            image_format = os.environ.get("IMAGE_FORMAT", "jpeg")
+        if max_edge is None:
+            max_edge = int(os.environ.get("IMAGE_MAX_EDGE", "2048"))
+        if quality is None:
+            quality = int(os.environ.get("IMAGE_QUALITY", "85"))
+        image_format = image_format.lower()
+        if image_format == "jpg":
+            image_format = "jpeg"
+        if image_format not in ("jpeg", "webp", "original"):
+            raise ValueError(f"Unknown image format {image_format}")
+        if image_format == "webp" and Image is None:
+            print("Warning: Pillow is not installed, using JPEG instead of WebP")
+            image_format = "jpeg"
+        self.image_format = image_format
+        self.max_edge = max_edge
+        self.quality = quality
+
+
+def has_transparency(pix):
+    """Check if any pixel of the pixmap is not fully opaque."""
+    if not pix.alpha:
+        return False
+    alpha = pix.samples[pix.n - 1 :: pix.n]
+    return alpha.count(255) != len(alpha)
+
+
+def transcode_image(image_filename, image_data, settings):
+    """
+    Convert the image to RGB, cap its longest edge and encode it to the
+    target format. Images with transparency are encoded to PNG.
+    Returns the new (image_filename, image_data) tuple.
+    """
+    if settings.image_format == "original":
+        return image_filename, image_data
+
+    pix = fitz.Pixmap(image_data)
+    transparent = has_transparency(pix)
+    longest_edge = max(pix.width, pix.height)
+    resize = settings.max_edge and longest_edge > settings.max_edge
+    is_png = image_filename.endswith(".png")
+    if transparent and is_png and not resize:
+        # The transparency needs a PNG anyway
+        return image_filename, image_data
+
+    if not transparent and pix.alpha:
+        pix = fitz.Pixmap(pix, 0)  # drop the opaque alpha channel
+    if pix.colorspace is None or pix.colorspace.n != 3:
+        pix = fitz.Pixmap(fitz.csRGB, pix)
+
+    if resize:
+        scale = settings.max_edge / longest_edge
+        pix = fitz.Pixmap(
+            pix,
+            max(1, round(pix.width * scale)),
+            max(1, round(pix.height * scale)),
+            None,
+        )
+
+    name = os.path.splitext(image_filename)[0]
+    if transparent:
+        transcoded = f"{name}.png", pix.tobytes("png")
+    elif settings.image_format == "webp":
+        image = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+        buffer = io.BytesIO()
+        image.save(buffer, "WEBP", quality=settings.quality)
+        transcoded = f"{name}.webp", buffer.getvalue()
+    else:
+        transcoded = f"{name}.jpg", pix.tobytes("jpg", jpg_quality=settings.quality)
+
+    # Small graphics can be smaller as PNG than as JPEG
+    if is_png and not resize and len(transcoded[1]) >= len(image_data):
+        return image_filename, image_data
+    return transcoded
+
+
+class Transcoder:
+    """
+    Transcode the images of an issue.
+    With more than one worker, configured via TRANSCODE_WORKERS, the images
+    are transcoded in a pool of worker processes. The transcoder counts the
+    bytes before and after transcoding.
+    """
+
+    def __init__(self, settings=None, workers=None):
+        if settings is None:
+            settings = TranscodeSettings()
+        if workers is None:
+            workers = int(os.environ.get("TRANSCODE_WORKERS", "1"))
+        self.settings = settings
+        self.original_bytes = 0
+        self.transcoded_bytes = 0
+        self._executor = None
+        if workers > 1 and settings.image_format != "original":
+            # Spawn fresh interpreters since MuPDF state must not be forked from threads
+            self._executor = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @property
+    def saved_bytes(self):
+        """Bytes saved by the transcoding so far."""
+        return self.original_bytes - self.transcoded_bytes
+
+    def transcode_many(self, images):
+        """
+        Transcode (image_filename, image_data) tuples.
+        Returns the transcoded tuples in the order of the given images.
+        """
+        if self._executor is None:
+            transcoded = [
+                transcode_image(image_filename, image_data, self.settings)
+                for image_filename, image_data in images
+            ]
+        else:
+            futures = [
+                self._executor.submit(
+                    transcode_image, image_filename, image_data, self.settings
+                )
+                for image_filename, image_data in images
+            ]
+            transcoded = [future.result() for future in futures]
+
+        self.original_bytes += sum(len(image_data) for _, image_data in images)
+        self.transcoded_bytes += sum(len(image_data) for _, image_data in transcoded)
+        return transcoded
+
+    def close(self):
+        """Stop the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
@@ -0,0 +1,37 @@
+"""Registry of processed uploads to answer identical re-uploads right away."""
+
+import os
+
+from utils.store import JsonStore, get_state_path
+
+
+class UploadRegistry:
+    """
+    Results of finished jobs by the content hash of their PDF file.
+    Like the papers categories, results are only valid for the Wordpress
+    site they were published to.
+    """
+
+    def __init__(self, store=None, site=None):
+        if store is None:
+            store = JsonStore(get_state_path("uploads.json"))
+        if site is None:
+            site = os.environ.get("WORDPRESS_URL")
+        self.store = store
+        self.site = site
+
+    def get(self, content_hash):
+        """Return the result of the earlier job of the content or None."""
+        return self.store.get(f"{self.site}#{content_hash}")
+
+    def record(self, job):
+        """Store the result of a successfully finished job."""
+        if job.content_hash is None:
+            return
+        entry = {
+            "job_id": job.id,
+            "filename": job.filename,
+            "finished_at": job.finished_at,
+        }
+        entry.update(job.result())
+        self.store.set(f"{self.site}#{job.content_hash}", entry)
@@ -2,12 +2,16 @@
 
 import os
 import re
-import tempfile
 
 import fitz
 from dotenv import load_dotenv
 from fastapi import HTTPException
-from utils.requests import upload_image
+from utils.blank_page import is_blank
+from utils.debug_artifacts import get_debug_artifacts
+from utils.ingest import ingest_upload
+from utils.media import get_media_index
+from utils.page_view import PageView, get_halves, get_page_view
+from utils.text_layer import get_text_layer
 
 
 class PluginUtility:
@@ -18,9 +22,8 @@ class PluginUtility:
         self.global_save_path = os.environ.get("SAVE_PATH")
         self.global_url = os.environ.get("WORDPRESS_URL")
         self.debug = os.environ.get("DEBUG")
-
-        # Create a new PDF document for the output
-        self.output_document = fitz.open()
+        # pixmap, content or png_size, see utils/blank_page.py
+        self.blank_page_detector = os.environ.get("BLANK_PAGE_DETECTOR", "pixmap")
 
     def download_image(self, page, doc, src):
         # Function code remains the same, but use self.global_path, self.debug, etc.
@@ -57,7 +60,7 @@ class PluginUtility:
             imgout.write(image["image"])
             imgout.close()
 
-        image_id = upload_image(image_path, image_title)
+        image_id = get_media_index().upload_file(image_path, image_title)
 
         return image_id
 
@@ -68,83 +71,58 @@ class PluginUtility:
 
         return st.st_size
 
-    def save_pdf_a3_to_pdf_a4(self, path_to_file, path_to_new_directory):
-        """Split the PDF file into single pages."""
-        pdf_document = fitz.open(path_to_file)
-
-        # Iterate through each page in the input PDF
-        for spage in pdf_document:  # for each page in input
+    def split_pages(self, src, path_to_new_directory):
+        """
+        Split the A3 spreads of the PDF file into A4 page views, portrait
+        pages are taken as they are. A spread is dropped from its first
+        blank half on. The uploaded file is left unchanged.
+        """
+        pages = []
+        for spage in src:
             if spage.rect.width < spage.rect.height:
-                self.output_document.insert_pdf(
-                    pdf_document, from_page=spage.number, to_page=spage.number
-                )
+                pages.append(PageView(spage, number=len(pages)))
                 continue
 
-            r = spage.rect  # input page rectangle
-            d = fitz.Rect(
-                spage.cropbox_position,  # CropBox displacement if not
-                spage.cropbox_position,
-            )  # starting at (0, 0)
-            r1 = r  # top left rect
-            r1.x1 /= 2  # half width
-            r2 = r1 + (r1.width, 0, r1.width, 0)  # top right rect
-            rect_list = [r1, r2]  # put them in a list
-
-            for rx in rect_list:  # run thru rect list
-                rx += d  # add the CropBox displacement
-                page = self.output_document.new_page(
-                    -1,  # new output page with rx dimensions
-                    width=rx.width,
-                    height=rx.height,
-                )
-                page.show_pdf_page(
-                    page.rect,  # fill all new page with the imageb
-                    pdf_document,  # input document
-                    spage.number,  # input page number
-                    clip=rx,  # which part to use of input page
-                )
-                #  Here we will convert the pdf to an image and check the size
-                pix = page.get_pixmap()  # render page to an image
-                name_png = f"{path_to_new_directory}page-{page.number}.png"  # _{random.randint(1,100)}
-                pix.save(name_png)  # store image as a PNG
-                imgsize = self.get_size(name_png)
-                if not self.debug:
-                    os.remove(name_png)
-                if imgsize < 1300:
-                    #  A6 blank page size approximately 1209 Yours may be different, check first
-                    self.output_document.delete_page(pno=-1)
+            for rx in get_halves(spage):
+                #  Check the half of the input page before using it
+                name_png = f"{path_to_new_directory}page-{len(pages)}.png"
+                if is_blank(
+                    spage,
+                    rx,
+                    self.blank_page_detector,
+                    image_path=name_png,
+                    keep_image=bool(self.debug),
+                ):
                     break
-        # Save the output PDF
-        self.output_document.save(path_to_file)
-        self.output_document.close()
+                pages.append(PageView(spage, rx, len(pages)))
+        return pages
 
     def split_pdf_to_single_pdfs(self, save_path_for_pdf, path_to_save_files):
         # Function code remains the same, but use self.debug, self.global_path, etc.
         # Replace global variables with self.<variable_name>
         """Split the PDF file into single pages."""
-        src = fitz.open(save_path_for_pdf)
-
         index = 0
-        # Iterate through each page in the input PDF
-        for index, _ in enumerate(src):
-            self.output_document = fitz.open()
-            self.output_document.insert_pdf(src, from_page=index, to_page=index)
-            self.output_document.save(f"{path_to_save_files}page-{index}.pdf")
+        with fitz.open(save_path_for_pdf) as src:
+            # Iterate through each page in the input PDF
+            for index, _ in enumerate(src):
+                with fitz.open() as output_document:
+                    output_document.insert_pdf(src, from_page=index, to_page=index)
+                    output_document.save(f"{path_to_save_files}page-{index}.pdf")
 
         return index
 
     def identify_category(self, page, i, path_to_new_directory):
         # Function code remains the same
         """Identify the category of the page."""
+        # Both rects are searched in the words extracted once
+        page = get_text_layer(page)
         rect = fitz.Rect(60, 30, 200, 60)
         if i % 2 == 0:
             rect = fitz.Rect(400, 30, 580, 60)
-        left, top, right, bottom = rect
         if self.debug:
             # Save the image to the new directory
-            pix = page.get_pixmap(clip=(left, top, right, bottom))
             name_png = f"{path_to_new_directory}page-{page.number}-category.png"
-            pix.save(name_png)
+            get_debug_artifacts().capture(page, rect, name_png)
 
         # Check if the category is in the rect on top
         text_in_rect = self._check_for_word_in_rect(page, rect, path_to_new_directory)
@@ -176,35 +154,20 @@ class PluginUtility:
         self, page, rect, path_to_new_directory, debug_image_name=False
     ) -> str:
         """Check if a word is in the rect."""
-        left, top, right, bottom = rect
         text_in_rect = ""
 
         # Debug images for each page and category
         if self.debug:
-            pix = page.get_pixmap(
-                clip=(
-                    left,
-                    top,
-                    right,
-                    bottom,
-                )
-            )
-            pix = page.get_pixmap(clip=(left, top, right, bottom))
-
             if debug_image_name:
-                pix.save(f"{path_to_new_directory}page-{page.number}-category_side.png")
+                name_png = (
+                    f"{path_to_new_directory}page-{page.number}-category_side.png"
+                )
             else:
-                pix.save(f"{path_to_new_directory}page-{page.number}-category.png")
-
-        for word in page.get_text("words"):
-            x0, y0, x1, y1, text = word[:5]
-            if (
-                left <= x0 <= right
-                and top <= y0 <= bottom
-                and left <= x1 <= right
-                and top <= y1 <= bottom
-            ):
-                text_in_rect += text + " "
+                name_png = f"{path_to_new_directory}page-{page.number}-category.png"
+            get_debug_artifacts().capture(page, rect, name_png)
+
+        for word in get_text_layer(page).words_inside(rect):
+            text_in_rect += word[4] + " "
 
         text_in_rect = text_in_rect.strip()
 
@@ -213,53 +176,29 @@ class PluginUtility:
     def upload_file(self, file):
         """Upload the file to the server."""
 
-        # Create a new directory for each uploaded file
-        path_to_new_directory = os.path.join(
-            self.global_save_path, file.filename.split(".")[0]
-        )
-
-        # Catch error if directory already exists
-        try:
-            os.mkdir(path_to_new_directory)
-        except OSError as error:
-            print(error)
-
-        # Save the uploaded file into the new directory
-        save_path_for_pdf = os.path.join(path_to_new_directory, file.filename)
-        with open(save_path_for_pdf, "wb") as f:
-            while contents := file.file.read(1024 * 1024):
-                f.write(contents)
-
-        # Add a slash to the end of the path
-        path_to_new_directory = path_to_new_directory + "/"
-
-        return save_path_for_pdf, path_to_new_directory
+        ingested_file = ingest_upload(file, self.global_save_path)
+        return ingested_file.path, ingested_file.directory
 
     def crop_by_percentage_page(
-        self, percentage, original_page, src, page_number, path_to_new_directory
+        self, percentage, original_page, page_number, path_to_new_directory
     ):
-        """Crop the page by a percentage from the top."""
-        self.output_document = fitz.open()
+        """Return a view of the top percentage of the page."""
+        original_page = get_page_view(original_page)
         # Get the dimensions of the original page
         original_width = original_page.rect.width
         original_height = original_page.rect.height
 
-        # Create a new page with half the height of the original page
         new_page_height = original_height / (100 / percentage)
-        new_page = self.output_document.new_page(
-            -1, width=original_width, height=new_page_height
-        )
-
-        # Set the crop box for the new page to half of the original page
-        new_page.show_pdf_page(new_page.rect, src, page_number, clip=new_page.rect)
+        new_page = original_page.crop((0, 0, original_width, new_page_height))
         if self.debug:
-            pix = new_page.get_pixmap()  # render page to an image
             name_png = f"{path_to_new_directory}page-{page_number}-crop-{percentage}.png"  # _{random.randint(1,100)}
-            pix.save(name_png)  # store image as a PNG
+            get_debug_artifacts().capture(new_page, None, name_png)
         return new_page
 
     def extract_version_number(self, name):
         """Extract the version number from the directory name."""
+        # Only the last part counts, the save path may contain numbers as well
+        name = os.path.basename(os.path.normpath(name))
         number_in_dir = [int(s) for s in re.findall(r"\d+", name)]
 
         if len(number_in_dir) != 1:
@@ -268,25 +207,26 @@ class PluginUtility:
         return number_in_dir[0]
 
     def save_page_as_image(self, page_number, src, path):
-        """Save the cover page of the PDF file as a PNG image."""
+        """Save the cover page of the issue as a PNG image, src are its pages."""
 
-        page = src.load_page(page_number)
+        page = src[page_number]
         pix = page.get_pixmap()  # render page to an image
         # This will lead to an error if the directory name changes
         version_number = self.extract_version_number(path)
         image_title = f"coverpage-version-{version_number}-page-{page_number}"
-        image_path = f"{path}/{image_title}.png"
+        image_data = pix.tobytes("png")
+        if self.debug:
+            with open(f"{path}/{image_title}.png", "wb") as f:
+                f.write(image_data)
 
-        pix.save(
-            image_path,
+        image_id = get_media_index().upload(
+            f"{image_title}.png", image_data, image_title
         )
 
-        image_id = upload_image(image_path, image_title)
-
         return image_id[0]
 
     def pdf_check(self, file):
-        """Check if the file is a PDF."""
+        """Check if the file is announced as PDF."""
         if file.content_type != "application/pdf":
             raise HTTPException(
                 status_code=400,
@@ -299,25 +239,4 @@ class PluginUtility:
                 detail="Filename does not end as PDF!",
             )
 
-        try:
-            # Save the uploaded file temporarily
-            with tempfile.NamedTemporaryFile(delete=False) as tmp:
-                tmp.write(file.file.read())
-                # Set the file pointer to the beginning of the file to be able to read it again
-                file.file.seek(0)
-                tmp_path = tmp.name
-
-            # Check if the file size is greater than 0 (i.e., not empty)
-            if os.path.getsize(tmp_path) == 0:
-                raise HTTPException(status_code=400, detail="Uploaded file is empty")
-
-            # Open the file to check if it is a valid PDF via the fitz library
-            doc = fitz.open(tmp_path)
-            doc.close()
-
-            # Clean up the temporary file
-            os.unlink(tmp_path)
-        except HTTPException as e:
-            raise HTTPException(
-                status_code=400, detail="Uploaded file is not a valid PDF"
-            ) from e
+        # The content is validated while it is saved, see utils/ingest.py
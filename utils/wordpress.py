@@ -0,0 +1,179 @@
+"""Pooled keep-alive HTTP client for the Wordpress REST API."""
+
+import base64
+import os
+import threading
+import time
+
+import requests
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from utils import metrics
+
+load_dotenv()
+
+
+def generate_auth_header():
+    """Generate the authentication header for the Wordpress API."""
+    try:
+        user = os.getenv("WP_API_USER")
+        if user is None:
+            raise ValueError("WP_API_USER not set in .env")
+
+        password = os.getenv("WP_API_KEY")
+        if password is None:
+            raise ValueError("WP_API_KEY not set in .env")
+
+        credentials = user + ":" + password
+
+        token = base64.b64encode(credentials.encode())
+
+        header = {"Authorization": "Basic " + token.decode("utf-8")}
+
+        return header
+
+    except Exception as e:
+        print(e, os.getenv("WP_API_USER"), os.getenv("WP_API_USER"))
+
+        raise e
+
+
+def get_endpoint_label(endpoint):
+    """Return the endpoint without query and ids, e.g. posts for posts/12?x=1."""
+    return endpoint.split("?", 1)[0].split("/", 1)[0] or "/"
+
+
+def observe_request(method, endpoint, start, status):
+    """Record the latency and the status of a request to Wordpress."""
+    endpoint = get_endpoint_label(endpoint)
+    metrics.WORDPRESS_REQUEST_SECONDS.observe(
+        time.perf_counter() - start, method=method, endpoint=endpoint
+    )
+    metrics.WORDPRESS_RESPONSES.inc(method=method, endpoint=endpoint, status=status)
+
+
+class WordpressResponse:
+    """Response of the Wordpress API with the JSON body decoded only once."""
+
+    def __init__(self, response):
+        self.response = response
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.content = response.content
+        try:
+            self.data = response.json()
+        except ValueError:
+            self.data = None
+
+    def json(self):
+        """Return the decoded JSON body like requests.Response.json."""
+        return self.data
+
+
+class WordpressClient:
+    """
+    Client owning a pooled requests session for the Wordpress API.
+    The connections are kept alive and the authentication header is only
+    computed once, so the many calls of an issue reuse the same connections.
+    """
+
+    def __init__(self, base_url=None, pool_size=None, timeout=5, batch_timeout=None):
+        if base_url is None:
+            base_url = os.environ.get("WORDPRESS_URL")
+        if base_url is None:
+            raise ValueError("WORDPRESS_URL not set in .env")
+        if pool_size is None:
+            pool_size = int(os.environ.get("WP_POOL_SIZE", "10"))
+
+        if batch_timeout is None and os.environ.get("WP_BATCH_TIMEOUT"):
+            batch_timeout = float(os.environ["WP_BATCH_TIMEOUT"])
+
+        self.base_url = base_url
+        self.timeout = timeout
+        # Read timeout of batch calls, by default the timeout per sub-request
+        self.batch_timeout = batch_timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update(generate_auth_header())
+        self.session.headers["Connection"] = "keep-alive"
+
+    def request(self, method, endpoint, **kwargs):
+        """Send a request to the endpoint relative to WORDPRESS_URL."""
+        kwargs.setdefault("timeout", self.timeout)
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, self.base_url + endpoint, **kwargs)
+        except requests.RequestException:
+            observe_request(method, endpoint, start, "error")
+            raise
+        observe_request(method, endpoint, start, response.status_code)
+        return WordpressResponse(response)
+
+    def get(self, endpoint, **kwargs):
+        """Send a GET request to the endpoint."""
+        return self.request("GET", endpoint, **kwargs)
+
+    def post(self, endpoint, **kwargs):
+        """Send a POST request to the endpoint."""
+        return self.request("POST", endpoint, **kwargs)
+
+    def batch(self, sub_requests):
+        """
+        Send (method, endpoint, body) sub-requests in one call to the batch
+        endpoint of Wordpress, which accepts up to 25 sub-requests. The
+        endpoints are relative to WORDPRESS_URL like for the other methods.
+        Wordpress handles the sub-requests one after the other, so the call
+        may take the timeout of every sub-request, see WP_BATCH_TIMEOUT.
+        """
+        # The batch endpoint lives next to the namespace, e.g. /wp-json/wp/v2/
+        root, _, namespace = self.base_url.partition("/wp-json/")
+        body = {
+            "requests": [
+                {"method": method, "path": f"/{namespace}{endpoint}", "body": data}
+                for method, endpoint, data in sub_requests
+            ]
+        }
+        read_timeout = self.batch_timeout
+        if read_timeout is None:
+            read_timeout = self.timeout * max(1, len(sub_requests))
+        start = time.perf_counter()
+        try:
+            response = self.session.post(
+                f"{root}/wp-json/batch/v1",
+                json=body,
+                timeout=(self.timeout, read_timeout),
+            )
+        except requests.RequestException:
+            observe_request("POST", "batch", start, "error")
+            raise
+        observe_request("POST", "batch", start, response.status_code)
+        return WordpressResponse(response)
+
+    def close(self):
+        """Close all pooled connections."""
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Return the Wordpress client shared by all upload functions."""
+    global _client  # pylint: disable=global-statement
+    with _client_lock:
+        if _client is None:
+            _client = WordpressClient()
+        return _client
+
+
+def set_client(client):
+    """
+    Replace the shared client, e.g. by a sink writing the posts to a file.
+    The client needs the get, post and request methods of WordpressClient.
+    """
+    global _client  # pylint: disable=global-statement
+    with _client_lock:
+        _client = client